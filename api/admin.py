@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Client, Meeting
+from .models import Client, Meeting, MeetingSeries, SeriesException
 
 
 @admin.register(Client)
@@ -13,4 +13,17 @@ class MeetingAdmin(admin.ModelAdmin):
 	list_display = ('id', 'title', 'client', 'start_time', 'end_time', 'location')
 	list_filter = ('client',)
 
+
+class SeriesExceptionInline(admin.TabularInline):
+	model = SeriesException
+	extra = 0
+
+
+@admin.register(MeetingSeries)
+class MeetingSeriesAdmin(admin.ModelAdmin):
+	list_display = ('id', 'title', 'client', 'start_time', 'rrule', 'timezone', 'ends_at')
+	list_filter = ('client',)
+	list_select_related = ('client',)
+	inlines = [SeriesExceptionInline]
+
 # Register your models here.
@@ -0,0 +1,183 @@
+"""Async read endpoints under `/api/async/` for ASGI deployments.
+
+The DRF viewsets are synchronous, so under an ASGI server each request
+holds a worker thread from start to finish and concurrent callers (such
+as the MCP bridge's fan-out) queue behind the thread pool. These views
+serve the same reads from coroutines, with the same query parameters,
+JSON bodies and ETags as their DRF counterparts:
+
+- content negotiation, filtering, `?fields=`, ordering, keyset
+  pagination and version scopes are delegated to the viewsets; the
+  filter step runs in a thread because django-filter validates some
+  values against the database;
+- ETags are computed for the path of the matching DRF endpoint, so a
+  client can revalidate on either with the same ETag;
+- every read goes through Django's async ORM (`aiterator`, `afirst`,
+  `aexists`, async iteration) and rows are serialized with the
+  api/fastpath.py row plan when `API_FAST_LIST` allows it, otherwise with
+  the viewset's serializer. Bodies are always JSON: where the DRF
+  endpoint would render the browsable API, these answer JSON.
+
+Writes stay on the DRF endpoints. Run under `uvicorn scheduler.asgi:application`.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.urls import reverse
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import availability, changes, recurrence
+from .fastpath import CHUNK_SIZE, build_rows, json_response, plan_columns, raw_values
+from .models import Client, Meeting, MeetingSeries
+from .serializers import ChangeFeedSerializer
+from .views import (
+	ClientViewSet, MeetingViewSet, availability_body, availability_query,
+	availability_slot_kwargs, changes_query, check_clients_exist,
+)
+
+
+def error_response(exc):
+	"""What DRF's default exception handler returns for `exc`."""
+	data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+	return json_response(data, status=exc.status_code)
+
+
+class AsyncReadView(View):
+	http_method_names = ['get', 'head', 'options']
+
+	async def get(self, request, *args, **kwargs):
+		try:
+			return await self.read(Request(request), *args, **kwargs)
+		except APIException as exc:
+			return error_response(exc)
+
+	async def read(self, request, *args, **kwargs):
+		raise NotImplementedError
+
+
+class AsyncViewSetReadView(AsyncReadView):
+	"""Async `list` / `retrieve` of a DRF viewset."""
+	viewset = None
+	action = None
+
+	def get_viewset(self, request, **kwargs):
+		view = self.viewset(request=request, args=(), kwargs=kwargs, format_kwarg=None, action=self.action)
+		renderer, media_type = view.perform_content_negotiation(request)
+		if not isinstance(renderer, JSONRenderer):
+			renderer, media_type = JSONRenderer(), JSONRenderer.media_type
+		request.accepted_renderer, request.accepted_media_type = renderer, media_type
+		return view
+
+	def etag_path(self, request):
+		"""Path and query of the DRF endpoint this view mirrors (`async-<name>` -> `<name>`)."""
+		match = request.resolver_match
+		path = reverse(match.url_name.removeprefix('async-'), kwargs=match.kwargs)
+		return path + request.get_full_path()[len(request.path):]
+
+	async def read(self, request, **kwargs):
+		view = self.get_viewset(request, **kwargs)
+		etag = await view.aget_etag(request, self.etag_path(request))
+		if view.not_modified(request, etag):
+			return HttpResponse(status=304, headers={'ETag': etag})
+		queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+		data = await self.read_data(view, request, queryset, **kwargs)
+		if request.accepted_media_type == JSONRenderer.media_type:
+			response = json_response(data)
+		else:
+			# Parameters such as `; indent=2` are rendered as DRF would
+			renderer = request.accepted_renderer
+			response = HttpResponse(renderer.render(data, request.accepted_media_type, {}), content_type=renderer.media_type)
+		response['ETag'] = etag
+		return response
+
+	async def read_data(self, view, request, queryset, **kwargs):
+		raise NotImplementedError
+
+
+class AsyncListView(AsyncViewSetReadView):
+	action = 'list'
+
+	async def read_data(self, view, request, queryset):
+		plan = view.get_fast_plan(request)
+		rows = view.fast_values(queryset, plan) if plan is not None else queryset
+		page = await view.paginator.apaginate_queryset(rows, request, view)
+		if page is not None:
+			rows = page
+		else:
+			rows = [row async for row in rows.aiterator(chunk_size=CHUNK_SIZE)]
+		if plan is not None:
+			data = build_rows(plan, rows)
+		else:
+			data = await sync_to_async(lambda: view.get_serializer(rows, many=True).data)()
+		return data if page is None else view.get_paginated_response(data).data
+
+
+class AsyncDetailView(AsyncViewSetReadView):
+	action = 'retrieve'
+
+	async def read_data(self, view, request, queryset, pk):
+		queryset = queryset.filter(pk=pk)
+		plan = view.get_fast_plan(request)
+		if plan is not None:
+			row = await raw_values(queryset, *plan_columns(plan)).afirst()
+			data = build_rows(plan, [row])[0] if row is not None else None
+		else:
+			instance = await queryset.afirst()
+			data = await sync_to_async(lambda: view.get_serializer(instance).data)() if instance is not None else None
+		if data is None:
+			raise NotFound(f'No {queryset.model._meta.object_name} matches the given query.')
+		return data
+
+
+class ClientListView(AsyncListView):
+	viewset = ClientViewSet
+
+
+class ClientDetailView(AsyncDetailView):
+	viewset = ClientViewSet
+
+
+class MeetingListView(AsyncListView):
+	viewset = MeetingViewSet
+
+	async def read_data(self, view, request, queryset):
+		if view.wants_occurrences():
+			# Series expansion is synchronous; one thread hop for the whole merge
+			return await sync_to_async(lambda: view.list_occurrences(request, queryset).data)()
+		return await super().read_data(view, request, queryset)
+
+
+class MeetingDetailView(AsyncDetailView):
+	viewset = MeetingViewSet
+
+
+class AvailabilityView(AsyncReadView):
+	"""Async `/api/availability/`."""
+
+	async def read(self, request):
+		q = availability_query(request.query_params)
+		ids, start, end = q['clients'], q['start'], q['end']
+		check_clients_exist(ids, {pk async for pk in Client.objects.filter(pk__in=ids).values_list('pk', flat=True)})
+		options = availability_slot_kwargs(q)
+		busy_in_window = Meeting.objects.filter(client_id__in=ids, start_time__lt=end, end_time__gt=start)
+		series_in_window = recurrence.active(MeetingSeries.objects.filter(client_id__in=ids), start, end)
+		if not await busy_in_window.aexists() and not await series_in_window.aexists():
+			# Nobody is booked: the slots follow from working hours alone
+			slots = availability.slots_around((), start, end, **options)
+			busy = [] if q['busy'] else None
+		else:
+			# The sweep reads lazily and stops early; run it in one thread hop
+			slots = await sync_to_async(availability.find_free_slots)(ids, start, end, **options)
+			busy = await sync_to_async(availability.merged_busy)(ids, start, end) if q['busy'] else None
+		return json_response(availability_body(q, slots, busy))
+
+
+class ChangesView(AsyncReadView):
+	"""Async `/api/changes/`: a long poll waits on the event loop, not in a thread."""
+
+	async def read(self, request):
+		q = changes_query(request.query_params)
+		result = await changes.await_changes(q.get('since'), q['limit'], q['wait'])
+		return json_response(ChangeFeedSerializer(result).data)
@@ -0,0 +1,168 @@
+"""Free/busy computation over the `Meeting` table and recurring series.
+
+Busy time of one or many clients (meetings, plus the occurrences of their
+series expanded for the window only) is read in start order and merged
+with a single sweep; free slots are the gaps of that merged timeline that fall
+inside working hours. Everything is a generator, so finding the first K
+slots stops reading meetings as soon as the K-th slot is found.
+"""
+import heapq
+from datetime import datetime, time, timedelta, timezone
+from itertools import chain, islice
+from operator import itemgetter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import recurrence
+from .models import Meeting, MeetingSeries
+
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+SLOT_GRID = timedelta(minutes=5)
+
+
+def _naive_db(using=DEFAULT_DB_ALIAS):
+	# Backends without time zone support (SQLite, MySQL) store naive UTC.
+	return not connections[using].features.supports_timezones
+
+
+def _to_db(value, naive):
+	return value.astimezone(timezone.utc).replace(tzinfo=None) if naive else value
+
+
+def _from_db(value, naive):
+	return value.replace(tzinfo=timezone.utc) if naive else value
+
+
+def _stream(queryset, chunk_size=2000):
+	"""Stream raw `(start, end)` rows as the backend returns them.
+
+	The sweep may read every row of the window, and Django's per-value
+	time zone conversion costs several times the scan itself, so rows stay
+	in the database's representation (see `_naive_db`) and only the
+	window bounds and the results are converted.
+	"""
+	sql, params = queryset.query.sql_with_params()
+	with connections[queryset.db].cursor() as cursor:
+		cursor.execute(sql, params)
+		while rows := cursor.fetchmany(chunk_size):
+			yield from rows
+
+
+def busy_rows(client_ids, start, end):
+	"""Raw (start, end) of every meeting of `client_ids` intersecting the window, by start.
+
+	Meetings already running at `start` come first (one seek per client on
+	`(client_id, end_time)`); the rest is one index-only range scan on
+	`(start_time, end_time, client_id)`, read lazily in start order.
+	Occurrences of the clients' series are merged in, converted to the
+	same representation.
+	"""
+	running = (
+		Meeting.objects.filter(client_id__in=client_ids, start_time__lt=start, end_time__gt=start)
+		.order_by('start_time').values_list('start_time', 'end_time')
+	)
+	upcoming = (
+		Meeting.objects.filter(client_id__in=client_ids, start_time__gte=start, start_time__lt=end)
+		.order_by('start_time').values_list('start_time', 'end_time')
+	)
+	naive = _naive_db()
+	series = (
+		(_to_db(o.start_time, naive), _to_db(o.end_time, naive))
+		for o in recurrence.occurrences(MeetingSeries.objects.filter(client_id__in=client_ids), start, end)
+	)
+	return heapq.merge(chain(_stream(running), _stream(upcoming)), series, key=itemgetter(0))
+
+
+def merge_intervals(intervals):
+	"""Merge `(start, end)` pairs sorted by start into disjoint busy blocks."""
+	current_start = current_end = None
+	for start, end in intervals:
+		if current_end is None:
+			current_start, current_end = start, end
+		elif start <= current_end:
+			current_end = max(current_end, end)
+		else:
+			yield current_start, current_end
+			current_start, current_end = start, end
+	if current_end is not None:
+		yield current_start, current_end
+
+
+def working_windows(start, end, work_start, work_end, weekdays, tz):
+	"""Working-hour windows (in UTC) clipped to `[start, end)`, in order.
+
+	`work_end <= work_start` means the shift ends on the next day, so
+	`00:00`-`00:00` is the whole day.
+	"""
+	day = start.astimezone(tz).date() - timedelta(days=1)
+	last_day = end.astimezone(tz).date()
+	while day <= last_day:
+		if day.weekday() in weekdays:
+			open_at = datetime.combine(day, work_start, tzinfo=tz)
+			close_day = day if work_end > work_start else day + timedelta(days=1)
+			close_at = datetime.combine(close_day, work_end, tzinfo=tz)
+			lo = max(open_at.astimezone(timezone.utc), start)
+			hi = min(close_at.astimezone(timezone.utc), end)
+			if lo < hi:
+				yield lo, hi
+		day += timedelta(days=1)
+
+
+def _align(moment, grid=SLOT_GRID):
+	epoch = datetime(1970, 1, 1, tzinfo=moment.tzinfo and timezone.utc)
+	remainder = (moment - epoch) % grid
+	return moment if not remainder else moment + (grid - remainder)
+
+
+def free_slots(busy, windows, duration, step):
+	"""Yield `(start, end)` slots of `duration` free of `busy`, inside `windows`.
+
+	Both inputs are sorted and disjoint, so this is a single merge pass.
+	The first slot of a gap starts on the 5-minute grid; further slots of
+	the same gap follow every `step`.
+	"""
+	busy = iter(busy)
+	block = next(busy, None)
+	for lo, hi in windows:
+		cursor = lo
+		while cursor < hi:
+			while block is not None and block[1] <= cursor:
+				block = next(busy, None)
+			gap_end = hi if block is None else min(hi, max(block[0], cursor))
+			slot = _align(cursor)
+			while slot + duration <= gap_end:
+				yield slot, slot + duration
+				slot += step
+			if block is None or block[0] >= hi:
+				break
+			cursor = max(cursor, block[1])
+
+
+def find_free_slots(client_ids, start, end, duration, limit, **options):
+	"""First `limit` slots of `duration` in working hours when all `client_ids` are free.
+
+	`options` are those of `slots_around()`.
+	"""
+	return slots_around(busy_rows(client_ids, start, end), start, end, duration, limit, **options)
+
+
+def slots_around(busy, start, end, duration, limit, work_start=time(9), work_end=time(17),
+		weekdays=(0, 1, 2, 3, 4), tz=timezone.utc, step=None):
+	"""First `limit` free slots given raw busy rows sorted by start (see `busy_rows`)."""
+	naive = _naive_db()
+	windows = (
+		(_to_db(lo, naive), _to_db(hi, naive))
+		for lo, hi in working_windows(start, end, work_start, work_end, set(weekdays), tz)
+	)
+	slots = free_slots(merge_intervals(busy), windows, duration, step or duration)
+	return [(_from_db(a, naive), _from_db(b, naive)) for a, b in islice(slots, limit)]
+
+
+def merged_busy(client_ids, start, end):
+	"""All merged busy blocks of `client_ids` clipped to `[start, end)`."""
+	naive = _naive_db()
+	lo, hi = _to_db(start, naive), _to_db(end, naive)
+	return [
+		(_from_db(max(s, lo), naive), _from_db(min(e, hi), naive))
+		for s, e in merge_intervals(busy_rows(client_ids, start, end))
+	]
@@ -0,0 +1,73 @@
+"""Atomic per-client booking.
+
+The overlap check in `MeetingSerializer.validate` is only advisory: two
+requests for the same client can both pass it before either inserts. The
+authoritative check runs again inside `client_locks()`, which serializes
+writers per client while letting bookings for different clients proceed
+independently:
+
+- Backends with row locks (PostgreSQL, MySQL, ...) lock the `Client` rows
+  with `SELECT ... FOR UPDATE` for the duration of the transaction.
+- SQLite has no row locks and only ever one writer. The transaction is
+  opened with `BEGIN IMMEDIATE` so the database write lock is taken before
+  the re-check, which also keeps bookings from separate processes (e.g.
+  several uvicorn workers) from interleaving. Within a process, writers
+  queue on a mutex around that short section instead of sleeping in
+  SQLite's busy handler, whose backoff dominates latency under contention.
+
+Only the re-check and insert run under the lock; request parsing and
+field validation stay fully concurrent.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Client
+
+_sqlite_writer = threading.Lock()
+
+
+@contextmanager
+def _immediate_atomic(using):
+	"""`transaction.atomic()` that starts with BEGIN IMMEDIATE on SQLite."""
+	conn = connections[using]
+	conn.ensure_connection()
+	previous = conn.transaction_mode
+	conn.transaction_mode = 'IMMEDIATE'
+	try:
+		with transaction.atomic(using=using):
+			conn.transaction_mode = previous
+			yield
+	finally:
+		conn.transaction_mode = previous
+
+
+@contextmanager
+def client_locks(client_ids, using=DEFAULT_DB_ALIAS):
+	"""Run the block in a transaction holding the booking lock of every client.
+
+	Row locks are acquired in ascending id order so batches that touch
+	several clients cannot deadlock each other.
+	"""
+	ids = sorted({int(pk) for pk in client_ids})
+	conn = connections[using]
+	if conn.features.has_select_for_update:
+		with transaction.atomic(using=using):
+			list(Client.objects.using(using).select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+			yield
+		return
+
+	if conn.in_atomic_block:
+		# Nested in a caller's transaction: SQLite cannot upgrade it to
+		# IMMEDIATE, so the caller is responsible for having taken the lock.
+		with transaction.atomic(using=using):
+			yield
+		return
+
+	with _sqlite_writer, _immediate_atomic(using):
+		yield
+
+
+def client_lock(client_id, using=DEFAULT_DB_ALIAS):
+	return client_locks([client_id], using=using)
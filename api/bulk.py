@@ -0,0 +1,155 @@
+"""Batch creation of clients and meetings.
+
+Each batch is validated in one pass and inserted with `bulk_create`.
+Items are independent: invalid items are reported with their index and
+the rest are still created.
+"""
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from . import changes, occupancy, recurrence, versions
+from .booking import client_locks
+from .models import Client, Meeting, MeetingSeries
+from .serializers import (
+	OVERLAP_MESSAGE, ClientBulkItemSerializer, ClientSerializer,
+	MeetingBulkItemSerializer, MeetingSerializer,
+)
+
+MAX_BATCH_SIZE = 1000
+
+
+def _error(index, errors):
+	return {'index': index, 'status': 'error', 'errors': errors}
+
+
+def _created(index, data):
+	return {'index': index, 'status': 'created', 'id': data['id'], 'data': data}
+
+
+def validate_batch(items):
+	if not isinstance(items, list):
+		raise serializers.ValidationError({'non_field_errors': ['Expected a list of items.']})
+	if not items:
+		raise serializers.ValidationError({'non_field_errors': ['The batch is empty.']})
+	if len(items) > MAX_BATCH_SIZE:
+		raise serializers.ValidationError({'non_field_errors': [f'At most {MAX_BATCH_SIZE} items per batch.']})
+
+
+def create_clients(items):
+	"""Create clients; returns one result dict per input item, in order."""
+	validate_batch(items)
+	results = [None] * len(items)
+	pending = []
+	seen = set()
+	for i, item in enumerate(items):
+		s = ClientBulkItemSerializer(data=item)
+		if not s.is_valid():
+			results[i] = _error(i, s.errors)
+			continue
+		pending.append((i, s.validated_data))
+
+	emails = [data['email'] for _, data in pending]
+	taken = set(Client.objects.filter(email__in=emails).values_list('email', flat=True))
+	to_create = []
+	for i, data in pending:
+		if data['email'] in taken or data['email'] in seen:
+			results[i] = _error(i, {'email': ['client with this email already exists.']})
+			continue
+		seen.add(data['email'])
+		to_create.append((i, Client(**data)))
+
+	try:
+		with transaction.atomic():
+			created = Client.objects.bulk_create([obj for _, obj in to_create])
+			if created:
+				versions.bump([versions.CLIENT])
+				changes.record_many('client', created)
+	except IntegrityError:
+		# Another request inserted one of these emails after our check
+		raise serializers.ValidationError({'email': ['A concurrent request created one of these emails; retry the batch.']})
+	for (i, _), data in zip(to_create, ClientSerializer(created, many=True).data):
+		results[i] = _created(i, data)
+	return results
+
+
+class _Calendar:
+	"""Sorted, disjoint intervals of one client with the api/overlap.py probe."""
+
+	def __init__(self, intervals):
+		self.starts = [start for start, _ in intervals]
+		self.ends = [end for _, end in intervals]
+
+	def overlaps(self, start, end):
+		k = bisect_left(self.starts, end) - 1
+		return k >= 0 and self.ends[k] > start
+
+	def add(self, start, end):
+		k = bisect_left(self.starts, start)
+		self.starts.insert(k, start)
+		self.ends.insert(k, end)
+
+
+def create_meetings(items):
+	"""Create meetings; returns one result dict per input item, in order.
+
+	Overlaps are checked against existing rows with one range query per
+	client, the occurrences of the clients' series (one query for the
+	batch), and earlier items of the same batch (first item wins).
+	"""
+	validate_batch(items)
+	results = [None] * len(items)
+	by_client = defaultdict(list)
+	for i, item in enumerate(items):
+		s = MeetingBulkItemSerializer(data=item)
+		if not s.is_valid():
+			results[i] = _error(i, s.errors)
+			continue
+		by_client[s.validated_data['client']].append((i, s.validated_data))
+
+	clients = Client.objects.in_bulk(list(by_client))
+	missing = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+	for client_id in [c for c in by_client if c not in clients]:
+		for i, _ in by_client.pop(client_id):
+			results[i] = _error(i, {'client': [missing.format(pk_value=client_id)]})
+	if not by_client:
+		return results
+
+	to_create = []
+	with client_locks(list(by_client)):
+		# Series occurrences of every client in the batch, in one pass
+		recurring = defaultdict(list)
+		for occurrence in recurrence.occurrences(
+			MeetingSeries.objects.filter(client_id__in=list(by_client)),
+			min(data['start_time'] for batch in by_client.values() for _, data in batch),
+			max(data['end_time'] for batch in by_client.values() for _, data in batch),
+		):
+			recurring[occurrence.client_id].append((occurrence.start_time, occurrence.end_time))
+		for client_id, batch in by_client.items():
+			window_start = min(data['start_time'] for _, data in batch)
+			window_end = max(data['end_time'] for _, data in batch)
+			calendar = _Calendar(list(heapq.merge(
+				Meeting.objects.filter(client_id=client_id, start_time__lt=window_end, end_time__gt=window_start)
+				.order_by('start_time').values_list('start_time', 'end_time'),
+				recurring[client_id],
+			)))
+			for i, data in batch:
+				start, end = data['start_time'], data['end_time']
+				if calendar.overlaps(start, end):
+					results[i] = _error(i, {'non_field_errors': [OVERLAP_MESSAGE]})
+					continue
+				calendar.add(start, end)
+				to_create.append((i, Meeting(**{**data, 'client': clients[client_id]})))
+		created = Meeting.objects.bulk_create([obj for _, obj in to_create])
+		# bulk_create sends no signals
+		if created:
+			versions.bump(versions.meeting_scopes(obj.client_id for obj in created))
+			occupancy.add(created)
+			changes.record_many('meeting', created)
+
+	for (i, _), data in zip(to_create, MeetingSerializer(created, many=True).data):
+		results[i] = _created(i, data)
+	return results
@@ -0,0 +1,196 @@
+"""Change feed: an append-only log of client, meeting and series writes.
+
+Every save or delete of a `Client`, `Meeting` or `MeetingSeries` appends a
+`Change` row in the writing transaction, like the ETag counters
+(api/versions.py): signals cover ORM writes (api/signals.py) and code
+using `bulk_create` calls `record_many()` itself. A change of a series'
+exceptions is logged as an update of the series. Meetings and series
+deleted with their client are covered by the client's `deleted` entry.
+Loads too large to log row by row (`seed_scale`) append one `resync`
+entry instead, telling consumers to reload everything.
+
+Consumers read `GET /api/changes/?since=<seq>` and apply the entries in
+order. `seq` only grows, in commit order: on SQLite writes are
+serialized, and on PostgreSQL entries are inserted with a provisional,
+negative `seq` that a deferred trigger replaces at commit, under an
+advisory lock held only for the commit itself (migration
+`0010_change_commit_order`). Writers do not wait on each other before
+that, and uncommitted entries are never read since `seq` >= 0.
+
+The log is bounded (`prune()`, run every `CHANGES_PRUNE_EVERY` writes
+and by the `prune_changes` command):
+
+- compaction: entries older than `CHANGES_COMPACT_AFTER` seconds are
+  dropped when a later entry exists for the same object. Consumers that
+  are behind skip intermediate states but still end up with the latest.
+- retention: entries older than `CHANGES_RETENTION_DAYS`, and all but the
+  newest `CHANGES_MAX_ROWS`, are deleted. Their highest `seq` is
+  remembered; a consumer asking for changes since an earlier `seq` gets
+  `reset` and must reload.
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Change, ResourceVersion
+from .statements import unrecorded
+
+logger = logging.getLogger(__name__)
+
+# Highest pruned `seq`, kept as the `version` of this scope
+PRUNED_SCOPE = 'changes:pruned'
+MAX_WAIT = 30
+POLL_INTERVAL = 0.25
+
+
+def _setting(name, default):
+	return getattr(settings, name, default)
+
+
+def snapshot(instance):
+	"""The stored fields of `instance`, foreign keys as ids, named as in the API."""
+	return {field.name: field.value_from_object(instance) for field in instance._meta.concrete_fields}
+
+
+def _entry(resource, action, instance):
+	client_id = instance.pk if resource == 'client' else instance.client_id
+	return Change(
+		resource=resource, action=action, object_id=instance.pk, client_id=client_id,
+		data=None if action == 'deleted' else snapshot(instance),
+	)
+
+
+def _append(entries, using):
+	created = Change.objects.using(using).bulk_create(entries)
+	every = _setting('CHANGES_PRUNE_EVERY', 1000)
+	# Provisional (negative) numbers on PostgreSQL count appends just as well
+	if every and any(entry.seq is not None and entry.seq % every == 0 for entry in created):
+		transaction.on_commit(lambda: _prune_quietly(using), using=using)
+	return created
+
+
+def record(resource, action, instance, using='default'):
+	"""Append one `created`, `updated` or `deleted` entry for `instance`."""
+	return _append([_entry(resource, action, instance)], using)[0]
+
+
+def record_many(resource, instances, using='default'):
+	"""Append `created` entries for rows inserted with `bulk_create`."""
+	return _append([_entry(resource, 'created', instance) for instance in instances], using)
+
+
+def record_resync(using='default'):
+	"""Append a `resync` entry for writes that were not logged one by one."""
+	return _append([Change(resource='*', action='resync')], using)[0]
+
+
+def pruned_through(using='default'):
+	"""Highest `seq` removed by retention (0 if none)."""
+	return ResourceVersion.objects.using(using).filter(scope=PRUNED_SCOPE).values_list('version', flat=True).first() or 0
+
+
+def head(using='default'):
+	"""The latest `seq`, or the pruning mark when the log is empty."""
+	# Not this transaction's own provisional entries (PostgreSQL)
+	latest = Change.objects.using(using).filter(seq__gt=0).order_by('-seq').values_list('seq', flat=True).first()
+	return latest if latest is not None else pruned_through(using)
+
+
+def read(since, limit, using='default'):
+	"""Entries after `since`, oldest first: `{'changes': [...], 'next': seq, 'reset': bool}`.
+
+	Without `since` nothing is returned and `next` is the current head, to
+	start following from now. `reset` means entries after `since` were
+	pruned; `next` is then the head to resume from after reloading.
+	"""
+	if since is None:
+		return {'changes': [], 'next': head(using), 'reset': False}
+	if since < pruned_through(using):
+		return {'changes': [], 'next': head(using), 'reset': True}
+	changes = list(Change.objects.using(using).filter(seq__gt=since).order_by('seq')[:limit])
+	return {'changes': changes, 'next': changes[-1].seq if changes else since, 'reset': False}
+
+
+def _settled(result, since, deadline):
+	return result['changes'] or result['reset'] or since is None or time.monotonic() >= deadline
+
+
+def wait(since, limit, timeout, using='default'):
+	"""`read()`, waiting up to `timeout` seconds (at most `MAX_WAIT`) for an entry after `since`."""
+	deadline = time.monotonic() + min(timeout, MAX_WAIT)
+	result = read(since, limit, using)
+	# Polls repeat the same reads by design
+	with unrecorded():
+		while not _settled(result, since, deadline):
+			time.sleep(POLL_INTERVAL)
+			result = read(since, limit, using)
+	return result
+
+
+async def await_changes(since, limit, timeout, using='default'):
+	"""`wait()` for async views: sleeps on the event loop instead of holding a thread."""
+	deadline = time.monotonic() + min(timeout, MAX_WAIT)
+	result = await sync_to_async(read)(since, limit, using)
+	with unrecorded():
+		while not _settled(result, since, deadline):
+			await asyncio.sleep(POLL_INTERVAL)
+			result = await sync_to_async(read)(since, limit, using)
+	return result
+
+
+def compact(before, using='default'):
+	"""Delete entries created before `before` that a later entry of the same object supersedes."""
+	later = Change.objects.using(using).filter(
+		resource=OuterRef('resource'), object_id=OuterRef('object_id'), seq__gt=OuterRef('seq'),
+	)
+	superseded = Change.objects.using(using).filter(created_at__lt=before, object_id__isnull=False).filter(Exists(later))
+	return superseded.delete()[0]
+
+
+def _mark_pruned(seq, using):
+	versions = ResourceVersion.objects.using(using)
+	if not versions.filter(scope=PRUNED_SCOPE, version__lt=seq).update(version=seq):
+		versions.get_or_create(scope=PRUNED_SCOPE, defaults={'version': seq})
+
+
+def expire(max_age=None, max_rows=None, using='default'):
+	"""Delete entries older than `max_age` and all but the newest `max_rows`; returns how many."""
+	entries = Change.objects.using(using)
+	cutoff = 0
+	if max_age is not None:
+		cutoff = entries.filter(created_at__lt=timezone.now() - max_age).order_by('-seq').values_list('seq', flat=True).first() or 0
+	if max_rows is not None:
+		newest_dropped = next(iter(entries.order_by('-seq').values_list('seq', flat=True)[max_rows:max_rows + 1]), 0)
+		cutoff = max(cutoff, newest_dropped)
+	if not cutoff:
+		return 0
+	with transaction.atomic(using):
+		deleted = entries.filter(seq__lte=cutoff).delete()[0]
+		_mark_pruned(cutoff, using)
+	return deleted
+
+
+def prune(using='default'):
+	"""Compact and expire the log with the `CHANGES_*` settings; returns (compacted, expired)."""
+	compacted = compact(timezone.now() - timedelta(seconds=_setting('CHANGES_COMPACT_AFTER', 3600)), using)
+	expired = expire(
+		max_age=timedelta(days=_setting('CHANGES_RETENTION_DAYS', 7)),
+		max_rows=_setting('CHANGES_MAX_ROWS', 1_000_000),
+		using=using,
+	)
+	return compacted, expired
+
+
+def _prune_quietly(using):
+	try:
+		prune(using)
+	except Exception:
+		# The write that triggered it has committed; the next round retries
+		logger.exception('Pruning the change feed failed')
@@ -0,0 +1,47 @@
+"""SQLite PRAGMAs of the database profile, run on every new connection.
+
+`SCHEDULER_DB_PROFILE` (scheduler/settings.py) fills `SQLITE_PRAGMAS`;
+the rest of the profile (`CONN_MAX_AGE`, `transaction_mode`, `timeout`)
+is plain Django database settings. Most PRAGMAs only last as long as the
+connection, so they are set again whenever Django opens one. With
+`CONN_MAX_AGE` that happens once per worker thread (WSGI servers, the
+MCP bridge's embedded backend) instead of once per request; under
+uvicorn each request runs in its own thread and still opens a new one.
+`journal_mode=WAL` is stored in the database file and stays on once set.
+"""
+import logging
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+def pragmas():
+	return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+	if connection.vendor != 'sqlite' or not pragmas():
+		return
+	with connection.cursor() as cursor:
+		for name, value in pragmas().items():
+			cursor.execute(f'PRAGMA {name}={value}')
+		if 'journal_mode' in pragmas():
+			cursor.execute('PRAGMA journal_mode')
+			mode = cursor.fetchone()[0]
+			if mode.lower() != str(pragmas()['journal_mode']).lower():
+				# e.g. in-memory databases cannot use WAL
+				logger.warning('SQLite kept journal_mode=%s instead of %s', mode, pragmas()['journal_mode'])
+
+
+def current(connection):
+	"""The PRAGMAs of `SQLITE_PRAGMAS` as the connection reports them (for checks and benchmarks)."""
+	values = {}
+	with connection.cursor() as cursor:
+		for name in pragmas():
+			cursor.execute(f'PRAGMA {name}')
+			values[name] = cursor.fetchone()[0]
+	return values
@@ -0,0 +1,63 @@
+"""Conditional GET for the list and detail endpoints.
+
+A response's ETag is a hash of the request (path, query string, negotiated
+media type) and the write counters of every scope its body depends on
+(api/versions.py). Reading the counters is a single primary-key lookup,
+so an `If-None-Match` hit is answered with 304 without running the list
+query or serializing anything.
+
+The counters are read before the data, so a write landing in between can
+only attach an older ETag to newer data, which costs the client one extra
+full response, never a stale one.
+"""
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+
+from . import versions
+
+
+class ConditionalGetMixin:
+	"""Adds ETag / If-None-Match support to `list` and `retrieve`."""
+
+	def get_version_scopes(self):
+		raise NotImplementedError
+
+	def get_etag(self, request):
+		scopes = self.get_version_scopes()
+		return self.make_etag(request, scopes, versions.current(scopes))
+
+	async def aget_etag(self, request, path=None):
+		scopes = self.get_version_scopes()
+		return self.make_etag(request, scopes, await versions.acurrent(scopes), path)
+
+	def make_etag(self, request, scopes, counters, path=None):
+		"""`path` stands in for the request's own path and query (api/async_views.py)."""
+		media_type = getattr(request, 'accepted_media_type', '') or ''
+		key = '|'.join([
+			path or request.get_full_path(),
+			media_type,
+			*(f'{scope}={version}' for scope, version in zip(scopes, counters)),
+		])
+		return 'W/' + quote_etag(hashlib.md5(key.encode('utf-8'), usedforsecurity=False).hexdigest())
+
+	def not_modified(self, request, etag):
+		tags = parse_etags(request.headers.get('If-None-Match', ''))
+		# Weak comparison (RFC 9110, section 13.1.2)
+		return '*' in tags or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in tags}
+
+	def _conditional(self, request, render, *args, **kwargs):
+		etag = self.get_etag(request)
+		if self.not_modified(request, etag):
+			return Response(status=304, headers={'ETag': etag})
+		response = render(request, *args, **kwargs)
+		if response.status_code == 200:
+			response['ETag'] = etag
+		return response
+
+	def list(self, request, *args, **kwargs):
+		return self._conditional(request, super().list, *args, **kwargs)
+
+	def retrieve(self, request, *args, **kwargs):
+		return self._conditional(request, super().retrieve, *args, **kwargs)
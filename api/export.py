@@ -0,0 +1,86 @@
+"""Streaming export of list endpoints (`GET /api/meetings/export/`).
+
+Rows are read with `.iterator(chunk_size=...)` and written out one chunk at
+a time through a `StreamingHttpResponse`, so memory stays flat whatever the
+date range. Each chunk goes through the api/fastpath.py row plan when it
+applies and through the view's serializer otherwise, so exported objects
+are exactly those of the list endpoint (including `?fields=`).
+
+NDJSON (one object per line) is the default; a JSON array is produced for
+`Accept: application/json` or `?format=json`, byte-identical to the
+unpaginated list response.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from .fastpath import build_rows, compile_plan, plan_columns, raw_values, render_json
+
+CHUNK_SIZE = 2000
+
+
+class NDJSONRenderer(BaseRenderer):
+	"""Newline-delimited JSON; used directly for error responses of export views."""
+	media_type = 'application/x-ndjson'
+	format = 'ndjson'
+	charset = None
+
+	def render(self, data, accepted_media_type=None, renderer_context=None):
+		return b'' if data is None else render_json(data) + b'\n'
+
+
+def _chunks(view, queryset, limit):
+	"""Lists of representations, CHUNK_SIZE rows at a time."""
+	plan = compile_plan(view.get_serializer()) if getattr(settings, 'API_FAST_LIST', False) else None
+	if plan is not None:
+		queryset = raw_values(queryset, *plan_columns(plan))
+	if limit is not None:
+		queryset = queryset[:limit]
+	rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+	if plan is not None:
+		while chunk := list(islice(rows, CHUNK_SIZE)):
+			yield build_rows(plan, chunk)
+		return
+	while chunk := list(islice(rows, CHUNK_SIZE)):
+		yield view.get_serializer(chunk, many=True).data
+
+
+def _ndjson(chunks):
+	for chunk in chunks:
+		yield b''.join(render_json(row) + b'\n' for row in chunk)
+
+
+def _json_array(chunks):
+	separator = b'['
+	for chunk in chunks:
+		if chunk:
+			yield separator + b','.join(render_json(row) for row in chunk)
+			separator = b','
+	yield b'[]' if separator == b'[' else b']'
+
+
+async def _aiter(parts):
+	"""`parts` as an async iterator, each step run in the request's sync thread.
+
+	Django's ASGI handler would otherwise read a sync iterator to the end
+	before sending anything.
+	"""
+	step = sync_to_async(next)
+	while (part := await step(parts, None)) is not None:
+		yield part
+
+
+def stream_response(view, queryset, request, limit=None):
+	"""Stream `queryset` (at most `limit` rows) in the format negotiated for `request`."""
+	chunks = _chunks(view, queryset, limit)
+	if request.accepted_renderer.format == NDJSONRenderer.format:
+		body, content_type = _ndjson(chunks), NDJSONRenderer.media_type
+	else:
+		body, content_type = _json_array(chunks), 'application/json'
+	if isinstance(request._request, ASGIRequest):
+		body = _aiter(body)
+	return StreamingHttpResponse(body, content_type=content_type)
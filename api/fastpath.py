@@ -0,0 +1,225 @@
+"""Fast JSON list responses for clients and meetings.
+
+DRF serializes a list field by field and row by row, which dominates the
+cost of `GET /api/meetings/`. For plain model fields the output only
+depends on column values, so the serializer is compiled into a row plan
+instead:
+
+- rows are read as the database returns them, skipping Django's per-value
+  converters (see `RawValuesIterable`);
+- each column is formatted in one pass (datetimes the way
+  `DateTimeField.to_representation` does) and rows are zipped back into
+  dicts in serializer field order;
+- the whole response is encoded in one call, with orjson when installed.
+
+The bytes are identical to what `JSONRenderer` produces for the regular
+serializer. Serializers with fields the plan does not understand, other
+renderers and non-default JSON settings keep the regular DRF path.
+Enabled with the `API_FAST_LIST` setting.
+"""
+import json
+from datetime import timezone as dt_timezone
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.query import BaseIterable
+from django.db.models.sql.constants import MULTI
+from django.http import HttpResponse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import ISO_8601, api_settings
+
+try:
+	import orjson
+except ImportError:  # pragma: no cover - optional speedup
+	orjson = None
+
+# Fields whose representation is the raw column value itself
+PASSTHROUGH_FIELDS = (
+	serializers.CharField, serializers.EmailField, serializers.IntegerField,
+	serializers.PrimaryKeyRelatedField,
+)
+CHUNK_SIZE = 2000
+
+
+class RawValuesIterable(BaseIterable):
+	"""`values()` rows with the database's own values, without converters.
+
+	Datetimes stay naive UTC on backends without time zone support (the
+	formatters and `KeysetPagination` account for that); everything the
+	row plan passes through unchanged is already its final type.
+	"""
+
+	def __iter__(self):
+		query = self.queryset.query
+		compiler = query.get_compiler(self.queryset.db)
+		names = [*query.extra_select, *query.values_select, *query.annotation_select]
+		results = compiler.execute_sql(MULTI, chunked_fetch=self.chunked_fetch, chunk_size=self.chunk_size)
+		for row in chain.from_iterable(results):
+			yield dict(zip(names, row))
+
+
+def raw_values(queryset, *fields):
+	queryset = queryset.values(*fields)
+	queryset._iterable_class = RawValuesIterable
+	return queryset
+
+
+def _iso(value):
+	value = value.isoformat()
+	return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _datetime_formatter(field):
+	"""Column formatter matching `field.to_representation`, or None."""
+	if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+		return None
+	tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+	if tz is None:
+		return None
+	if tz.utcoffset(None) is not None and not tz.utcoffset(None):
+		# UTC: naive database values only need the suffix
+		return lambda values: [
+			None if v is None else v.isoformat() + 'Z' if v.tzinfo is None else _iso(v.astimezone(tz))
+			for v in values
+		]
+	return lambda values: [
+		None if v is None else _iso((v if v.tzinfo else v.replace(tzinfo=dt_timezone.utc)).astimezone(tz))
+		for v in values
+	]
+
+
+def _plan_field(field, prefix=''):
+	"""`(column, formatter)` for a flat field, or None if it needs DRF."""
+	if field.source == '*' or '.' in field.source:
+		return None
+	column = prefix + field.source
+	if type(field) in PASSTHROUGH_FIELDS and not getattr(field, 'pk_field', None):
+		return column, None
+	if type(field) is serializers.DateTimeField:
+		formatter = _datetime_formatter(field)
+		return (column, formatter) if formatter else None
+	return None
+
+
+def compile_plan(serializer):
+	"""Row plan for `serializer`: `[(name, column, formatter | nested plan)]`.
+
+	Returns None when any field cannot be produced from columns alone.
+	"""
+	plan = []
+	for name, field in serializer.fields.items():
+		if field.write_only:
+			continue
+		if isinstance(field, serializers.ModelSerializer) and not getattr(field, 'many', False):
+			nested = []
+			for nested_name, nested_field in field.fields.items():
+				if nested_field.write_only:
+					continue
+				entry = _plan_field(nested_field, prefix=field.source + '__')
+				if entry is None:
+					return None
+				nested.append((nested_name, *entry))
+			if not nested:
+				return None
+			plan.append((name, None, nested))
+			continue
+		entry = _plan_field(field)
+		if entry is None:
+			return None
+		plan.append((name, *entry))
+	return plan
+
+
+def plan_columns(plan):
+	columns = []
+	for _, column, formatter in plan:
+		if column is None:
+			columns.extend(nested_column for _, nested_column, _ in formatter)
+		else:
+			columns.append(column)
+	return columns
+
+
+def _build_columns(plan, rows):
+	columns = []
+	for _, column, formatter in plan:
+		if column is None:
+			names = [name for name, _, _ in formatter]
+			# A null foreign key serializes the nested object as None
+			columns.append([
+				dict(zip(names, values)) if values[0] is not None else None
+				for values in zip(*_build_columns(formatter, rows))
+			])
+			continue
+		values = [row[column] for row in rows]
+		columns.append(values if formatter is None else formatter(values))
+	return columns
+
+
+def build_rows(plan, rows):
+	"""Representations of the raw `values()` dicts in `rows`, in serializer field order."""
+	names = [name for name, _, _ in plan]
+	rows = iter(rows)
+	data = []
+	while chunk := list(islice(rows, CHUNK_SIZE)):
+		data.extend(dict(zip(names, values)) for values in zip(*_build_columns(plan, chunk)))
+	return data
+
+
+def render_json(data):
+	"""`JSONRenderer().render(data)` for plain JSON data (compact, unicode)."""
+	if orjson is not None:
+		body = orjson.dumps(data)
+	else:
+		body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+	# JSONRenderer escapes these so the output is also valid JavaScript
+	return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastListMixin:
+	"""Serves `list` through the compiled row plan when possible."""
+
+	def get_fast_plan(self, request):
+		if not getattr(settings, 'API_FAST_LIST', False):
+			return None
+		renderer = getattr(request, 'accepted_renderer', None)
+		if type(renderer) is not JSONRenderer or 'indent' in (request.accepted_media_type or ''):
+			return None
+		if not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON and api_settings.STRICT_JSON):
+			return None
+		conn = connections[self.get_queryset().db]
+		if not conn.features.supports_timezones and conn.settings_dict.get('TIME_ZONE') not in (None, 'UTC'):
+			# Naive database values are only UTC when the connection is
+			return None
+		return compile_plan(self.get_serializer())
+
+	def fast_values(self, queryset, plan):
+		"""Raw `values()` of `queryset` for `plan`, plus what keyset pagination reads."""
+		columns = plan_columns(plan)
+		paginator = self.paginator
+		if paginator is not None and hasattr(paginator, 'get_ordering'):
+			field, _ = paginator.get_ordering(self.request, self)
+			columns += [c for c in (field, 'id') if c not in columns]
+		return raw_values(queryset, *columns)
+
+	def list(self, request, *args, **kwargs):
+		plan = self.get_fast_plan(request)
+		if plan is None:
+			return super().list(request, *args, **kwargs)
+
+		values = self.fast_values(self.filter_queryset(self.get_queryset()), plan)
+		page = self.paginate_queryset(values)
+		if page is not None:
+			data = self.get_paginated_response(build_rows(plan, page)).data
+		else:
+			data = build_rows(plan, values.iterator(chunk_size=CHUNK_SIZE))
+		return json_response(data)
+
+
+def json_response(data, status=200):
+	response = HttpResponse(render_json(data), content_type='application/json', status=status)
+	# Keep the payload available like rest_framework.response.Response does
+	response.data = data
+	return response
@@ -0,0 +1,78 @@
+"""Sparse fieldsets for the list and detail endpoints.
+
+`?fields=id,title,start_time` limits each object to the named fields and
+`?expand=client` adds the nested `client_detail`. The queryset follows the
+serializer: only the columns behind the kept fields are selected, and a
+relation is joined only when its nested serializer is kept. Without
+`fields` responses are unchanged.
+"""
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDSET_PARAMETERS = [
+	OpenApiParameter('fields', str, description='Comma-separated fields to return (default: all).'),
+	OpenApiParameter('expand', str, description='Comma-separated nested objects to include with `fields`, e.g. `client`.'),
+]
+
+
+def _split(value):
+	return [part.strip() for part in value.split(',') if part.strip()]
+
+
+class SparseFieldsetMixin:
+	"""Applies `?fields=` / `?expand=` to the serializer and queryset of safe requests."""
+
+	def get_fieldset(self):
+		"""`(fields, expand)` requested for this call; `fields` is None when not sparse."""
+		if hasattr(self, '_fieldset'):
+			return self._fieldset
+		params = self.request.query_params if self.request.method in SAFE_METHODS else {}
+		fields = _split(params['fields']) if 'fields' in params else None
+		expand = _split(params.get('expand', ''))
+
+		if fields is not None or expand:
+			self.validate_fieldset(fields or (), expand)
+		self._fieldset = (fields, expand)
+		return self._fieldset
+
+	def validate_fieldset(self, fields, expand):
+		serializer_class = self.get_serializer_class()
+		expandable = getattr(serializer_class, 'expandable_fields', {})
+		available = list(serializer_class().fields)
+		errors = {}
+		unknown = [name for name in fields if name not in available]
+		if unknown:
+			errors['fields'] = [f'Unknown field(s): {", ".join(unknown)}. Available: {", ".join(available)}.']
+		unknown = [name for name in expand if name not in expandable]
+		if unknown:
+			errors['expand'] = [f'Cannot expand: {", ".join(unknown)}. Available: {", ".join(expandable) or "none"}.']
+		if errors:
+			raise serializers.ValidationError(errors)
+
+	def get_serializer(self, *args, **kwargs):
+		fields, expand = self.get_fieldset()
+		if fields is not None:
+			kwargs.setdefault('fields', fields)
+			kwargs.setdefault('expand', expand)
+		return super().get_serializer(*args, **kwargs)
+
+	def filter_queryset(self, queryset):
+		queryset = super().filter_queryset(queryset)
+		fields, expand = self.get_fieldset()
+		columns, related = {'pk'}, []
+		for field in self.get_serializer().fields.values():
+			if isinstance(field, serializers.BaseSerializer):
+				related.append(field.source)
+				columns |= {f'{field.source}__{nested.source}' for nested in field.fields.values()}
+			elif field.source != '*':
+				columns.add(field.source)
+		if related:
+			queryset = queryset.select_related(*related)
+		if fields is None:
+			return queryset
+		paginator = self.paginator
+		if paginator is not None and hasattr(paginator, 'get_ordering'):
+			# The keyset cursor reads the ordering column of the last row
+			columns.add(paginator.get_ordering(self.request, self)[0])
+		return queryset.only(*columns)
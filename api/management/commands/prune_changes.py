@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api import changes
+
+
+class Command(BaseCommand):
+    help = "Compact the change feed and delete entries past its retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compact-after', type=int, default=settings.CHANGES_COMPACT_AFTER,
+            help='Seconds after which only the latest entry per object is kept (default CHANGES_COMPACT_AFTER)')
+        parser.add_argument('--max-age-days', type=float, default=settings.CHANGES_RETENTION_DAYS,
+            help='Delete entries older than this (default CHANGES_RETENTION_DAYS)')
+        parser.add_argument('--max-rows', type=int, default=settings.CHANGES_MAX_ROWS,
+            help='Keep at most this many entries (default CHANGES_MAX_ROWS)')
+
+    def handle(self, *args, **options):
+        if options['compact_after'] < 0 or options['max_age_days'] < 0 or options['max_rows'] < 0:
+            raise CommandError("--compact-after, --max-age-days and --max-rows must be >= 0")
+        compacted = changes.compact(timezone.now() - timedelta(seconds=options['compact_after']))
+        expired = changes.expire(max_age=timedelta(days=options['max_age_days']), max_rows=options['max_rows'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {compacted} and expired {expired} change feed entries; "
+            f"consumers before seq {changes.pruned_through()} must reload"
+        ))
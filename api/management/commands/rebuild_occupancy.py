@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api import occupancy, versions
+from api.models import Client
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-client daily occupancy summary from the meetings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--client', type=int, nargs='+', dest='clients', help='Only rebuild these client ids')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows read and written per batch (default 5000)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be >= 1")
+        clients = options['clients']
+        if clients:
+            missing = set(clients) - set(Client.objects.filter(pk__in=clients).values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Unknown client id(s): {', '.join(map(str, sorted(missing)))}")
+        started = time.perf_counter()
+        rows = occupancy.rebuild(clients, batch_size=options['batch_size'])
+        # Cached occupancy responses must not survive a rebuild that changed
+        # rows; their ETags are keyed on the per-client scope
+        ids = clients or list(Client.objects.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(ids), options['batch_size']):
+            versions.bump(versions.meeting_scopes(ids[i:i + options['batch_size']]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} occupancy rows for {len(clients) if clients else 'all'} clients "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
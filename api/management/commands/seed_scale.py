@@ -0,0 +1,188 @@
+import multiprocessing
+import random
+import time
+import unicodedata
+from datetime import datetime, time as dtime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from api import changes, occupancy, versions
+from api.models import Client, ClientDailyOccupancy, Meeting, MeetingSeries, SeriesException
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "Diego", "Eve", "Farah", "Gustav", "Hana", "Ivan", "Jun",
+    "Kofi", "Lena", "Mateo", "Nadia", "Oscar", "Priya", "Quentin", "Rosa", "Sven", "Tomás",
+    "Uma", "Victor", "Wen", "Ximena", "Yusuf", "Zoë",
+]
+LAST_NAMES = [
+    "Johnson", "Smith", "Lee", "Pérez", "Müller", "Khan", "Andersson", "Sato", "Petrov", "Chen",
+    "Mensah", "Novak", "García", "Haddad", "Silva", "Patel", "Dubois", "Rossi", "Berg", "Okafor",
+]
+TITLES = [
+    "Intro call", "Weekly sync", "Quarterly review", "Contract renewal", "Onboarding",
+    "Product demo", "Support follow-up", "Planning session", "Budget review", "Check-in",
+]
+LOCATIONS = ["", "", "Zoom", "Google Meet", "Phone", "Office A", "Office B", "Client site"]
+NOTES = ["", "", "", "Agenda shared in advance.", "Bring last quarter's numbers.", "Follow up on open tickets."]
+DURATIONS = [30, 30, 45, 60, 60, 90]  # minutes
+GAPS = [0, 15, 30, 60, 120, 240, 24 * 60, 3 * 24 * 60]  # minutes between meetings of a client
+EMAIL_DOMAIN = "seed.example"
+WORK_START, WORK_END = dtime(8), dtime(18)
+
+
+def _ascii(text):
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+
+
+def _next_working_time(t):
+    """`t`, or the start of the next working period if it falls outside one."""
+    if t.weekday() < 5 and WORK_START <= t.time() and t.time() < WORK_END:
+        return t
+    day = t.date() if t.time() < WORK_START else t.date() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime.combine(day, WORK_START, tzinfo=timezone.utc)
+
+
+def generate_client(seed, index, meetings, start):
+    """Client fields and its meetings, a pure function of (`seed`, `index`).
+
+    Meetings are sequential in working hours (Mon-Fri, 08:00-18:00 UTC),
+    so a client's meetings never overlap.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    client = {
+        "name": f"{first} {last}",
+        "email": f"{_ascii(first)}.{_ascii(last)}.{index}@{EMAIL_DOMAIN}",
+        "phone": f"+1-{rng.randint(200, 989)}-555-{rng.randint(0, 9999):04d}",
+    }
+    rows = []
+    t = start + timedelta(days=rng.randint(0, 6), minutes=15 * rng.randint(0, 39))
+    for _ in range(meetings):
+        duration = timedelta(minutes=rng.choice(DURATIONS))
+        t = _next_working_time(t)
+        end = datetime.combine(t.date(), WORK_END, tzinfo=timezone.utc)
+        if t + duration > end:
+            t = _next_working_time(end)
+        rows.append({
+            "title": rng.choice(TITLES),
+            "location": rng.choice(LOCATIONS),
+            "notes": rng.choice(NOTES),
+            "start_time": t,
+            "end_time": t + duration,
+        })
+        t += duration + timedelta(minutes=rng.choice(GAPS))
+    return client, rows
+
+
+def insert_clients(task):
+    """Generate and insert clients `first`..`last` - 1 with their meetings, in one transaction."""
+    first, last, seed, meetings_per_client, start, sqlite_tuning = task
+    if sqlite_tuning:
+        tune_sqlite()
+    generated = [generate_client(seed, i, meetings_per_client, start) for i in range(first, last)]
+    with transaction.atomic():
+        clients = Client.objects.bulk_create([Client(**fields) for fields, _ in generated])
+        meetings = Meeting.objects.bulk_create([
+            Meeting(client_id=client.pk, **row)
+            for client, (_, rows) in zip(clients, generated)
+            for row in rows
+        ])
+        # bulk_create skips the signals that keep the daily summary
+        occupancy.add(meetings)
+    return len(clients), len(meetings)
+
+
+def tune_sqlite():
+    """Trade durability for load speed on this process's SQLite connection."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        # WAL lets the API keep reading while workers append; synchronous=OFF
+        # skips fsyncs (an OS crash can corrupt the file, a process crash cannot)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-262144")
+        # Parallel workers queue for the write lock instead of failing
+        cursor.execute("PRAGMA busy_timeout=600000")
+
+
+class Command(BaseCommand):
+    help = "Generate large volumes of realistic clients and non-overlapping meetings for capacity testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10000, help='Clients to create (default 10000)')
+        parser.add_argument('--meetings-per-client', type=int, default=100, help='Meetings per client (default 100)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed generates the same data')
+        parser.add_argument('--start', default='2026-01-05', help='Date the first meetings start from (default 2026-01-05)')
+        parser.add_argument('--batch-size', type=int, default=20000, help='Meetings inserted per transaction (default 20000)')
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating and inserting rows in parallel')
+        parser.add_argument('--sqlite-tuning', action='store_true', help='WAL, synchronous=OFF and a large page cache while loading (SQLite only)')
+        parser.add_argument('--reset', action='store_true', help='Delete all existing clients and meetings first')
+
+    def handle(self, *args, **options):
+        total = options['clients']
+        per_client = options['meetings_per_client']
+        if total < 0 or per_client < 0 or options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError("--clients and --meetings-per-client must be >= 0, --batch-size and --workers >= 1")
+        try:
+            start = datetime.combine(datetime.strptime(options['start'], '%Y-%m-%d').date(), dtime(), tzinfo=timezone.utc)
+        except ValueError:
+            raise CommandError("--start must be a date like 2026-01-05")
+        if options['sqlite_tuning']:
+            tune_sqlite()
+        if options['reset']:
+            self.reset()
+
+        # Numbering continues after earlier runs, so repeated runs append new clients
+        offset = Client.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").count()
+        step = max(1, options['batch_size'] // max(1, per_client))
+        tasks = [
+            (first, min(first + step, offset + total), options['seed'], per_client, start, options['sqlite_tuning'])
+            for first in range(offset, offset + total, step)
+        ]
+
+        started = time.perf_counter()
+        self.progress = {'clients': 0, 'meetings': 0, 'reported': started}
+        if options['workers'] == 1:
+            for task in tasks:
+                self.report(*insert_clients(task), total, started)
+        else:
+            # Forked workers open their own connections
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(options['workers']) as pool:
+                for counts in pool.imap_unordered(insert_clients, tasks):
+                    self.report(*counts, total, started)
+        # bulk_create skips the signals that bump ETag versions; new clients
+        # have no per-client scope yet, so the collection scopes are enough.
+        # Change feed consumers reload instead of reading every row.
+        versions.bump([versions.CLIENT, versions.MEETING])
+        changes.record_resync()
+
+        elapsed = time.perf_counter() - started
+        meetings = self.progress['meetings']
+        self.stdout.write(self.style.SUCCESS(
+            f"Seed complete: {self.progress['clients']} clients, {meetings} meetings in {elapsed:.1f}s "
+            f"({meetings / elapsed if elapsed else 0:,.0f} meetings/s)"
+        ))
+
+    def report(self, clients, meetings, total, started):
+        progress = self.progress
+        progress['clients'] += clients
+        progress['meetings'] += meetings
+        now = time.perf_counter()
+        if now - progress['reported'] >= 2 or progress['clients'] == total:
+            progress['reported'] = now
+            rate = progress['meetings'] / (now - started) if now > started else 0
+            self.stdout.write(f"  {progress['clients']}/{total} clients, {progress['meetings']} meetings ({rate:,.0f} meetings/s)")
+
+    def reset(self):
+        # Plain DELETEs: Model.delete() would load every row to send signals
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (ClientDailyOccupancy, SeriesException, MeetingSeries, Meeting, Client):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+                self.stdout.write(self.style.WARNING(f"Deleted {cursor.rowcount} existing {model._meta.verbose_name_plural}"))
+        versions.bump([versions.CLIENT, versions.MEETING])
+        changes.record_resync()
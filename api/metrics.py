@@ -0,0 +1,108 @@
+"""Request and database metrics for the API, served on `/metrics`.
+
+`MetricsMiddleware` times every request and labels it with the matched
+URL name (`meeting-list`, `async-client-detail`, ...), so the series
+count stays bounded whatever the paths. Database queries are counted by
+an execute wrapper installed on every new connection. It reports into
+the current request's stats through a context variable, which also
+follows async views into the threads where their queries run. Queries
+outside a request (management commands, the MCP bridge's own lookups)
+are not recorded.
+
+Streamed responses (`/api/meetings/export/`) are timed until the view
+returns, not until the last byte is sent.
+"""
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from scheduler.metrics import CONTENT_TYPE, REGISTRY, Counter, Histogram
+
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to produce a response, by route', ('method', 'route'))
+REQUESTS = Counter('http_requests', 'Responses, by route and status code', ('method', 'route', 'status'))
+REQUEST_QUERIES = Histogram('django_db_queries_per_request', 'Database queries per request, by route', ('route',), buckets=QUERY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram('django_db_duration_seconds_per_request', 'Time spent in database queries per request, by route', ('route',), buckets=DB_BUCKETS)
+
+_current = ContextVar('request_db_stats', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+	stats = _current.get()
+	if stats is None:
+		return execute(sql, params, many, context)
+	started = time.perf_counter()
+	try:
+		return execute(sql, params, many, context)
+	finally:
+		stats[0] += 1
+		stats[1] += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def _instrument_connection(sender, connection, **kwargs):
+	if _record_query not in connection.execute_wrappers:
+		connection.execute_wrappers.append(_record_query)
+
+
+def _route(request):
+	match = request.resolver_match
+	if match is None:
+		return 'unmatched'
+	return match.view_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+	"""Records latency, status and database usage of every request; sync and async."""
+
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		self.is_async = iscoroutinefunction(get_response)
+		if self.is_async:
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if self.is_async:
+			return self.__acall__(request)
+		stats = [0, 0.0]
+		token = _current.set(stats)
+		started = time.perf_counter()
+		try:
+			response = self.get_response(request)
+		finally:
+			_current.reset(token)
+		self.record(request, response, time.perf_counter() - started, stats)
+		return response
+
+	async def __acall__(self, request):
+		stats = [0, 0.0]
+		token = _current.set(stats)
+		started = time.perf_counter()
+		try:
+			response = await self.get_response(request)
+		finally:
+			_current.reset(token)
+		self.record(request, response, time.perf_counter() - started, stats)
+		return response
+
+	def record(self, request, response, elapsed, stats):
+		route = _route(request)
+		method = request.method if request.method in METHODS else 'other'
+		REQUEST_SECONDS.observe(elapsed, method, route)
+		REQUESTS.inc(method, route, str(response.status_code))
+		REQUEST_QUERIES.observe(stats[0], route)
+		REQUEST_DB_SECONDS.observe(stats[1], route)
+
+
+def metrics_view(request):
+	return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # tstzrange + GiST exclusion is PostgreSQL-only; other backends rely on
+    # the application-level check in api/overlap.py.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        'ALTER TABLE api_meeting ADD CONSTRAINT meeting_no_overlap '
+        "EXCLUDE USING gist (client_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&)"
+    )
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE api_meeting DROP CONSTRAINT IF EXISTS meeting_no_overlap')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['client', 'start_time'], name='meeting_client_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['client', 'end_time'], name='meeting_client_end_idx'),
+        ),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_overlap_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['start_time', 'end_time', 'client'], name='meeting_window_idx'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# Client search index (api/search.py). SQLite: an FTS5 trigram index over
+# name, email and phone, external-content on api_client and kept in sync by
+# triggers. PostgreSQL: pg_trgm GIN indexes, which serve the `icontains`
+# lookups of the search filter and similarity() ranking.
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE api_client_search USING fts5(
+        name, email, phone, content='api_client', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER api_client_search_insert AFTER INSERT ON api_client BEGIN
+        INSERT INTO api_client_search(rowid, name, email, phone) VALUES (new.id, new.name, new.email, new.phone);
+    END""",
+    """CREATE TRIGGER api_client_search_delete AFTER DELETE ON api_client BEGIN
+        INSERT INTO api_client_search(api_client_search, rowid, name, email, phone)
+        VALUES ('delete', old.id, old.name, old.email, old.phone);
+    END""",
+    """CREATE TRIGGER api_client_search_update AFTER UPDATE OF name, email, phone ON api_client BEGIN
+        INSERT INTO api_client_search(api_client_search, rowid, name, email, phone)
+        VALUES ('delete', old.id, old.name, old.email, old.phone);
+        INSERT INTO api_client_search(rowid, name, email, phone) VALUES (new.id, new.name, new.email, new.phone);
+    END""",
+    # Index the clients that already exist
+    "INSERT INTO api_client_search(api_client_search) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS api_client_search_insert',
+    'DROP TRIGGER IF EXISTS api_client_search_delete',
+    'DROP TRIGGER IF EXISTS api_client_search_update',
+    'DROP TABLE IF EXISTS api_client_search',
+]
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # On the expression Django compiles `icontains` to
+    'CREATE INDEX IF NOT EXISTS client_name_trgm_idx ON api_client USING gin ((UPPER(name::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS client_email_trgm_idx ON api_client USING gin ((UPPER(email::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS client_phone_trgm_idx ON api_client USING gin ((UPPER(phone::text)) gin_trgm_ops)',
+]
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS client_name_trgm_idx',
+    'DROP INDEX IF EXISTS client_email_trgm_idx',
+    'DROP INDEX IF EXISTS client_phone_trgm_idx',
+]
+
+
+def _sqlite_has_fts5(cursor):
+    # The trigram tokenizer needs SQLite 3.34+ built with FTS5
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+        cursor.execute('DROP TABLE temp.fts5_probe')
+        return True
+    except Exception:
+        return False
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        statements = statements_by_vendor.get(connection.vendor, [])
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite' and statements is SQLITE_FORWARD and not _sqlite_has_fts5(cursor):
+                # Search falls back to scans (api/search.py)
+                return
+            for sql in statements:
+                cursor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_resource_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_client_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('rrule', models.CharField(max_length=500)),
+                ('timezone', models.CharField(default='UTC', max_length=64)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('notes', models.TextField(blank=True)),
+                ('ends_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='api.client')),
+            ],
+            options={
+                'verbose_name_plural': 'meeting series',
+                'ordering': ['start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeriesException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_start', models.DateTimeField()),
+                ('cancelled', models.BooleanField(default=False)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('notes', models.TextField(blank=True)),
+                ('series', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='api.meetingseries')),
+            ],
+            options={
+                'ordering': ['original_start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='meetingseries',
+            index=models.Index(fields=['client', 'start_time'], name='series_client_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meetingseries',
+            index=models.Index(fields=['client', 'ends_at'], name='series_client_ends_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='meetingseries',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time'))), name='series_end_after_start'),
+        ),
+        migrations.AddIndex(
+            model_name='seriesexception',
+            index=models.Index(fields=['series', 'start_time'], name='series_exception_moved_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='seriesexception',
+            constraint=models.UniqueConstraint(fields=('series', 'original_start'), name='series_exception_unique'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:26
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    # Summarize the existing meetings, as api/occupancy.py rebuild() does
+    # (kept self-contained so later changes to it cannot alter this migration)
+    Meeting = apps.get_model('api', 'Meeting')
+    Occupancy = apps.get_model('api', 'ClientDailyOccupancy')
+    using = schema_editor.connection.alias
+    one_day = timedelta(days=1)
+    days = defaultdict(lambda: [0, 0])
+    meetings = Meeting.objects.using(using).values_list('client_id', 'start_time', 'end_time')
+    for client_id, start, end in meetings.iterator(chunk_size=5000):
+        start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+        day = start.date()
+        while True:
+            next_day = datetime.combine(day + one_day, time(), tzinfo=timezone.utc)
+            row = days[client_id, day]
+            row[0] += 1
+            row[1] += round((min(end, next_day) - max(start, datetime.combine(day, time(), tzinfo=timezone.utc))).total_seconds())
+            if end <= next_day:
+                break
+            day += one_day
+    Occupancy.objects.using(using).bulk_create(
+        [Occupancy(client_id=c, day=d, meetings=n, busy_seconds=s) for (c, d), (n, s) in days.items()], batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_meeting_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientDailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('meetings', models.IntegerField(default=0)),
+                ('busy_seconds', models.BigIntegerField(default=0)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='api.client')),
+            ],
+            options={
+                'verbose_name_plural': 'client daily occupancy',
+                'ordering': ['client', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('client', 'day'), name='occupancy_client_day_unique')],
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.1 on 2026-10-18 05:30
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_client_daily_occupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('resource', models.CharField(choices=[('client', 'client'), ('meeting', 'meeting'), ('series', 'series'), ('*', 'all')], max_length=10)),
+                ('action', models.CharField(choices=[('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted'), ('resync', 'resync')], max_length=10)),
+                ('object_id', models.BigIntegerField(null=True)),
+                ('client_id', models.BigIntegerField(null=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['resource', 'object_id', 'seq'], name='change_object_seq_idx'), models.Index(fields=['created_at'], name='change_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# Change feed numbering on PostgreSQL (api/changes.py). Entries are
+# inserted with a provisional, negative `seq` and get their real one from
+# a deferred trigger when the transaction commits, under an advisory lock
+# that is only held for the commit itself. Concurrent writers no longer
+# wait for each other for their whole transaction, and a later `seq` still
+# never becomes visible before an earlier one. SQLite serializes writers,
+# so the plain autoincrement is already in commit order there.
+ADVISORY_LOCK = 0x6368616e6765
+
+POSTGRES_FORWARD = [
+    """CREATE FUNCTION api_change_pending() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.seq := -NEW.seq;
+        RETURN NEW;
+    END $$""",
+    'CREATE TRIGGER api_change_pending BEFORE INSERT ON api_change FOR EACH ROW EXECUTE FUNCTION api_change_pending()',
+    f"""CREATE FUNCTION api_change_number() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock({ADVISORY_LOCK});
+        UPDATE api_change SET seq = nextval(pg_get_serial_sequence('api_change', 'seq')) WHERE seq = NEW.seq;
+        RETURN NULL;
+    END $$""",
+    """CREATE CONSTRAINT TRIGGER api_change_number AFTER INSERT ON api_change
+        DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION api_change_number()""",
+]
+POSTGRES_REVERSE = [
+    'DROP TRIGGER IF EXISTS api_change_number ON api_change',
+    'DROP FUNCTION IF EXISTS api_change_number()',
+    'DROP TRIGGER IF EXISTS api_change_pending ON api_change',
+    'DROP FUNCTION IF EXISTS api_change_pending()',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(POSTGRES_FORWARD), _run(POSTGRES_REVERSE)),
+    ]
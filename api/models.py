@@ -1,5 +1,8 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class Client(models.Model):
@@ -8,6 +11,12 @@ class Client(models.Model):
 	phone = models.CharField(max_length=50, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 
+	class Meta:
+		indexes = [
+			# Keyset pagination on (created_at, id)
+			models.Index(fields=['created_at', 'id'], name='client_created_id_idx'),
+		]
+
 	def __str__(self):
 		return f"{self.name} <{self.email}>"
 
@@ -23,6 +32,15 @@ class Meeting(models.Model):
 
 	class Meta:
 		ordering = ['start_time']
+		indexes = [
+			# Keyset pagination on (start_time, id)
+			models.Index(fields=['start_time', 'id'], name='meeting_start_id_idx'),
+			# Per-client overlap probes (see api/overlap.py)
+			models.Index(fields=['client', 'start_time'], name='meeting_client_start_idx'),
+			models.Index(fields=['client', 'end_time'], name='meeting_client_end_idx'),
+			# Index-only, start-ordered scans for free/busy (see api/availability.py)
+			models.Index(fields=['start_time', 'end_time', 'client'], name='meeting_window_idx'),
+		]
 		constraints = [
 			models.CheckConstraint(check=models.Q(end_time__gt=models.F('start_time')), name='meeting_end_after_start'),
 		]
@@ -38,4 +56,155 @@ class Meeting(models.Model):
 	def overlaps(qs, start, end):
 		return qs.filter(start_time__lt=end, end_time__gt=start).exists()
 
+
+class MeetingSeries(models.Model):
+	"""A recurring meeting: the first occurrence plus an RRULE (see api/recurrence.py).
+
+	Occurrences are not stored. They are computed from `rrule`, which recurs
+	in `timezone` so wall-clock times survive DST changes, and adjusted by
+	the series' `SeriesException` rows. `ends_at` is the end of the last
+	occurrence (None when the rule never ends), kept up to date on save.
+	"""
+	client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='series')
+	title = models.CharField(max_length=200)
+	start_time = models.DateTimeField()
+	end_time = models.DateTimeField()
+	rrule = models.CharField(max_length=500)
+	timezone = models.CharField(max_length=64, default='UTC')
+	location = models.CharField(max_length=200, blank=True)
+	notes = models.TextField(blank=True)
+	ends_at = models.DateTimeField(null=True, blank=True, editable=False)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		ordering = ['start_time']
+		verbose_name_plural = 'meeting series'
+		indexes = [
+			# Series of a client active in a window (api/recurrence.py)
+			models.Index(fields=['client', 'start_time'], name='series_client_start_idx'),
+			models.Index(fields=['client', 'ends_at'], name='series_client_ends_idx'),
+		]
+		constraints = [
+			models.CheckConstraint(check=models.Q(end_time__gt=models.F('start_time')), name='series_end_after_start'),
+		]
+
+	def clean(self):
+		from .recurrence import parse_rule
+		if self.end_time <= self.start_time:
+			raise ValidationError({'end_time': 'end_time must be after start_time'})
+		try:
+			tz = ZoneInfo(self.timezone)
+		except (ZoneInfoNotFoundError, ValueError):
+			raise ValidationError({'timezone': f'Unknown time zone: {self.timezone}'})
+		try:
+			parse_rule(self.rrule, self.start_time.astimezone(tz))
+		except ValueError as exc:
+			raise ValidationError({'rrule': str(exc)})
+
+	def save(self, *args, **kwargs):
+		from .recurrence import series_end
+		self.ends_at = series_end(self)
+		if 'update_fields' in kwargs and kwargs['update_fields'] is not None:
+			kwargs['update_fields'] = {*kwargs['update_fields'], 'ends_at'}
+		super().save(*args, **kwargs)
+
+	def __str__(self):
+		return f"{self.title} with {self.client} ({self.rrule})"
+
+
+class SeriesException(models.Model):
+	"""One occurrence of a series cancelled or overridden, keyed by its scheduled start.
+
+	Override fields left empty keep the series' value; `start_time` and
+	`end_time` move the occurrence and are set together.
+	"""
+	series = models.ForeignKey(MeetingSeries, on_delete=models.CASCADE, related_name='exceptions')
+	original_start = models.DateTimeField()
+	cancelled = models.BooleanField(default=False)
+	start_time = models.DateTimeField(null=True, blank=True)
+	end_time = models.DateTimeField(null=True, blank=True)
+	title = models.CharField(max_length=200, blank=True)
+	location = models.CharField(max_length=200, blank=True)
+	notes = models.TextField(blank=True)
+
+	class Meta:
+		ordering = ['original_start']
+		constraints = [
+			models.UniqueConstraint(fields=['series', 'original_start'], name='series_exception_unique'),
+		]
+		indexes = [
+			# Overrides moved into a window (api/recurrence.py)
+			models.Index(fields=['series', 'start_time'], name='series_exception_moved_idx'),
+		]
+
+	def __str__(self):
+		return f"{'Cancelled' if self.cancelled else 'Changed'} {self.series.title} at {self.original_start}"
+
+
+class ClientDailyOccupancy(models.Model):
+	"""Meetings and busy time of one client on one UTC day (see api/occupancy.py).
+
+	Derived from `Meeting` rows and maintained with them; a meeting is
+	counted on every day it touches. Days without meetings have no row.
+	"""
+	client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='occupancy')
+	day = models.DateField()
+	meetings = models.IntegerField(default=0)
+	busy_seconds = models.BigIntegerField(default=0)
+
+	class Meta:
+		ordering = ['client', 'day']
+		verbose_name_plural = 'client daily occupancy'
+		constraints = [
+			# Also the index of per-client day ranges
+			models.UniqueConstraint(fields=['client', 'day'], name='occupancy_client_day_unique'),
+		]
+
+	def __str__(self):
+		return f"{self.client_id}@{self.day}: {self.meetings} meetings"
+
+
+class Change(models.Model):
+	"""One write to a client, meeting or series, numbered in commit order (see api/changes.py).
+
+	`data` is the object's fields after the write (None for deletions);
+	`client_id` is the client the object belongs to. A `resync` entry marks
+	writes that were not logged one by one.
+	"""
+	RESOURCES = [('client', 'client'), ('meeting', 'meeting'), ('series', 'series'), ('*', 'all')]
+	ACTIONS = [('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted'), ('resync', 'resync')]
+
+	seq = models.BigAutoField(primary_key=True)
+	resource = models.CharField(max_length=10, choices=RESOURCES)
+	action = models.CharField(max_length=10, choices=ACTIONS)
+	object_id = models.BigIntegerField(null=True)
+	client_id = models.BigIntegerField(null=True)
+	data = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		ordering = ['seq']
+		indexes = [
+			# Compaction: later entries of the same object
+			models.Index(fields=['resource', 'object_id', 'seq'], name='change_object_seq_idx'),
+			# Retention by age
+			models.Index(fields=['created_at'], name='change_created_idx'),
+		]
+
+	def __str__(self):
+		return f"#{self.seq} {self.resource} {self.object_id} {self.action}"
+
+
+class ResourceVersion(models.Model):
+	"""Write counter per resource scope, used to derive cheap ETags.
+
+	Scopes are `client`, `meeting` and `meeting:client:<id>`; see
+	api/versions.py.
+	"""
+	scope = models.CharField(max_length=100, primary_key=True)
+	version = models.BigIntegerField(default=0)
+
+	def __str__(self):
+		return f"{self.scope}@{self.version}"
+
 # Create your models here.
@@ -0,0 +1,181 @@
+"""Per-client daily occupancy: how many meetings and how much busy time, per UTC day.
+
+`ClientDailyOccupancy` has one row per client and day with meetings. A
+meeting counts on every UTC day it touches, with the part of its time
+that falls on that day, so a day's row never depends on other days.
+Rows are maintained in the writing transaction, like the ETag counters
+(api/versions.py): signals cover ORM saves and deletes (api/signals.py),
+and code using `bulk_create` calls `add()` itself. `rebuild()` (the
+`rebuild_occupancy` command) recomputes them from the meetings.
+
+Occurrences of recurring series are not stored, so `summary()` adds
+those of the requested days from the series (api/recurrence.py). A
+summary costs the days asked for, never the client's history.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+
+from django.db import connections, transaction
+from django.db.models import F
+
+from . import recurrence
+from .models import ClientDailyOccupancy, Meeting, MeetingSeries
+
+ONE_DAY = timedelta(days=1)
+# Rows per INSERT ... ON CONFLICT statement (4 parameters each; SQLite allows 32766)
+UPSERT_BATCH = 500
+
+
+def midnight(day):
+	return datetime.combine(day, time(), tzinfo=timezone.utc)
+
+
+def split(start, end):
+	"""(day, seconds) for every UTC day `[start, end)` touches."""
+	start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+	day = start.date()
+	while True:
+		next_day = midnight(day + ONE_DAY)
+		yield day, round((min(end, next_day) - max(start, midnight(day))).total_seconds())
+		if end <= next_day:
+			return
+		day += ONE_DAY
+
+
+def deltas(meetings, sign=1, into=None):
+	"""Add `sign` times the (client_id, start, end) `meetings` to {(client_id, day): [meetings, seconds]}."""
+	into = defaultdict(lambda: [0, 0]) if into is None else into
+	for client_id, start, end in meetings:
+		for day, seconds in split(start, end):
+			row = into[client_id, day]
+			row[0] += sign
+			row[1] += sign * seconds
+	return into
+
+
+def _upsert(connection, table, rows):
+	quote = connection.ops.quote_name
+	table = quote(table)
+	meetings, seconds = quote('meetings'), quote('busy_seconds')
+	with connection.cursor() as cursor:
+		for i in range(0, len(rows), UPSERT_BATCH):
+			batch = rows[i:i + UPSERT_BATCH]
+			cursor.execute(
+				f'INSERT INTO {table} ({quote("client_id")}, {quote("day")}, {meetings}, {seconds}) '
+				f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(batch))} '
+				f'ON CONFLICT ({quote("client_id")}, {quote("day")}) DO UPDATE SET '
+				f'{meetings} = {table}.{meetings} + excluded.{meetings}, '
+				f'{seconds} = {table}.{seconds} + excluded.{seconds}',
+				[
+					value for client_id, day, count, busy in batch
+					for value in (client_id, connection.ops.adapt_datefield_value(day), count, busy)
+				],
+			)
+
+
+def apply(changes, using='default'):
+	"""Add the {(client_id, day): [meetings, seconds]} `changes` to the stored rows.
+
+	One upsert statement per `UPSERT_BATCH` rows on SQLite and PostgreSQL,
+	plus one DELETE for days left without meetings; changes that cancel
+	out cost nothing.
+	"""
+	rows = [(client_id, day, count, busy) for (client_id, day), (count, busy) in changes.items() if count or busy]
+	if not rows:
+		return
+	connection = connections[using]
+	occupancy = ClientDailyOccupancy.objects.using(using)
+	if connection.vendor in ('sqlite', 'postgresql'):
+		_upsert(connection, ClientDailyOccupancy._meta.db_table, rows)
+	else:
+		for client_id, day, count, busy in rows:
+			updated = occupancy.filter(client_id=client_id, day=day).update(
+				meetings=F('meetings') + count, busy_seconds=F('busy_seconds') + busy,
+			)
+			if not updated:
+				occupancy.create(client_id=client_id, day=day, meetings=count, busy_seconds=busy)
+	if any(count < 0 for _, _, count, _ in rows):
+		occupancy.filter(
+			client_id__in={row[0] for row in rows}, day__in={row[1] for row in rows}, meetings__lte=0,
+		).delete()
+
+
+def add(meetings, using='default'):
+	"""Count newly inserted `Meeting` instances, for writers that bypass signals."""
+	apply(deltas((m.client_id, m.start_time, m.end_time) for m in meetings), using)
+
+
+def move(previous, current, using='default'):
+	"""Replace the (client_id, start, end) `previous` of a meeting (None if new) with `current` (None if deleted)."""
+	changes = deltas([current] if current else [])
+	if previous:
+		deltas([previous], sign=-1, into=changes)
+	apply(changes, using)
+
+
+def rebuild(client_ids=None, batch_size=5000, using='default'):
+	"""Recompute the rows of `client_ids` (default: every client) from their meetings.
+
+	Meetings are read once in client order, so memory stays at one
+	client's days plus a batch of rows. Returns the number of rows written.
+	"""
+	rows = ClientDailyOccupancy.objects.using(using)
+	meetings = Meeting.objects.using(using)
+	if client_ids is not None:
+		rows = rows.filter(client_id__in=client_ids)
+		meetings = meetings.filter(client_id__in=client_ids)
+	written = 0
+	batch = []
+
+	def flush(client_changes):
+		nonlocal batch, written
+		batch.extend(
+			ClientDailyOccupancy(client_id=client_id, day=day, meetings=count, busy_seconds=busy)
+			for (client_id, day), (count, busy) in sorted(client_changes.items())
+		)
+		if len(batch) >= batch_size:
+			ClientDailyOccupancy.objects.using(using).bulk_create(batch)
+			written += len(batch)
+			batch = []
+
+	with transaction.atomic(using):
+		rows.delete()
+		current, changes = None, None
+		ordered = meetings.order_by('client_id', 'start_time').values_list('client_id', 'start_time', 'end_time')
+		for row in ordered.iterator(chunk_size=batch_size):
+			if row[0] != current:
+				if changes:
+					flush(changes)
+				current, changes = row[0], None
+			changes = deltas([row], into=changes)
+		if changes:
+			flush(changes)
+		ClientDailyOccupancy.objects.using(using).bulk_create(batch)
+		written += len(batch)
+	return written
+
+
+def summary(client, first, last):
+	"""Every day `first`..`last` (inclusive) of `client`: [{'date', 'meetings', 'busy_seconds'}, ...].
+
+	Days come from the stored rows (one range query on the (client, day)
+	index) plus the series occurrences of the window (two queries).
+	"""
+	days = {
+		day: [count, busy] for day, count, busy in ClientDailyOccupancy.objects.filter(
+			client=client, day__gte=first, day__lte=last,
+		).values_list('day', 'meetings', 'busy_seconds')
+	}
+	start, end = midnight(first), midnight(last + ONE_DAY)
+	for occurrence in recurrence.occurrences(MeetingSeries.objects.filter(client=client), start, end):
+		for day, seconds in split(max(occurrence.start_time, start), min(occurrence.end_time, end)):
+			row = days.setdefault(day, [0, 0])
+			row[0] += 1
+			row[1] += seconds
+	result = []
+	day = first
+	while day <= last:
+		count, busy = days.get(day, (0, 0))
+		result.append({'date': day, 'meetings': count, 'busy_seconds': busy})
+		day += ONE_DAY
+	return result
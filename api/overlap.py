@@ -0,0 +1,43 @@
+"""Per-client overlap detection for meetings.
+
+Meetings of a single client never overlap (that is what this module
+enforces), so ordered by `start_time` they are also ordered by
+`end_time`. A new window `[start, end)` can therefore only collide with
+the meeting that starts last before `end` or the one that ends first
+after `start`. Both are found with a single seek on the
+`(client_id, start_time)` and `(client_id, end_time)` indexes, so the
+check costs the same whether a client has ten meetings or a million.
+
+On PostgreSQL the same invariant is also enforced by the
+`meeting_no_overlap` exclusion constraint (see migration 0003).
+
+Recurring meetings are checked last, without materializing them: each
+active series of the client yields at most its first occurrence in the
+window (api/recurrence.py).
+"""
+from .models import Meeting
+from .recurrence import find_occurrence
+
+
+def find_conflict(client, start, end, exclude_pk=None, skip_occurrence=None):
+	"""Return a meeting or series occurrence of `client` overlapping `[start, end)`, or None.
+
+	The second probe only matters for data that already violates the
+	invariant (e.g. rows loaded around the API); it is skipped whenever
+	the first one finds a conflict. `skip_occurrence` is the
+	`(series id, original start)` of an occurrence being moved.
+	"""
+	base = Meeting.objects.filter(client=client).only('id', 'start_time', 'end_time')
+	if exclude_pk is not None:
+		base = base.exclude(pk=exclude_pk)
+	latest_start = base.filter(start_time__lt=end).order_by('-start_time').first()
+	if latest_start is not None and latest_start.end_time > start:
+		return latest_start
+	earliest_end = base.filter(end_time__gt=start).order_by('end_time').first()
+	if earliest_end is not None and earliest_end.start_time < end:
+		return earliest_end
+	return find_occurrence(client, start, end, skip=skip_occurrence)
+
+
+def has_overlap(client, start, end, exclude_pk=None, skip_occurrence=None):
+	return find_conflict(client, start, end, exclude_pk, skip_occurrence) is not None
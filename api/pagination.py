@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+	"""Forward-only keyset (seek) pagination over `(<ordering field>, id)`.
+
+	Each page is a single index range scan starting right after the last row
+	of the previous page, so page cost does not grow with table size.
+
+	Pagination is opt-in: a page is only produced when `limit` or `cursor`
+	is present, so plain list calls keep returning a bare JSON array.
+	The `ordering` query parameter (validated against the view's
+	`ordering_fields`) picks the keyset column; `id` always breaks ties.
+	"""
+	ordering = 'created_at'
+	limit_query_param = 'limit'
+	cursor_query_param = 'cursor'
+	default_limit = 100
+	max_limit = 1000
+	invalid_cursor_message = 'Invalid cursor'
+
+	def paginate_queryset(self, queryset, request, view=None):
+		queryset = self.page_queryset(queryset, request, view)
+		return None if queryset is None else self.finish_page(list(queryset))
+
+	async def apaginate_queryset(self, queryset, request, view=None):
+		"""`paginate_queryset` for async views, reading the page with the async ORM."""
+		queryset = self.page_queryset(queryset, request, view)
+		return None if queryset is None else self.finish_page([row async for row in queryset])
+
+	def page_queryset(self, queryset, request, view=None):
+		"""The unevaluated query for the requested page (one row extra), or None."""
+		params = request.query_params
+		if self.limit_query_param not in params and self.cursor_query_param not in params:
+			return None
+
+		self.request = request
+		self.limit = self.get_limit(request)
+		self.field, self.descending = self.get_ordering(request, view)
+
+		cursor = params.get(self.cursor_query_param)
+		if cursor:
+			value, pk = self.decode_cursor(cursor)
+			op = 'lt' if self.descending else 'gt'
+			queryset = queryset.filter(
+				Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'pk__{op}': pk})
+			)
+
+		prefix = '-' if self.descending else ''
+		return queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')[:self.limit + 1]
+
+	def finish_page(self, rows):
+		self.has_next = len(rows) > self.limit
+		rows = rows[:self.limit]
+		self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+		return rows
+
+	def get_limit(self, request):
+		try:
+			limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+		except (TypeError, ValueError):
+			return self.default_limit
+		return max(1, min(limit, self.max_limit))
+
+	def get_ordering(self, request, view):
+		allowed = getattr(view, 'ordering_fields', None) or [self.ordering]
+		requested = request.query_params.get('ordering', '')
+		term = requested.split(',')[0].strip()
+		if term.lstrip('-') in allowed:
+			return term.lstrip('-'), term.startswith('-')
+		return self.ordering, False
+
+	def _position(self, row):
+		if isinstance(row, dict):
+			value = row[self.field]
+			if isinstance(value, datetime) and value.tzinfo is None:
+				# Raw rows (api/fastpath.py) from backends that store naive UTC
+				value = value.replace(tzinfo=timezone.utc)
+			return value, row['id']
+		return getattr(row, self.field), row.pk
+
+	def encode_cursor(self, row):
+		value, pk = self._position(row)
+		if isinstance(value, datetime):
+			value = value.isoformat()
+		raw = json.dumps([self.field, self.descending, value, pk], separators=(',', ':'))
+		return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+	def decode_cursor(self, token):
+		try:
+			padded = token + '=' * (-len(token) % 4)
+			field, descending, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+		except (TypeError, ValueError, binascii.Error):
+			raise NotFound(self.invalid_cursor_message)
+		# A cursor is only meaningful for the ordering it was issued under.
+		if field != self.field or descending != self.descending:
+			raise NotFound(self.invalid_cursor_message)
+		return value, pk
+
+	def get_next_link(self):
+		if self.next_cursor is None:
+			return None
+		url = self.request.build_absolute_uri()
+		return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+	def get_paginated_response(self, data):
+		return Response({
+			'next': self.get_next_link(),
+			'next_cursor': self.next_cursor,
+			'results': data,
+		})
+
+	def get_paginated_response_schema(self, schema):
+		return {
+			'type': 'object',
+			'required': ['results'],
+			'properties': {
+				'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+				'next_cursor': {'type': 'string', 'nullable': True},
+				'results': schema,
+			},
+		}
+
+	def get_schema_operation_parameters(self, view):
+		return [
+			{
+				'name': self.limit_query_param,
+				'required': False,
+				'in': 'query',
+				'description': f'Page size (max {self.max_limit}); enables keyset pagination.',
+				'schema': {'type': 'integer'},
+			},
+			{
+				'name': self.cursor_query_param,
+				'required': False,
+				'in': 'query',
+				'description': 'Opaque cursor from a previous page (`next_cursor`).',
+				'schema': {'type': 'string'},
+			},
+		]
+
+
+class ClientKeysetPagination(KeysetPagination):
+	ordering = 'created_at'
+
+
+class MeetingKeysetPagination(KeysetPagination):
+	ordering = 'start_time'
+
+
+class SeriesKeysetPagination(KeysetPagination):
+	ordering = 'start_time'
@@ -0,0 +1,247 @@
+"""Query and wall-time budgets per endpoint, and a repeated-query detector.
+
+`ENDPOINTS` holds one request for every route in scheduler/urls.py (and the
+admin changelists), with the most queries it may run against the
+`build_dataset()` data. `QueryBudgetTest` in api/tests.py replays them and
+fails when an endpoint goes over budget, repeats a statement (N+1) or a new
+route has no entry. `python -m benchmarks.queries` replays them at larger
+scales; a query count that grows with the data is an N+1.
+
+`DuplicateQueryMiddleware` (on when `DEBUG`) logs statements that run
+`DUPLICATE_QUERY_THRESHOLD` times or more in one request, differing only in
+their parameters.
+"""
+import logging
+import re
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+
+from .statements import record_statement, recording
+
+logger = logging.getLogger(__name__)
+
+# Seconds; generous, for slow CI machines. The query counts are the tight bound
+MAX_SECONDS = 1.0
+
+Endpoint = namedtuple('Endpoint', 'method path data max_queries max_seconds admin', defaults=(None, 0, MAX_SECONDS, False))
+
+# Paths are formatted with the ids from build_dataset(). Reads of the
+# viewsets include the ETag version lookup. Writes include their version
+# bump (one upsert, api/versions.py) and their change feed entry
+# (api/changes.py); meeting writes run the overlap check twice (advisory,
+# then under the client lock; api/booking.py).
+ENDPOINTS = [
+	Endpoint('GET', '/metrics'),
+	Endpoint('GET', '/api/', max_queries=0),
+	Endpoint('GET', '/api/schema/', max_seconds=5.0),
+	Endpoint('GET', '/api/docs/'),
+	Endpoint('GET', '/api/clients/', {'limit': 100}, max_queries=2),
+	# Searches probe the index first; the first search of a process also
+	# looks up its backend (api/search.py)
+	Endpoint('GET', '/api/clients/', {'search': 'client 1'}, max_queries=4),
+	Endpoint('GET', '/api/clients/search/', {'q': 'client 1'}, max_queries=5),
+	Endpoint('GET', '/api/clients/search/', {'q': 'clinet'}, max_queries=3),
+	Endpoint('POST', '/api/clients/', {'name': 'New', 'email': 'new@example.test'}, max_queries=4),
+	Endpoint('POST', '/api/clients/bulk/', [{'name': f'Bulk {i}', 'email': f'bulk{i}@example.test'} for i in range(20)], max_queries=6),
+	Endpoint('GET', '/api/clients/{client}/', max_queries=2),
+	# Summary rows, then the series of the window and their exceptions
+	Endpoint('GET', '/api/clients/{client}/occupancy/', {'start': '2030-01-01', 'end': '2030-01-31'}, max_queries=5),
+	Endpoint('PATCH', '/api/clients/{client}/', {'phone': '+1 555 0100'}, max_queries=4),
+	# Also collects the client's series, their exceptions and occupancy rows
+	Endpoint('DELETE', '/api/clients/{client}/', max_queries=11),
+	Endpoint('GET', '/api/meetings/', max_queries=2),
+	Endpoint('GET', '/api/meetings/', {'client': '{client}', 'limit': 100}, max_queries=3),
+	Endpoint('GET', '/api/meetings/', {'fields': 'id,title,client', 'ordering': '-start_time'}, max_queries=2),
+	Endpoint('POST', '/api/meetings/', {'client': '{client}', 'title': 'New', 'start_time': '2031-01-06T10:00:00Z', 'end_time': '2031-01-06T11:00:00Z'}, max_queries=13),
+	Endpoint('POST', '/api/meetings/bulk/', [
+		{'client': '{client}', 'title': f'Bulk {i}', 'start_time': f'2031-02-{i + 1:02d}T10:00:00Z', 'end_time': f'2031-02-{i + 1:02d}T11:00:00Z'}
+		for i in range(20)
+	], max_queries=9),
+	Endpoint('GET', '/api/meetings/export/', max_queries=1),
+	Endpoint('GET', '/api/meetings/{meeting}/', max_queries=2),
+	Endpoint('PATCH', '/api/meetings/{meeting}/', {'title': 'Renamed'}, max_queries=13),
+	Endpoint('DELETE', '/api/meetings/{meeting}/', max_queries=6),
+	# With `occurrences`, the client's series and their exceptions in the window are read too
+	Endpoint('GET', '/api/meetings/', {'client': '{client}', 'start': '{start}', 'end': '{end}', 'occurrences': 'true'}, max_queries=5),
+	Endpoint('GET', '/api/series/', max_queries=3),
+	Endpoint('GET', '/api/series/', {'client': '{client}', 'limit': 100}, max_queries=4),
+	# Conflicts of a new or rescheduled series: one sweep over the client's
+	# meetings and other series, twice (advisory, then under the lock)
+	Endpoint('POST', '/api/series/', {
+		'client': '{client}', 'title': 'Weekly', 'start_time': '2031-03-03T10:00:00Z', 'end_time': '2031-03-03T11:00:00Z',
+		'rrule': 'FREQ=WEEKLY;COUNT=10',
+	}, max_queries=11),
+	Endpoint('GET', '/api/series/{series}/', max_queries=3),
+	Endpoint('PATCH', '/api/series/{series}/', {'title': 'Renamed'}, max_queries=8),
+	Endpoint('PATCH', '/api/series/{series}/', {'rrule': 'FREQ=WEEKLY;COUNT=12'}, max_queries=16),
+	Endpoint('DELETE', '/api/series/{series}/', max_queries=7),
+	Endpoint('GET', '/api/series/{series}/occurrences/', {'start': '{start}', 'end': '{series_end}'}, max_queries=3),
+	Endpoint('POST', '/api/series/{series}/exceptions/', {
+		'original_start': '{occurrence}', 'start_time': '2030-01-21T05:00:00Z', 'end_time': '2030-01-21T06:00:00Z',
+	}, max_queries=22),
+	Endpoint('DELETE', '/api/series/{series}/exceptions/', {'original_start': '{cancelled}'}, max_queries=14),
+	Endpoint('GET', '/api/availability/', {'clients': '{client},{other_client}', 'start': '{start}', 'end': '{end}'}, max_queries=5),
+	# The pruning mark, then the entries
+	Endpoint('GET', '/api/changes/', {'since': 0}, max_queries=2),
+	Endpoint('GET', '/api/async/clients/', {'limit': 100}, max_queries=2),
+	Endpoint('GET', '/api/async/clients/{client}/', max_queries=2),
+	Endpoint('GET', '/api/async/meetings/', {'client': '{client}'}, max_queries=3),
+	Endpoint('GET', '/api/async/meetings/', {'client': '{client}', 'start': '{start}', 'end': '{end}', 'occurrences': 'true'}, max_queries=5),
+	Endpoint('GET', '/api/async/meetings/{meeting}/', max_queries=2),
+	Endpoint('GET', '/api/async/availability/', {'clients': '{client},{other_client}', 'start': '{start}', 'end': '{end}'}, max_queries=6),
+	Endpoint('GET', '/api/async/changes/', {'since': 0}, max_queries=2),
+	Endpoint('GET', '/admin/api/client/', max_queries=5, admin=True),
+	Endpoint('GET', '/admin/api/meeting/', max_queries=6, admin=True),
+	Endpoint('GET', '/admin/api/meetingseries/', max_queries=6, admin=True),
+]
+
+
+def route_names(patterns=None, namespace=''):
+	"""URL names of every route in scheduler/urls.py, outside the admin site."""
+	from django.urls import URLResolver, get_resolver
+	names = set()
+	for pattern in get_resolver().url_patterns if patterns is None else patterns:
+		if isinstance(pattern, URLResolver):
+			if pattern.namespace != 'admin':
+				names |= route_names(pattern.url_patterns, f'{pattern.namespace}:' if pattern.namespace else namespace)
+		elif pattern.name:
+			names.add(namespace + pattern.name)
+	return names
+
+
+def build_dataset(clients=10, meetings_per_client=20):
+	"""Clients with non-overlapping meetings and a weekly series; returns the ids the `ENDPOINTS` paths use."""
+	from . import occupancy
+	from .models import Client, Meeting, MeetingSeries, SeriesException
+	created = Client.objects.bulk_create([
+		Client(name=f'Client {i}', email=f'client{i}@example.test') for i in range(clients)
+	])
+	start = datetime(2030, 1, 7, tzinfo=timezone.utc)
+	occupancy.add(Meeting.objects.bulk_create([
+		Meeting(
+			client=client, title=f'Meeting {k}',
+			start_time=start + timedelta(hours=3 * k), end_time=start + timedelta(hours=3 * k + 1),
+		)
+		for client in created for k in range(meetings_per_client)
+	], batch_size=5000))
+	first = created[0]
+	# Weekly at 01:30, between the first client's meetings; one occurrence cancelled
+	series = MeetingSeries.objects.create(
+		client=first, title='Weekly', rrule='FREQ=WEEKLY;COUNT=10',
+		start_time=start + timedelta(minutes=90), end_time=start + timedelta(minutes=150),
+	)
+	SeriesException.objects.create(series=series, original_start=series.start_time + timedelta(weeks=1), cancelled=True)
+	return {
+		'client': first.pk,
+		'other_client': created[-1].pk,
+		'meeting': Meeting.objects.filter(client=first).order_by('pk').values_list('pk', flat=True).first(),
+		'series': series.pk,
+		'cancelled': (series.start_time + timedelta(weeks=1)).isoformat(),
+		'occurrence': (series.start_time + timedelta(weeks=2)).isoformat(),
+		'start': start.isoformat(),
+		'end': (start + timedelta(days=7)).isoformat(),
+		'series_end': (start + timedelta(weeks=10)).isoformat(),
+	}
+
+
+def _format(value, ids):
+	if isinstance(value, str):
+		return value.format(**ids)
+	if isinstance(value, list):
+		return [_format(v, ids) for v in value]
+	if isinstance(value, dict):
+		return {k: _format(v, ids) for k, v in value.items()}
+	return value
+
+
+def measure(client, endpoint, ids):
+	"""Send `endpoint` with the test `client`; returns (response, executed SQL, seconds).
+
+	Streamed bodies are read in full, so their queries and time count.
+	DELETE data is sent as the query string.
+	"""
+	from django.test.utils import CaptureQueriesContext
+	path = endpoint.path.format(**ids)
+	data = _format(endpoint.data, ids)
+	if endpoint.method == 'DELETE' and data:
+		path, data = f'{path}?{urlencode(data)}', None
+	send = getattr(client, endpoint.method.lower())
+	kwargs = {} if endpoint.method in ('GET', 'DELETE') else {'format': 'json'}
+	with CaptureQueriesContext(connection) as captured:
+		started = time.perf_counter()
+		response = send(path, data, **kwargs)
+		if response.streaming:
+			b''.join(response.streaming_content)
+		elapsed = time.perf_counter() - started
+	return response, [q['sql'] for q in captured.captured_queries], elapsed
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE)
+
+
+def normalize(sql):
+	"""`sql` with literals, placeholders and IN lists replaced, so near-identical statements compare equal."""
+	sql = _LITERALS.sub('?', sql).replace('%s', '?')
+	return _IN_LISTS.sub('IN (...)', sql)
+
+
+def duplicates(statements, threshold=2):
+	"""Normalized statements run at least `threshold` times, most repeated first."""
+	counts = Counter(normalize(sql) for sql in statements)
+	return [(sql, n) for sql, n in counts.most_common() if n >= threshold]
+
+
+def _instrument_connection(sender, connection, **kwargs):
+	if record_statement not in connection.execute_wrappers:
+		connection.execute_wrappers.append(record_statement)
+
+
+class DuplicateQueryMiddleware:
+	"""Development aid: logs statements repeated within one request (sync and async)."""
+
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		self.threshold = getattr(settings, 'DUPLICATE_QUERY_THRESHOLD', 3)
+		# Only processes using the middleware pay for the wrapper
+		connection_created.connect(_instrument_connection, dispatch_uid='duplicate-query-middleware')
+		for conn in connections.all(initialized_only=True):
+			_instrument_connection(None, conn)
+		self.is_async = iscoroutinefunction(get_response)
+		if self.is_async:
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if self.is_async:
+			return self.__acall__(request)
+		statements = []
+		try:
+			with recording(statements):
+				return self.get_response(request)
+		finally:
+			self.report(request, statements)
+
+	async def __acall__(self, request):
+		statements = []
+		try:
+			with recording(statements):
+				return await self.get_response(request)
+		finally:
+			self.report(request, statements)
+
+	def report(self, request, statements):
+		for sql, count in duplicates(statements, self.threshold):
+			logger.warning(
+				'%s %s ran %d similar queries (%d in total), likely N+1: %s',
+				request.method, request.path, count, len(statements), sql[:300],
+			)
@@ -0,0 +1,278 @@
+"""Recurring meetings: one `MeetingSeries` row, occurrences computed on demand.
+
+A series stores the time of its first occurrence, an RFC 5545 RRULE and
+the time zone it recurs in, so "every Monday 09:00 Europe/Berlin" stays at
+09:00 across DST changes. Occurrences are never stored. They are generated
+lazily with python-dateutil, and only for the window asked for. The only
+per-occurrence rows are `SeriesException`s, which cancel one occurrence or
+override its time, title, location or notes. An occurrence is identified
+by its scheduled start (`original_start`).
+
+Occurrences come out as unsaved `Meeting` instances with two extra
+attributes, `series_id` and `original_start`, so they merge with real
+meetings on `start_time`:
+
+- `occurrences()` merges the occurrences of many series in start order,
+  for `/api/meetings/?occurrences=true` and free/busy.
+- `find_occurrence()` is the overlap probe for a new booking. Each active
+  series of the client produces at most its first occurrence in the
+  window; nothing else is expanded.
+- `series_conflict()` checks a new or rescheduled series against itself,
+  the client's meetings and its other series in one sorted sweep. Series
+  that never end are checked from now (or their start, if later) up to
+  `CHECK_HORIZON` ahead.
+
+Long-running DAILY and WEEKLY rules without COUNT are restarted a whole
+number of periods before the window (`_skip_ahead`), so expanding next
+year's occurrences does not step through every earlier one.
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+from django.db.models import Max, Q
+
+from .models import Meeting, MeetingSeries, SeriesException
+
+FREQUENCIES = {DAILY: 'DAILY', WEEKLY: 'WEEKLY', MONTHLY: 'MONTHLY', YEARLY: 'YEARLY'}
+# Rules with COUNT are stepped through in full to find their end
+MAX_COUNT = 5000
+# How far ahead a series that never ends is checked for overlaps
+CHECK_HORIZON = timedelta(days=2 * 366)
+# dateutil searches up to year 9999 for a rule that never matches (say
+# BYMONTH=2;BYMONTHDAY=30). Rules are tried from this leap year first, so
+# one without an occurrence in 28 years (a full weekday/leap cycle) is
+# rejected after a bounded search.
+PROBE_YEAR = 9972
+
+_by_start = attrgetter('start_time')
+
+
+def parse_rule(text, dtstart):
+	"""The dateutil rule for one RRULE recurring from the aware `dtstart`.
+
+	Raises ValueError unless `text` is a single DAILY, WEEKLY, MONTHLY or
+	YEARLY rule (an `RRULE:` prefix is allowed) with COUNT at most
+	`MAX_COUNT`. UNTIL must be given in UTC (`...Z`).
+	"""
+	body = text.strip()
+	if body.upper().startswith('RRULE:'):
+		body = body[len('RRULE:'):]
+	if not body or ':' in body or '\n' in body:
+		raise ValueError('Expected a single RRULE, e.g. FREQ=WEEKLY;BYDAY=MO; DTSTART is the start_time.')
+	try:
+		rule = rrulestr(body, dtstart=dtstart)
+	except TypeError:
+		raise ValueError('FREQ is required.')
+	if not isinstance(rule, rrule):
+		raise ValueError('Expected a single RRULE.')
+	if rule._freq not in FREQUENCIES:
+		raise ValueError(f'FREQ must be one of {", ".join(FREQUENCIES.values())}.')
+	if rule._interval < 1:
+		raise ValueError('INTERVAL must be at least 1.')
+	if rule._count is not None and rule._count > MAX_COUNT:
+		raise ValueError(f'COUNT is limited to {MAX_COUNT}.')
+	probe = rule.replace(dtstart=dtstart.replace(year=PROBE_YEAR, month=1, day=1), count=None, until=None)
+	if probe.after(probe._dtstart, inc=True) is None:
+		raise ValueError('The rule never produces an occurrence.')
+	return rule
+
+
+def series_rule(series):
+	"""The rule of `series`, in its time zone; cached on the instance until its schedule changes."""
+	key = (series.rrule, series.timezone, series.start_time)
+	cached = getattr(series, '_rule', None)
+	if cached is None or cached[0] != key:
+		tz = ZoneInfo(series.timezone)
+		cached = series._rule = (key, parse_rule(series.rrule, series.start_time.astimezone(tz)))
+	return cached[1]
+
+
+def _skip_ahead(rule, moment):
+	"""`rule`, restarted whole periods later but still before `moment`.
+
+	Only DAILY and WEEKLY rules without COUNT qualify: their occurrences
+	depend on the period they fall in, not on how many came before.
+	"""
+	if rule._count is not None or rule._freq not in (DAILY, WEEKLY):
+		return rule
+	dtstart = rule._dtstart
+	period = rule._interval * (7 if rule._freq == WEEKLY else 1)
+	# A day of slack keeps the new start before `moment` in any offset
+	days = (moment.astimezone(dtstart.tzinfo).date() - dtstart.date()).days - 1
+	periods = days // period
+	if periods <= 0:
+		return rule
+	# Aware arithmetic keeps the wall-clock time of `dtstart`
+	return rule.replace(dtstart=dtstart + timedelta(days=periods * period))
+
+
+def _scheduled(series, start, end):
+	"""UTC (start, end) of the occurrences the rule schedules in `[start, end)`, in order."""
+	duration = series.end_time - series.start_time
+	after = start - duration
+	for occurrence in _skip_ahead(series_rule(series), after).xafter(after, inc=False):
+		if occurrence >= end:
+			return
+		begin = occurrence.astimezone(timezone.utc)
+		yield begin, begin + duration
+
+
+def is_occurrence(series, moment):
+	"""Whether the rule of `series` schedules an occurrence starting at `moment`."""
+	found = _skip_ahead(series_rule(series), moment).after(moment, inc=True)
+	return found is not None and found == moment
+
+
+def first_start(series):
+	"""Start of the first scheduled occurrence of `series`, or None if the rule has none."""
+	rule = series_rule(series)
+	found = rule.after(rule._dtstart, inc=True)
+	return None if found is None else found.astimezone(timezone.utc)
+
+
+def series_end(series, moved=True):
+	"""End of the last occurrence of `series`; None if it never ends.
+
+	With `moved`, occurrences moved by exceptions count too (one query).
+	"""
+	rule = series_rule(series)
+	if rule._count is None and rule._until is None:
+		return None
+	last = None
+	for last in rule if rule._count is not None else _skip_ahead(rule, rule._until):
+		pass
+	end = series.end_time if last is None else last.astimezone(timezone.utc) + (series.end_time - series.start_time)
+	if moved and series.pk is not None:
+		latest = SeriesException.objects.filter(series=series).aggregate(end=Max('end_time'))['end']
+		if latest is not None and latest > end:
+			end = latest
+	return end
+
+
+def refresh_end(series):
+	"""Store `ends_at` again after an occurrence of a bounded series moved or came back."""
+	if series.ends_at is not None:
+		series.ends_at = series_end(series)
+		MeetingSeries.objects.filter(pk=series.pk).update(ends_at=series.ends_at)
+
+
+def _occurrence(series, original_start, start, end, exception=None):
+	meeting = Meeting(
+		client_id=series.client_id,
+		title=exception and exception.title or series.title,
+		start_time=start,
+		end_time=end,
+		location=exception and exception.location or series.location,
+		notes=exception and exception.notes or series.notes,
+		created_at=series.created_at,
+	)
+	if MeetingSeries.client.is_cached(series):
+		meeting.client = series.client
+	meeting.series_id = series.pk
+	meeting.original_start = original_start
+	return meeting
+
+
+def expand(series, start, end, exceptions=()):
+	"""Occurrences of `series` intersecting `[start, end)`, lazily, in start order.
+
+	`exceptions` are `SeriesException` rows of the series. Those scheduled
+	in the window and those moved into it are needed; others are ignored.
+	"""
+	duration = series.end_time - series.start_time
+	changed = {exception.original_start: exception for exception in exceptions}
+	moved = []
+	for original, exception in changed.items():
+		if exception.cancelled:
+			continue
+		begin = exception.start_time or original
+		finish = exception.end_time or original + duration
+		if begin < end and finish > start:
+			moved.append(_occurrence(series, original, begin, finish, exception))
+	moved.sort(key=_by_start)
+
+	def scheduled():
+		for begin, finish in _scheduled(series, start, end):
+			if begin not in changed:
+				yield _occurrence(series, begin, begin, finish)
+
+	return heapq.merge(scheduled(), moved, key=_by_start)
+
+
+def active(queryset, start, end):
+	"""Series of `queryset` that may have occurrences in `[start, end)`."""
+	return queryset.filter(start_time__lt=end).filter(Q(ends_at__isnull=True) | Q(ends_at__gt=start))
+
+
+def _exceptions(series, start, end):
+	"""Exceptions of `series` that change occurrences of `[start, end)`, by series id."""
+	grouped = defaultdict(list)
+	if not series:
+		return grouped
+	longest = max(s.end_time - s.start_time for s in series)
+	rows = SeriesException.objects.filter(series__in=[s.pk for s in series]).filter(
+		Q(original_start__gt=start - longest, original_start__lt=end) | Q(start_time__lt=end, end_time__gt=start)
+	)
+	for exception in rows:
+		grouped[exception.series_id].append(exception)
+	return grouped
+
+
+def occurrences(queryset, start, end):
+	"""Occurrences of every series in `queryset` intersecting `[start, end)`, in start order.
+
+	Two queries (the series, then their exceptions in the window) run on
+	the call; the occurrences themselves are generated as they are read.
+	"""
+	series = list(active(queryset, start, end).select_related('client'))
+	exceptions = _exceptions(series, start, end)
+	return heapq.merge(*(expand(s, start, end, exceptions[s.pk]) for s in series), key=_by_start)
+
+
+def find_occurrence(client, start, end, skip=None):
+	"""An occurrence of a series of `client` overlapping `[start, end)`, or None.
+
+	`skip` is a `(series id, original start)` pair to leave out, the
+	occurrence being moved.
+	"""
+	for occurrence in occurrences(MeetingSeries.objects.filter(client=client), start, end):
+		if skip is None or (occurrence.series_id, occurrence.original_start) != tuple(skip):
+			return occurrence
+	return None
+
+
+def series_conflict(series):
+	"""The first clash of the schedule of `series` with itself or the rest of its client's calendar.
+
+	Returns `(occurrence, other)`, where `other` is a meeting, an occurrence
+	of another series or an earlier occurrence of `series` itself, or None.
+	Exceptions are not applied: a new schedule starts without them.
+	"""
+	start = series.start_time
+	end = series_end(series, moved=False)
+	if end is None:
+		# Open-ended series that started long ago must still be checked ahead
+		start = max(start, datetime.now(timezone.utc))
+		end = start + CHECK_HORIZON
+	others = heapq.merge(
+		Meeting.objects.filter(client_id=series.client_id, start_time__lt=end, end_time__gt=start)
+		.order_by('start_time').only('id', 'title', 'start_time', 'end_time').iterator(),
+		occurrences(MeetingSeries.objects.filter(client_id=series.client_id).exclude(pk=series.pk), start, end),
+		key=_by_start,
+	)
+	# Both sides are sorted and free of overlaps, so a single sweep finds the first clash
+	other = next(others, None)
+	previous = None
+	for occurrence in expand(series, start, end):
+		if previous is not None and previous.end_time > occurrence.start_time:
+			return occurrence, previous
+		previous = occurrence
+		while other is not None and other.end_time <= occurrence.start_time:
+			other = next(others, None)
+		if other is not None and other.start_time < occurrence.end_time:
+			return occurrence, other
+	return None
@@ -0,0 +1,245 @@
+"""Indexed client search: the `search` filter of ClientViewSet and ranked lookups.
+
+Matching is that of DRF's SearchFilter: every term must occur,
+case-insensitively, in the name, email or phone. Only the way rows are
+found changes, through a backend picked per database
+(`CLIENT_SEARCH_BACKEND`, default `auto`):
+
+- `sqlite-fts5`: the `api_client_search` FTS5 trigram index (migration
+  0006), kept in sync with `api_client` by triggers. Terms of three or more
+  characters are looked up in the index. Shorter ones are checked with
+  LIKE on the rows the index returned, or on every row when no term is
+  long enough. Terms too common to be worth the index (`INDEX_PROBE`)
+  are scanned too.
+- `postgres-trgm`: pg_trgm GIN indexes on the three columns (on
+  `UPPER(column::text)`, as Django compiles `icontains`), which serve the
+  lookups directly and rank with `similarity()`.
+- `scan`: plain `icontains` scans, for other databases or a missing index.
+
+`rank()` backs `GET /api/clients/search/`. It returns the best `limit`
+clients for a query, scored by trigram similarity: prefix matches first,
+then other substring matches. With `fuzzy`, when those are fewer than
+`limit`, clients similar enough to be misspellings of the query follow.
+"""
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .models import Client
+
+FIELDS = ('name', 'email', 'phone')
+FTS_TABLE = 'api_client_search'
+# Trigram index lookups need terms at least this long
+MIN_INDEXED = 3
+# Candidates read per stage of rank(), as a multiple of the requested limit (at least 50)
+CANDIDATE_FACTOR = 5
+# Terms matching more clients than this are filtered with LIKE instead: in
+# id order a scan soon finds a page of them, while `id IN (matches)` would
+# first read every match from the index
+INDEX_PROBE = 2000
+PREFIX_BONUS = 1.0
+SUBSTRING_BONUS = 0.5
+# Fuzzy matches below this similarity are dropped (pg_trgm's default threshold)
+MIN_SIMILARITY = 0.3
+
+
+def _trigrams(text):
+	"""pg_trgm-style trigrams: each word padded with two spaces in front and one behind."""
+	grams = set()
+	for word in re.findall(r'\w+', text.lower()):
+		padded = f'  {word} '
+		grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+	return grams
+
+
+def similarity(query, text):
+	"""Shared trigrams over all trigrams of both, as pg_trgm's similarity()."""
+	a, b = _trigrams(query), _trigrams(text)
+	return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _contains_all(terms):
+	"""SearchFilter's condition: every term in at least one field."""
+	return reduce(and_, (reduce(or_, (Q(**{f'{field}__icontains': term}) for field in FIELDS)) for term in terms))
+
+
+def _fts_phrase(text):
+	return '"' + text.replace('"', '""') + '"'
+
+
+class ScanBackend:
+	"""No index: `icontains` scans, and rank() only finds prefix and substring matches."""
+	name = 'scan'
+
+	def __init__(self, using):
+		self.using = using
+
+	def filter(self, queryset, terms):
+		return queryset.filter(_contains_all(terms))
+
+	def candidates(self, query, terms, pool):
+		"""Up to `pool` ids per stage, best stages first: [(bonus, ids), ...]."""
+		prefix = Q(name__istartswith=query) | Q(email__istartswith=query)
+		contains = Client.objects.using(self.using).filter(_contains_all(terms))
+		return [
+			(PREFIX_BONUS, list(contains.filter(prefix).values_list('pk', flat=True)[:pool])),
+			(SUBSTRING_BONUS, list(contains.values_list('pk', flat=True)[:pool])),
+		]
+
+	def near(self, query, terms, pool):
+		"""Ids of possible misspellings of `terms`, as [(bonus, ids)]."""
+		return []
+
+	def rank(self, query, limit=10, fuzzy=True):
+		"""[(client, score), ...], best first."""
+		terms = query.split()
+		if not terms:
+			return []
+		pool = max(limit * CANDIDATE_FACTOR, 50)
+		stages = self.candidates(query, terms, pool)
+		bonuses = {}
+		for bonus, ids in stages:
+			for pk in ids:
+				bonuses.setdefault(pk, bonus)
+		if fuzzy and len(bonuses) < limit:
+			for bonus, ids in self.near(query, terms, pool):
+				for pk in ids:
+					bonuses.setdefault(pk, bonus)
+		scored = []
+		for client in Client.objects.using(self.using).filter(pk__in=list(bonuses)):
+			score = max(similarity(query, getattr(client, field)) for field in FIELDS)
+			bonus = bonuses[client.pk]
+			if bonus or score >= MIN_SIMILARITY:
+				scored.append((client, round(bonus + score, 4)))
+		scored.sort(key=lambda item: (-item[1], item[0].pk))
+		return scored[:limit]
+
+
+class SQLiteFTSBackend(ScanBackend):
+	name = 'sqlite-fts5'
+
+	def _rowids(self, expression, limit):
+		with connections[self.using].cursor() as cursor:
+			cursor.execute(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s', [expression, limit])
+			return [row[0] for row in cursor.fetchall()]
+
+	def _stages(self, expressions, pool):
+		"""Up to `pool` rowids for each (bonus, expression), in one statement."""
+		select = f'SELECT * FROM (SELECT %s, rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)'
+		stages = {bonus: [] for bonus, _ in expressions}
+		with connections[self.using].cursor() as cursor:
+			cursor.execute(' UNION ALL '.join([select] * len(expressions)), [p for e in expressions for p in (*e, pool)])
+			for bonus, rowid in cursor.fetchall():
+				stages[bonus].append(rowid)
+		return list(stages.items())
+
+	def filter(self, queryset, terms):
+		indexed = [t for t in terms if len(t) >= MIN_INDEXED]
+		if not indexed:
+			return super().filter(queryset, terms)
+		expression = ' AND '.join(_fts_phrase(t) for t in indexed)
+		with connections[self.using].cursor() as cursor:
+			cursor.execute(
+				f'SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)',
+				[expression, INDEX_PROBE + 1],
+			)
+			if cursor.fetchone()[0] > INDEX_PROBE:
+				return super().filter(queryset, terms)
+		short = [t for t in terms if len(t) < MIN_INDEXED]
+		queryset = queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]))
+		return queryset.filter(_contains_all(short)) if short else queryset
+
+	def candidates(self, query, terms, pool):
+		if all(len(t) < MIN_INDEXED for t in terms):
+			return super().candidates(query, terms, pool)
+		# `^`: the phrase starts the column
+		prefix = (PREFIX_BONUS, f'{{name email}} : ^ {_fts_phrase(query)}')
+		if all(len(t) >= MIN_INDEXED for t in terms):
+			return self._stages([prefix, (SUBSTRING_BONUS, ' AND '.join(_fts_phrase(t) for t in terms))], pool)
+		contains = self.filter(Client.objects.using(self.using), terms)
+		return [*self._stages([prefix], pool), (SUBSTRING_BONUS, list(contains.values_list('pk', flat=True)[:pool]))]
+
+	def near(self, query, terms, pool):
+		# One typo leaves the first or the last half of a word intact
+		pieces = set()
+		for term in terms:
+			if len(term) >= MIN_INDEXED:
+				n = max(len(term) // 2, MIN_INDEXED)
+				pieces.update((term[:n], term[-n:]))
+		if not pieces:
+			return []
+		return [(0.0, self._rowids(' OR '.join(_fts_phrase(p) for p in sorted(pieces)), pool))]
+
+
+class PostgresTrigramBackend(ScanBackend):
+	"""`icontains` and similarity() are both served by the pg_trgm GIN indexes."""
+	name = 'postgres-trgm'
+
+	def rank(self, query, limit=10, fuzzy=True):
+		terms = query.split()
+		if not terms:
+			return []
+		matched = _contains_all(terms)
+		if fuzzy:
+			# `%` is pg_trgm's "similar" operator (case-insensitive), answered
+			# from the GIN indexes of the migration
+			matched |= Q(pk__in=RawSQL(
+				'SELECT id FROM api_client WHERE UPPER(name::text) %% UPPER(%s) OR UPPER(email::text) %% UPPER(%s)', [query, query],
+			))
+		queryset = Client.objects.using(self.using).filter(matched)
+		similar = RawSQL(
+			'GREATEST(similarity(name, %s), similarity(email, %s), similarity(phone, %s))', [query] * 3,
+			output_field=FloatField(),
+		)
+		bonus = Case(
+			When(Q(name__istartswith=query) | Q(email__istartswith=query), then=Value(PREFIX_BONUS)),
+			When(_contains_all(terms), then=Value(SUBSTRING_BONUS)),
+			default=Value(0.0),
+		)
+		score = similar + bonus
+		ranked = queryset.annotate(score=score).order_by('-score', 'pk')[:limit]
+		return [(client, round(client.score, 4)) for client in ranked]
+
+
+BACKENDS = {backend.name: backend for backend in (ScanBackend, SQLiteFTSBackend, PostgresTrigramBackend)}
+_detected = {}
+
+
+def _detect(connection):
+	if connection.vendor == 'sqlite':
+		with connection.cursor() as cursor:
+			cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+			return SQLiteFTSBackend if cursor.fetchone() else ScanBackend
+	if connection.vendor == 'postgresql':
+		with connection.cursor() as cursor:
+			cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+			return PostgresTrigramBackend if cursor.fetchone() else ScanBackend
+	return ScanBackend
+
+
+def get_backend(using='default'):
+	choice = getattr(settings, 'CLIENT_SEARCH_BACKEND', 'auto')
+	if choice != 'auto':
+		return BACKENDS[choice](using)
+	connection = connections[using]
+	# Keyed by database name too: tests switch `default` to a test database
+	key = (using, connection.settings_dict['NAME'])
+	if key not in _detected:
+		_detected[key] = _detect(connection)
+	return _detected[key](using)
+
+
+class ClientSearchFilter(SearchFilter):
+	"""SearchFilter with the same `search` parameter and matches, looked up through `get_backend()`."""
+
+	def filter_queryset(self, request, queryset, view):
+		terms = self.get_search_terms(request)
+		if not terms:
+			return queryset
+		return get_backend(queryset.db).filter(queryset, terms)
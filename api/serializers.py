@@ -1,16 +1,46 @@
+from datetime import time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import IntegrityError
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from .models import Client, Meeting
+from . import recurrence
+from .availability import WEEKDAYS
+from .booking import client_lock
+from .models import Change, Client, Meeting, MeetingSeries, SeriesException
+from .overlap import has_overlap
+
+OVERLAP_MESSAGE = 'Client already has a meeting in this time range'
+
+
+class SparseFieldsMixin:
+    """Serializer trimmed to the `fields` kwarg (see api/fieldsets.py).
+
+    Nested fields listed in `expandable_fields` (relation -> field name)
+    are kept only when named in `fields` or their relation is in `expand`.
+    Without `fields` the serializer is unchanged.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        keep = set(fields) | {self.expandable_fields[relation] for relation in expand}
+        for name in [name for name in self.fields if name not in keep]:
+            self.fields.pop(name)
 
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = ['id', 'name', 'email', 'phone', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class MeetingSerializer(serializers.ModelSerializer):
+class MeetingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     client_detail = ClientSerializer(source='client', read_only=True)
+    expandable_fields = {'client': 'client_detail'}
 
     class Meta:
         model = Meeting
@@ -28,9 +58,389 @@ class MeetingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'end_time': 'end_time must be after start_time'})
 
         if start and end and client:
-            qs = Meeting.objects.filter(client=client)
-            if self.instance:
-                qs = qs.exclude(pk=self.instance.pk)
-            if Meeting.overlaps(qs, start, end):
-                raise serializers.ValidationError('Client already has a meeting in this time range')
-        return attrs
\ No newline at end of file
+            self._check_overlap(client, start, end)
+        return attrs
+
+    def _check_overlap(self, client, start, end):
+        exclude_pk = self.instance.pk if self.instance else None
+        if has_overlap(client, start, end, exclude_pk=exclude_pk):
+            raise serializers.ValidationError(OVERLAP_MESSAGE)
+
+    def _save_locked(self, save, client, start, end):
+        # validate() ran without a lock; repeat the check while holding the
+        # client's booking lock so concurrent requests cannot both insert.
+        try:
+            with client_lock(client.pk):
+                self._check_overlap(client, start, end)
+                return save()
+        except IntegrityError as exc:
+            if 'meeting_no_overlap' in str(exc):
+                raise serializers.ValidationError(OVERLAP_MESSAGE)
+            raise
+
+    def create(self, validated_data):
+        return self._save_locked(
+            lambda: super(MeetingSerializer, self).create(validated_data),
+            validated_data['client'], validated_data['start_time'], validated_data['end_time'],
+        )
+
+    def update(self, instance, validated_data):
+        return self._save_locked(
+            lambda: super(MeetingSerializer, self).update(instance, validated_data),
+            validated_data.get('client', instance.client),
+            validated_data.get('start_time', instance.start_time),
+            validated_data.get('end_time', instance.end_time),
+        )
+
+
+class ClientBulkItemSerializer(ClientSerializer):
+    """One item of `POST /api/clients/bulk/`.
+
+    Email uniqueness is checked for the whole batch in `api/bulk.py`
+    instead of by a per-item `UniqueValidator` query.
+    """
+    class Meta(ClientSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+
+class MeetingBulkItemSerializer(MeetingSerializer):
+    """One item of `POST /api/meetings/bulk/`.
+
+    Only field-level checks run here; client existence and overlaps are
+    resolved for the whole batch in `api/bulk.py`.
+    """
+    client = serializers.IntegerField()
+    client_detail = None
+
+    class Meta(MeetingSerializer.Meta):
+        fields = ['client', 'title', 'start_time', 'end_time', 'location', 'notes']
+        read_only_fields = []
+
+    def _check_overlap(self, client, start, end):
+        pass
+
+
+class MeetingOccurrenceSerializer(MeetingSerializer):
+    """A meeting or, when `series` is set, an occurrence of a recurring series (with a null `id`)."""
+    series = serializers.SerializerMethodField()
+    original_start = serializers.SerializerMethodField()
+
+    class Meta(MeetingSerializer.Meta):
+        fields = [*MeetingSerializer.Meta.fields, 'series', 'original_start']
+
+    @extend_schema_field(serializers.IntegerField(allow_null=True))
+    def get_series(self, obj):
+        return getattr(obj, 'series_id', None)
+
+    @extend_schema_field(serializers.DateTimeField(allow_null=True))
+    def get_original_start(self, obj):
+        original = getattr(obj, 'original_start', None)
+        return None if original is None else serializers.DateTimeField().to_representation(original)
+
+
+class OccurrenceQuerySerializer(serializers.Serializer):
+    """Window of `GET /api/series/{id}/occurrences/` and `GET /api/meetings/?occurrences=true`."""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    limit = serializers.IntegerField(min_value=1, max_value=5000, default=1000, help_text='Stop after this many items')
+
+    MAX_WINDOW = timedelta(days=366)
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': 'end must be after start'})
+        if attrs['end'] - attrs['start'] > self.MAX_WINDOW:
+            raise serializers.ValidationError({'end': f'Window is limited to {self.MAX_WINDOW.days} days'})
+        return attrs
+
+
+def _occurrence_times(series, attrs):
+    original = attrs['original_start']
+    if attrs.get('start_time') is not None:
+        return attrs['start_time'], attrs['end_time']
+    return original, original + (series.end_time - series.start_time)
+
+
+class SeriesExceptionSerializer(serializers.ModelSerializer):
+    """Cancels or overrides the occurrence of a series scheduled at `original_start`.
+
+    Needs the series as `context['series']`. Saving replaces any earlier
+    exception for the same occurrence (see `upsert`).
+    """
+    class Meta:
+        model = SeriesException
+        fields = ['original_start', 'cancelled', 'start_time', 'end_time', 'title', 'location', 'notes']
+        extra_kwargs = {
+            'start_time': {'help_text': 'New start of a moved occurrence, with end_time'},
+            'title': {'help_text': "Empty keeps the series' title; likewise location and notes"},
+        }
+
+    def validate(self, attrs):
+        series = self.context['series']
+        if not recurrence.is_occurrence(series, attrs['original_start']):
+            raise serializers.ValidationError({'original_start': 'Not a scheduled occurrence of this series'})
+        start, end = attrs.get('start_time'), attrs.get('end_time')
+        if (start is None) != (end is None):
+            raise serializers.ValidationError({'end_time': 'start_time and end_time move an occurrence together'})
+        if start is not None:
+            if end <= start:
+                raise serializers.ValidationError({'end_time': 'end_time must be after start_time'})
+            if start < series.start_time:
+                raise serializers.ValidationError({'start_time': 'An occurrence cannot move before the start of its series'})
+        if not attrs.get('cancelled'):
+            self._check_overlap(series, attrs)
+        return attrs
+
+    @staticmethod
+    def _check_overlap(series, attrs):
+        start, end = _occurrence_times(series, attrs)
+        if has_overlap(series.client, start, end, skip_occurrence=(series.pk, attrs['original_start'])):
+            raise serializers.ValidationError(OVERLAP_MESSAGE)
+
+    def upsert(self):
+        """Save the exception under the client's booking lock; returns (exception, created)."""
+        series = self.context['series']
+        data = self.validated_data
+        defaults = {
+            name: data.get(name, SeriesException._meta.get_field(name).get_default())
+            for name in self.Meta.fields if name != 'original_start'
+        }
+        with client_lock(series.client_id):
+            if not data.get('cancelled'):
+                self._check_overlap(series, data)
+            self.instance, created = SeriesException.objects.update_or_create(
+                series=series, original_start=data['original_start'], defaults=defaults,
+            )
+            recurrence.refresh_end(series)
+        return self.instance, created
+
+    @classmethod
+    def restore(cls, series, exception):
+        """Delete `exception`, putting its occurrence back at the scheduled time."""
+        with client_lock(series.client_id):
+            cls._check_overlap(series, {'original_start': exception.original_start})
+            exception.delete()
+            recurrence.refresh_end(series)
+
+
+class MeetingSeriesSerializer(serializers.ModelSerializer):
+    """A recurring meeting. Changing its schedule drops its exceptions."""
+    exceptions = SeriesExceptionSerializer(many=True, read_only=True)
+
+    SCHEDULE_FIELDS = ['client', 'start_time', 'end_time', 'rrule', 'timezone']
+
+    class Meta:
+        model = MeetingSeries
+        fields = [
+            'id', 'client', 'title', 'start_time', 'end_time', 'rrule', 'timezone',
+            'location', 'notes', 'ends_at', 'exceptions', 'created_at'
+        ]
+        read_only_fields = ['id', 'ends_at', 'exceptions', 'created_at']
+        extra_kwargs = {
+            'start_time': {'help_text': 'Start of the first occurrence; also the DTSTART of the rule'},
+            'rrule': {'help_text': 'RFC 5545 RRULE without DTSTART, e.g. FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20301231T000000Z'},
+            'timezone': {'help_text': 'IANA time zone the rule recurs in (wall-clock times are kept across DST)'},
+        }
+
+    def validate_start_time(self, value):
+        # Rule occurrences have whole seconds
+        return value.replace(microsecond=0)
+
+    def validate_end_time(self, value):
+        return value.replace(microsecond=0)
+
+    def validate_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f'Unknown time zone: {value}')
+        return value
+
+    def validate(self, attrs):
+        schedule = self._schedule(attrs)
+        if schedule['end_time'] <= schedule['start_time']:
+            raise serializers.ValidationError({'end_time': 'end_time must be after start_time'})
+        self.rescheduled = self.instance is None or any(
+            schedule[name] != getattr(self.instance, name) for name in self.SCHEDULE_FIELDS
+        )
+        if self.rescheduled:
+            candidate = MeetingSeries(**schedule)
+            try:
+                first = recurrence.first_start(candidate)
+            except ValueError as exc:
+                raise serializers.ValidationError({'rrule': [str(exc)]})
+            if first is None:
+                raise serializers.ValidationError({'rrule': ['The rule has no occurrence from start_time on']})
+            self._check_overlap(candidate)
+        return attrs
+
+    def _schedule(self, attrs):
+        schedule = {name: attrs.get(name, getattr(self.instance, name, None)) for name in self.SCHEDULE_FIELDS}
+        schedule['timezone'] = schedule['timezone'] or 'UTC'
+        schedule['pk'] = getattr(self.instance, 'pk', None)
+        return schedule
+
+    def _check_overlap(self, candidate):
+        clash = recurrence.series_conflict(candidate)
+        if clash is None:
+            return
+        occurrence, other = clash
+        when = serializers.DateTimeField().to_representation(occurrence.start_time)
+        if getattr(other, 'series_id', False) == candidate.pk:
+            raise serializers.ValidationError(f'Occurrences of the series overlap each other (at {when})')
+        raise serializers.ValidationError(f'{OVERLAP_MESSAGE} (occurrence at {when})')
+
+    def create(self, validated_data):
+        # Repeat the check under the booking lock, as MeetingSerializer does
+        with client_lock(validated_data['client'].pk):
+            self._check_overlap(MeetingSeries(**self._schedule(validated_data)))
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if not self.rescheduled:
+            return super().update(instance, validated_data)
+        schedule = self._schedule(validated_data)
+        with client_lock(schedule['client'].pk):
+            self._check_overlap(MeetingSeries(**schedule))
+            # They name occurrences of the old schedule
+            instance.exceptions.all().delete()
+            return super().update(instance, validated_data)
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """Query parameters of `GET /api/availability/`."""
+    clients = serializers.CharField(help_text='Comma-separated client ids (max 1000); slots are free for all of them')
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    duration = serializers.IntegerField(min_value=1, max_value=24 * 60, default=30, help_text='Slot length in minutes')
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=5, help_text='Number of slots to return')
+    step = serializers.IntegerField(min_value=5, max_value=24 * 60, required=False, help_text='Minutes between consecutive slots of one gap (default: duration)')
+    work_start = serializers.TimeField(default=time(9))
+    work_end = serializers.TimeField(default=time(17), help_text='Before or equal to work_start means the next day; 00:00-00:00 is the whole day')
+    days = serializers.CharField(default='mon,tue,wed,thu,fri', help_text='Comma-separated weekdays (mon..sun) or "all"')
+    tz = serializers.CharField(default='UTC', help_text='IANA time zone for working hours')
+    busy = serializers.BooleanField(default=False, help_text='Also return the merged busy blocks of the window')
+
+    MAX_CLIENTS = 1000
+    MAX_WINDOW = timedelta(days=92)
+
+    def validate_clients(self, value):
+        try:
+            ids = sorted({int(part) for part in value.split(',') if part.strip()})
+        except ValueError:
+            raise serializers.ValidationError('Expected comma-separated integer ids.')
+        if not ids:
+            raise serializers.ValidationError('At least one client id is required.')
+        if len(ids) > self.MAX_CLIENTS:
+            raise serializers.ValidationError(f'At most {self.MAX_CLIENTS} clients.')
+        return ids
+
+    def validate_days(self, value):
+        if value.strip().lower() == 'all':
+            return list(range(7))
+        days = [d.strip().lower()[:3] for d in value.split(',') if d.strip()]
+        unknown = [d for d in days if d not in WEEKDAYS]
+        if unknown or not days:
+            raise serializers.ValidationError(f'Unknown weekday(s): {", ".join(unknown) or value}')
+        return sorted({WEEKDAYS.index(d) for d in days})
+
+    def validate_tz(self, value):
+        try:
+            return ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f'Unknown time zone: {value}')
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': 'end must be after start'})
+        if attrs['end'] - attrs['start'] > self.MAX_WINDOW:
+            raise serializers.ValidationError({'end': f'Window is limited to {self.MAX_WINDOW.days} days'})
+        return attrs
+
+
+class TimeRangeSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+
+class AvailabilitySerializer(serializers.Serializer):
+    """Body of `GET /api/availability/` (documentation only; the view builds it directly)."""
+    clients = serializers.ListField(child=serializers.IntegerField())
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    duration = serializers.IntegerField(help_text='Slot length in minutes')
+    slots = TimeRangeSerializer(many=True, help_text='Free for every client, earliest first')
+    busy = TimeRangeSerializer(many=True, required=False, help_text='Merged busy blocks of the window; only with busy=true')
+
+
+class ClientSearchQuerySerializer(serializers.Serializer):
+    """Query parameters of `GET /api/clients/search/`."""
+    q = serializers.CharField(max_length=200, help_text='Text to look for in name, email and phone')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10, help_text='Number of clients to return')
+    fuzzy = serializers.BooleanField(default=True, help_text='Also return near matches (misspellings) when exact ones run short')
+
+
+class ClientMatchSerializer(ClientSerializer):
+    score = serializers.FloatField(read_only=True, help_text='Trigram similarity, plus 1 for a prefix and 0.5 for a substring match')
+
+    class Meta(ClientSerializer.Meta):
+        fields = [*ClientSerializer.Meta.fields, 'score']
+
+
+class OccupancyQuerySerializer(serializers.Serializer):
+    """Query parameters of `GET /api/clients/{id}/occupancy/`."""
+    start = serializers.DateField(help_text='First UTC day')
+    end = serializers.DateField(help_text='Last UTC day (inclusive)')
+
+    MAX_DAYS = 366
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': 'end must not be before start'})
+        if (attrs['end'] - attrs['start']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({'end': f'At most {self.MAX_DAYS} days'})
+        return attrs
+
+
+class OccupancyDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    meetings = serializers.IntegerField(help_text='Meetings and series occurrences touching the day')
+    busy_minutes = serializers.SerializerMethodField(help_text='Meeting time falling on the day')
+
+    def get_busy_minutes(self, day) -> float:
+        return round(day['busy_seconds'] / 60, 2)
+
+
+class OccupancySerializer(serializers.Serializer):
+    """Per-day meeting counts and busy time of one client, with totals over the days."""
+    client = serializers.IntegerField()
+    start = serializers.DateField()
+    end = serializers.DateField()
+    meetings = serializers.IntegerField(help_text='Sum over the days; a meeting spanning midnight counts on both')
+    busy_minutes = serializers.SerializerMethodField()
+    days = OccupancyDaySerializer(many=True)
+
+    def get_busy_minutes(self, summary) -> float:
+        return round(sum(day['busy_seconds'] for day in summary['days']) / 60, 2)
+
+
+class ChangeQuerySerializer(serializers.Serializer):
+    """Query parameters of `GET /api/changes/`."""
+    since = serializers.IntegerField(min_value=0, required=False, help_text='Last seq already applied; omit to start from now')
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100, help_text='Entries per response')
+    wait = serializers.FloatField(min_value=0, max_value=30, default=0, help_text='Seconds to wait for a new entry when there is none')
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    client = serializers.IntegerField(source='client_id', allow_null=True, help_text='Client the object belongs to')
+    data = serializers.JSONField(allow_null=True, help_text='Fields of the object after the write; null when deleted')
+
+    class Meta:
+        model = Change
+        fields = ['seq', 'resource', 'action', 'object_id', 'client', 'data', 'created_at']
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    changes = ChangeSerializer(many=True)
+    next = serializers.IntegerField(help_text='`since` of the next request')
+    reset = serializers.BooleanField(help_text='Entries after `since` were pruned: reload everything, then follow from `next`')
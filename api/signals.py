@@ -0,0 +1,83 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import changes, occupancy, versions
+from .models import Client, Meeting, MeetingSeries, SeriesException
+
+
+@receiver(post_save, sender=Client)
+def client_changed(sender, instance, created, **kwargs):
+	versions.bump([versions.CLIENT])
+	changes.record('client', 'created' if created else 'updated', instance, using=kwargs['using'])
+
+
+@receiver(post_delete, sender=Client)
+def client_deleted(sender, instance, **kwargs):
+	# Also covers the client's meetings, deleted with it (see meeting_changed)
+	versions.bump([versions.CLIENT, *versions.meeting_scopes([instance.pk])])
+	changes.record('client', 'deleted', instance, using=kwargs['using'])
+
+
+def _cascaded_from(origin, *models):
+	return origin is not None and getattr(origin, 'model', type(origin)) in models
+
+
+@receiver(pre_save, sender=Meeting)
+@receiver(pre_save, sender=MeetingSeries)
+def remember_meeting_client(sender, instance, **kwargs):
+	# A meeting moved to another client changes both clients' lists, and
+	# its previous times come off the occupancy rows
+	if instance.pk is not None:
+		previous = sender.objects.filter(pk=instance.pk).values_list('client_id', 'start_time', 'end_time').first()
+		instance._previous_client_id = previous and previous[0]
+		instance._previous_times = previous
+
+
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+@receiver(post_save, sender=MeetingSeries)
+@receiver(post_delete, sender=MeetingSeries)
+def meeting_changed(sender, instance, **kwargs):
+	# A series changes the meeting lists it expands into
+	if _cascaded_from(kwargs.get('origin'), Client):
+		# One bump per deleted client instead of one per meeting
+		return
+	client_ids = {instance.client_id}
+	previous = getattr(instance, '_previous_client_id', None)
+	if previous is not None:
+		client_ids.add(previous)
+	versions.bump(versions.meeting_scopes(client_ids))
+	if 'created' in kwargs:
+		action = 'created' if kwargs['created'] else 'updated'
+	else:
+		action = 'deleted'
+	changes.record('meeting' if sender is Meeting else 'series', action, instance, using=kwargs['using'])
+
+
+@receiver(post_save, sender=Meeting)
+def meeting_saved_occupancy(sender, instance, **kwargs):
+	occupancy.move(
+		getattr(instance, '_previous_times', None), (instance.client_id, instance.start_time, instance.end_time),
+		using=kwargs['using'],
+	)
+
+
+@receiver(post_delete, sender=Meeting)
+def meeting_deleted_occupancy(sender, instance, **kwargs):
+	if _cascaded_from(kwargs.get('origin'), Client):
+		# The client's occupancy rows are deleted with it
+		return
+	occupancy.move((instance.client_id, instance.start_time, instance.end_time), None, using=kwargs['using'])
+
+
+@receiver(post_save, sender=SeriesException)
+@receiver(post_delete, sender=SeriesException)
+def series_exception_changed(sender, instance, **kwargs):
+	origin = kwargs.get('origin')
+	# Deleted with their series or client, or dropped in bulk by a
+	# rescheduled series, whose own save bumps the same scopes
+	if _cascaded_from(origin, Client, MeetingSeries) or isinstance(origin, QuerySet):
+		return
+	versions.bump(versions.meeting_scopes([instance.series.client_id]))
+	changes.record('series', 'updated', instance.series, using=kwargs['using'])
@@ -0,0 +1,36 @@
+"""Per-request record of executed SQL, for the repeated-query check.
+
+`DuplicateQueryMiddleware` (api/querybudget.py) installs `record_statement`
+as an execute wrapper and collects a request's statements inside
+`recording()`. Code that polls the database on purpose, like the change
+feed's long-poll (api/changes.py), runs its loop inside `unrecorded()`
+so the repeated statements are not reported as an N+1.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_statements = ContextVar('request_statements', default=None)
+
+
+def record_statement(execute, sql, params, many, context):
+	statements = _statements.get()
+	if statements is not None:
+		statements.append(sql)
+	return execute(sql, params, many, context)
+
+
+@contextmanager
+def recording(statements):
+	"""Append the SQL of every statement run in the block to `statements`."""
+	token = _statements.set(statements)
+	try:
+		yield statements
+	finally:
+		_statements.reset(token)
+
+
+@contextmanager
+def unrecorded():
+	"""Leave the block's statements out of the repeated-query check, for polling loops."""
+	with recording(None):
+		yield
@@ -1,8 +1,17 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
+from rest_framework.response import Response
 from rest_framework.test import APIClient
 from rest_framework import status
 from .models import Client, Meeting
+from .overlap import has_overlap
 from datetime import datetime, timedelta, timezone
 
 
@@ -44,4 +53,1282 @@ class APITest(TestCase):
 		self.assertEqual(r4.status_code, status.HTTP_200_OK)
 		self.assertEqual(len(r4.data), 1)
 
+	def test_keyset_pagination(self):
+		c = Client.objects.create(name='Pager', email='pager@example.test')
+		base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		# Two meetings share a start_time so the id tie-breaker is exercised
+		starts = [base, base + timedelta(hours=1), base + timedelta(hours=1), base + timedelta(hours=2), base + timedelta(hours=3)]
+		other = Client.objects.create(name='Other', email='other@example.test')
+		for i, start in enumerate(starts):
+			Meeting.objects.create(client=c if i != 2 else other, title=f'M{i}', start_time=start, end_time=start + timedelta(minutes=30))
+
+		seen = []
+		url = '/api/meetings/?limit=2'
+		while url:
+			r = self.client_api.get(url)
+			self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+			self.assertLessEqual(len(r.data['results']), 2)
+			seen.extend(m['title'] for m in r.data['results'])
+			url = r.data['next']
+		self.assertEqual(seen, ['M0', 'M1', 'M2', 'M3', 'M4'])
+
+		r = self.client_api.get('/api/meetings/?limit=3&ordering=-start_time')
+		self.assertEqual([m['title'] for m in r.data['results']], ['M4', 'M3', 'M2'])
+		r = self.client_api.get('/api/meetings/', {'limit': 3, 'ordering': '-start_time', 'cursor': r.data['next_cursor']})
+		self.assertEqual([m['title'] for m in r.data['results']], ['M1', 'M0'])
+		self.assertIsNone(r.data['next_cursor'])
+
+		# Cursors are bound to the ordering they were issued for
+		first = self.client_api.get('/api/clients/?limit=1')
+		self.assertEqual(len(first.data['results']), 1)
+		r = self.client_api.get('/api/clients/', {'ordering': 'name', 'cursor': first.data['next_cursor']})
+		self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_overlap_probe(self):
+		c = Client.objects.create(name='Busy', email='busy@example.test')
+		base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		for h in (0, 2, 4):
+			Meeting.objects.create(client=c, title=f'h{h}', start_time=base + timedelta(hours=h), end_time=base + timedelta(hours=h + 1))
+		m = Meeting.objects.get(title='h2')
+
+		# Back-to-back windows are free; anything inside or spanning a meeting is not
+		self.assertFalse(has_overlap(c, base + timedelta(hours=1), base + timedelta(hours=2)))
+		self.assertTrue(has_overlap(c, base + timedelta(minutes=30), base + timedelta(minutes=90)))
+		self.assertTrue(has_overlap(c, base + timedelta(hours=2, minutes=15), base + timedelta(hours=2, minutes=45)))
+		self.assertTrue(has_overlap(c, base - timedelta(hours=1), base + timedelta(hours=6)))
+		self.assertFalse(has_overlap(c, base + timedelta(hours=5), base + timedelta(hours=6)))
+
+		# Updating a meeting does not conflict with itself
+		r = self.client_api.patch(f'/api/meetings/{m.pk}/', {'end_time': (base + timedelta(hours=3, minutes=30)).isoformat()}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		r = self.client_api.patch(f'/api/meetings/{m.pk}/', {'end_time': (base + timedelta(hours=4, minutes=30)).isoformat()}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkCreateTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+
+	def test_bulk_clients(self):
+		Client.objects.create(name='Existing', email='taken@example.test')
+		r = self.client_api.post('/api/clients/bulk/', [
+			{'name': 'A', 'email': 'a@example.test'},
+			{'name': 'B', 'email': 'taken@example.test'},
+			{'name': 'C', 'email': 'a@example.test'},
+			{'name': 'D', 'email': 'not-an-email'},
+			{'name': 'E', 'email': 'e@example.test', 'phone': '+1'},
+		], format='json')
+		self.assertEqual(r.status_code, status.HTTP_207_MULTI_STATUS, r.content)
+		self.assertEqual([x['status'] for x in r.data['results']], ['created', 'error', 'error', 'error', 'created'])
+		self.assertIn('email', r.data['results'][1]['errors'])
+		self.assertEqual(Client.objects.count(), 3)
+
+	def test_bulk_meetings(self):
+		a = Client.objects.create(name='A', email='a@example.test')
+		b = Client.objects.create(name='B', email='b@example.test')
+		base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		Meeting.objects.create(client=a, title='existing', start_time=base, end_time=base + timedelta(hours=1))
+		Meeting.objects.create(client=b, title='evening', start_time=base + timedelta(hours=8), end_time=base + timedelta(hours=9))
+
+		def item(client, title, start_h, end_h):
+			return {
+				'client': client, 'title': title,
+				'start_time': (base + timedelta(hours=start_h)).isoformat(),
+				'end_time': (base + timedelta(hours=end_h)).isoformat(),
+			}
+
+		# Includes the single UPDATE bumping the ETag version counters, one
+		# lookup of the clients' recurring series, one occupancy upsert and
+		# one INSERT of change feed entries
+		with self.assertNumQueries(10):
+			r = self.client_api.post('/api/meetings/bulk/', [
+				item(a.pk, 'clashes with existing', 0.5, 1.5),
+				item(a.pk, 'ok', 1, 2),
+				item(a.pk, 'clashes with item 1', 1.5, 3),
+				item(b.pk, 'other client same time', 1, 2),
+				item(9999, 'unknown client', 1, 2),
+				item(b.pk, 'bad window', 3, 2),
+				item(a.pk, 'ok later', 2, 3),
+			], format='json')
+		self.assertEqual(r.status_code, status.HTTP_207_MULTI_STATUS, r.content)
+		statuses = [x['status'] for x in r.data['results']]
+		self.assertEqual(statuses, ['error', 'created', 'error', 'created', 'error', 'error', 'created'])
+		self.assertEqual(r.data['created'], 3)
+		self.assertEqual(r.data['results'][1]['data']['client_detail']['email'], 'a@example.test')
+		self.assertEqual(Meeting.objects.filter(client=a).count(), 3)
+
+		r = self.client_api.post('/api/meetings/bulk/', [item(a.pk, 'dup', 1, 2)], format='json')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		r = self.client_api.post('/api/meetings/bulk/', {'not': 'a list'}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		self.a = Client.objects.create(name='A', email='a@example.test')
+		self.b = Client.objects.create(name='B', email='b@example.test')
+		self.base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		self.meeting = Meeting.objects.create(client=self.a, title='m', start_time=self.base, end_time=self.base + timedelta(hours=1))
+
+	def revalidate(self, url, etag):
+		return self.client_api.get(url, HTTP_IF_NONE_MATCH=etag)
+
+	def test_not_modified_until_write(self):
+		url = '/api/clients/'
+		r = self.client_api.get(url)
+		etag = r['ETag']
+		self.assertTrue(etag.startswith('W/"'))
+		with self.assertNumQueries(1):
+			r = self.revalidate(url, etag)
+		self.assertEqual(r.status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(r['ETag'], etag)
+		self.assertEqual(self.revalidate(url + '?ordering=name', etag).status_code, status.HTTP_200_OK)
+
+		self.client_api.patch(f'/api/clients/{self.a.pk}/', {'phone': '123'}, format='json')
+		r = self.revalidate(url, etag)
+		self.assertEqual(r.status_code, status.HTTP_200_OK)
+		self.assertNotEqual(r['ETag'], etag)
+
+	def test_meeting_scopes(self):
+		url = f'/api/meetings/?client={self.a.pk}'
+		etag = self.client_api.get(url)['ETag']
+		detail = f'/api/meetings/{self.meeting.pk}/'
+		detail_etag = self.client_api.get(detail)['ETag']
+
+		# Another client's meetings leave the filtered list alone; the
+		# global scope is bumped once the write commits
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client_api.post('/api/meetings/bulk/', [{
+				'client': self.b.pk, 'title': 'b',
+				'start_time': self.base.isoformat(), 'end_time': (self.base + timedelta(hours=1)).isoformat(),
+			}], format='json')
+		self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(self.revalidate(detail, detail_etag).status_code, status.HTTP_200_OK)
+
+		# Embedded client_detail changes with the client
+		self.client_api.patch(f'/api/clients/{self.a.pk}/', {'name': 'A2'}, format='json')
+		r = self.revalidate(url, etag)
+		self.assertEqual(r.status_code, status.HTTP_200_OK)
+		self.assertEqual(r.data[0]['client_detail']['name'], 'A2')
+		etag = r['ETag']
+
+		self.meeting.delete()
+		self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+	def test_global_meeting_scope_is_bumped_after_commit(self):
+		from . import versions
+		scopes = [versions.MEETING, versions.meeting_client_scope(self.a.pk)]
+		before = versions.current(scopes)
+		with mock.patch.object(connection.features, 'has_select_for_update', True), self.captureOnCommitCallbacks() as callbacks:
+			Meeting.objects.create(
+				client=self.a, title='late', start_time=self.base + timedelta(days=1), end_time=self.base + timedelta(days=1, hours=1),
+			)
+			# Only the per-client row is locked by the booking transaction
+			self.assertEqual(versions.current(scopes), [before[0], before[1] + 1])
+			# A failing bump is logged instead of failing the committed write
+			self.assertTrue(all(robust for _, _, robust in connection.run_on_commit))
+		for callback in callbacks:
+			callback()
+		self.assertEqual(versions.current(scopes), [before[0] + 1, before[1] + 1])
+
+	def test_sqlite_bumps_every_scope_in_the_transaction(self):
+		from . import versions
+		scopes = [versions.MEETING, versions.meeting_client_scope(self.a.pk)]
+		before = versions.current(scopes)
+		with self.captureOnCommitCallbacks() as callbacks:
+			Meeting.objects.create(
+				client=self.a, title='late', start_time=self.base + timedelta(days=1), end_time=self.base + timedelta(days=1, hours=1),
+			)
+		self.assertEqual(callbacks, [])
+		self.assertEqual(versions.current(scopes), [before[0] + 1, before[1] + 1])
+
+
+class SparseFieldsetTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		self.a = Client.objects.create(name='A', email='a@example.test')
+		base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		for h in range(3):
+			Meeting.objects.create(
+				client=self.a, title=f'm{h}', notes='long notes',
+				start_time=base + timedelta(hours=h), end_time=base + timedelta(hours=h, minutes=30),
+			)
+
+	def test_fields_trim_payload_and_columns(self):
+		with CaptureQueriesContext(connection) as ctx:
+			r = self.client_api.get('/api/meetings/', {'fields': 'id,client,title,start_time', 'limit': 2})
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		self.assertEqual(set(r.data['results'][0]), {'id', 'client', 'title', 'start_time'})
+		self.assertIsNotNone(r.data['next_cursor'])
+		sql = ctx.captured_queries[-1]['sql']
+		self.assertNotIn('notes', sql)
+		self.assertNotIn('JOIN', sql)
+
+		r = self.client_api.get('/api/meetings/', {'fields': 'id,title', 'expand': 'client'})
+		self.assertEqual(set(r.data[0]), {'id', 'title', 'client_detail'})
+		self.assertEqual(r.data[0]['client_detail']['email'], 'a@example.test')
+
+		# Defaults are unchanged
+		r = self.client_api.get(f'/api/meetings/{r.data[0]["id"]}/')
+		self.assertIn('client_detail', r.data)
+		self.assertEqual(r.data['notes'], 'long notes')
+
+	def test_invalid_fieldset(self):
+		r = self.client_api.get('/api/clients/', {'fields': 'id,password'})
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn('fields', r.data)
+		r = self.client_api.get('/api/clients/', {'expand': 'client'})
+		self.assertIn('expand', r.data)
+
+
+class FastListTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		odd = 'Zoë "quoted" \\ back\tslash \u2028\u2029 \x00\x1f\x7f 会議 🎉'
+		a = Client.objects.create(name=odd, email='a@example.test', phone='+1 555')
+		b = Client.objects.create(name='B', email='b@example.test')
+		base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		Meeting.objects.create(client=a, title=odd, notes='line\nbreak', start_time=base, end_time=base + timedelta(minutes=30))
+		Meeting.objects.create(
+			client=b, title='micro', location='Room 1',
+			start_time=base + timedelta(microseconds=1500), end_time=base + timedelta(hours=1),
+		)
+
+	def test_matches_drf_bytes(self):
+		urls = [
+			'/api/clients/',
+			'/api/clients/?ordering=-name',
+			'/api/clients/?limit=1',
+			'/api/meetings/',
+			'/api/meetings/?limit=1&ordering=-end_time',
+			'/api/meetings/?fields=id,title,start_time&limit=5',
+			'/api/meetings/?fields=id,client&expand=client',
+		]
+		for url in urls:
+			with self.subTest(url=url):
+				with override_settings(API_FAST_LIST=False):
+					slow = self.client_api.get(url)
+				fast = self.client_api.get(url)
+				with mock.patch('api.fastpath.orjson', None):
+					stdlib = self.client_api.get(url)
+				self.assertEqual(fast.status_code, status.HTTP_200_OK)
+				self.assertNotIsInstance(fast, Response)
+				self.assertEqual(fast.content, slow.content)
+				self.assertEqual(stdlib.content, slow.content)
+				self.assertEqual(fast['Content-Type'], slow['Content-Type'])
+				self.assertEqual(fast['ETag'], slow['ETag'])
+
+	def test_next_page_from_fast_cursor(self):
+		first = self.client_api.get('/api/meetings/', {'limit': 1}).json()
+		second = self.client_api.get('/api/meetings/', {'limit': 1, 'cursor': first['next_cursor']}).json()
+		self.assertEqual(second['results'][0]['title'], 'micro')
+		self.assertIsNone(second['next_cursor'])
+
+
+class ExportTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		a = Client.objects.create(name='A', email='a@example.test')
+		base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+		for h in range(5):
+			Meeting.objects.create(client=a, title=f'm{h}', start_time=base + timedelta(hours=h), end_time=base + timedelta(hours=h, minutes=30))
+
+	def content(self, response):
+		return b''.join(response.streaming_content)
+
+	def test_formats_match_list(self):
+		listed = self.client_api.get('/api/meetings/', {'start': '2030-01-01T10:00:00Z'})
+		for fast in (True, False):
+			with self.subTest(fast=fast), override_settings(API_FAST_LIST=fast):
+				r = self.client_api.get('/api/meetings/export/', {'start': '2030-01-01T10:00:00Z'}, HTTP_ACCEPT='application/json')
+				self.assertEqual(r['Content-Type'], 'application/json')
+				self.assertEqual(self.content(r), listed.content)
+
+				r = self.client_api.get('/api/meetings/export/', {'start': '2030-01-01T10:00:00Z'})
+				self.assertEqual(r['Content-Type'], 'application/x-ndjson')
+				lines = self.content(r).splitlines()
+				self.assertEqual([json.loads(line) for line in lines], listed.json())
+
+	def test_limit_and_fields(self):
+		r = self.client_api.get('/api/meetings/export/', {'limit': 2, 'fields': 'id,title', 'ordering': '-start_time'})
+		self.assertEqual([json.loads(line) for line in self.content(r).splitlines()], [
+			{'id': m.pk, 'title': m.title} for m in Meeting.objects.order_by('-start_time')[:2]
+		])
+		r = self.client_api.get('/api/meetings/export/', {'limit': 0, 'format': 'json'})
+		self.assertEqual(self.content(r), b'[]')
+		r = self.client_api.get('/api/meetings/export/', {'limit': '-1'})
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncReadTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		self.a = Client.objects.create(name='A', email='a@example.test')
+		self.b = Client.objects.create(name='B', email='b@example.test')
+		self.monday = datetime(2030, 1, 7, tzinfo=timezone.utc)
+		for client, h in [(self.a, 9), (self.b, 10), (self.a, 13)]:
+			Meeting.objects.create(
+				client=client, title=f'm{h}', start_time=self.monday.replace(hour=h),
+				end_time=self.monday.replace(hour=h, minute=45),
+			)
+
+	def assertSameBody(self, path, params=None, **headers):
+		sync = self.client_api.get(f'/api/{path}', params, **headers)
+		asynchronous = self.client_api.get(f'/api/async/{path}', params, **headers)
+		self.assertEqual(asynchronous.status_code, sync.status_code, asynchronous.content)
+		# `next` links point back at the endpoint that was called
+		self.assertEqual(asynchronous.content.replace(b'/api/async/', b'/api/'), sync.content)
+		self.assertEqual(asynchronous.get('ETag'), sync.get('ETag'))
+		return asynchronous
+
+	def test_same_responses_as_drf(self):
+		self.assertSameBody('clients/', {'search': 'a@'})
+		self.assertSameBody('clients/', {'ordering': '-name', 'fields': 'id,name'})
+		self.assertSameBody(f'clients/{self.a.pk}/')
+		self.assertSameBody('meetings/')
+		self.assertSameBody('meetings/', {'client': self.a.pk, 'start': self.monday.replace(hour=10).isoformat()})
+		self.assertSameBody(f'meetings/{Meeting.objects.first().pk}/', {'fields': 'id,title'})
+		day = {'start': self.monday.isoformat(), 'end': (self.monday + timedelta(days=1)).isoformat()}
+		self.assertSameBody('availability/', {'clients': f'{self.a.pk},{self.b.pk}', 'busy': 'true', **day})
+		# No meeting in the window: answered without running the sweep
+		next_day = {'start': (self.monday + timedelta(days=1)).isoformat(), 'end': (self.monday + timedelta(days=2)).isoformat()}
+		self.assertSameBody('availability/', {'clients': self.a.pk, 'busy': 'true', **next_day})
+
+	def test_pages_and_errors(self):
+		first = self.assertSameBody('meetings/', {'limit': 2}).json()
+		self.assertSameBody('meetings/', {'limit': 2, 'cursor': first['next_cursor']})
+		self.assertSameBody('meetings/', {'cursor': 'garbage'})
+		self.assertSameBody('meetings/', {'fields': 'nope'})
+		self.assertSameBody('meetings/', {'client': 9999})
+		self.assertSameBody('clients/9999/')
+		self.assertSameBody('availability/', {'clients': '9999', 'start': self.monday.isoformat(), 'end': self.monday.isoformat()})
+
+	def test_conditional_get(self):
+		r = self.client_api.get('/api/async/clients/')
+		self.assertEqual(self.client_api.get('/api/async/clients/', HTTP_IF_NONE_MATCH=r['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+		# Either endpoint revalidates the other's ETag
+		self.assertEqual(self.client_api.get('/api/clients/', HTTP_IF_NONE_MATCH=r['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+		Client.objects.create(name='C', email='c@example.test')
+		self.assertEqual(self.client_api.get('/api/async/clients/', HTTP_IF_NONE_MATCH=r['ETag']).status_code, status.HTTP_200_OK)
+
+	def test_fast_list_setting_applies(self):
+		with override_settings(API_FAST_LIST=False), mock.patch('api.fastpath.compile_plan') as compile_plan:
+			self.assertSameBody('meetings/', {'fields': 'id,title'})
+			self.assertSameBody(f'clients/{self.a.pk}/')
+		compile_plan.assert_not_called()
+		# Content negotiation as in DRF: the ETag depends on the media type
+		self.assertSameBody('clients/', HTTP_ACCEPT='application/json; indent=2')
+
+
+class AvailabilityTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		self.a = Client.objects.create(name='A', email='a@example.test')
+		self.b = Client.objects.create(name='B', email='b@example.test')
+		self.monday = datetime(2030, 1, 7, tzinfo=timezone.utc)
+		for client, (h1, m1), (h2, m2) in [
+			(self.a, (9, 0), (10, 0)),
+			(self.b, (9, 30), (11, 0)),
+			(self.a, (12, 0), (12, 20)),
+		]:
+			Meeting.objects.create(
+				client=client, title='busy',
+				start_time=self.monday.replace(hour=h1, minute=m1),
+				end_time=self.monday.replace(hour=h2, minute=m2),
+			)
+
+	def get(self, **params):
+		params.setdefault('start', self.monday.isoformat())
+		params.setdefault('end', (self.monday + timedelta(days=1)).isoformat())
+		return self.client_api.get('/api/availability/', params)
+
+	def test_common_free_slots(self):
+		r = self.get(clients=f'{self.a.pk},{self.b.pk}', duration=60, limit=4, busy='true')
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		self.assertEqual([s['start'] for s in r.data['slots']], [
+			'2030-01-07T11:00:00Z', '2030-01-07T12:20:00Z', '2030-01-07T13:20:00Z', '2030-01-07T14:20:00Z',
+		])
+		self.assertEqual(r.data['busy'], [
+			{'start': '2030-01-07T09:00:00Z', 'end': '2030-01-07T11:00:00Z'},
+			{'start': '2030-01-07T12:00:00Z', 'end': '2030-01-07T12:20:00Z'},
+		])
+
+	def test_working_hours_and_time_zone(self):
+		# 09:00 in Sao Paulo is 12:00 UTC; the last slot must end by 17:00 local
+		r = self.get(clients=str(self.b.pk), duration=120, limit=10, tz='America/Sao_Paulo')
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		starts = [s['start'] for s in r.data['slots']]
+		self.assertEqual(starts[0], '2030-01-07T12:00:00Z')
+		self.assertEqual(r.data['slots'][-1]['end'], '2030-01-07T20:00:00Z')
+		# Saturday/Sunday are skipped by default
+		saturday = self.monday - timedelta(days=2)
+		r = self.get(clients=str(self.a.pk), start=saturday.isoformat(), duration=30, limit=1)
+		self.assertEqual(r.data['slots'][0]['start'], '2030-01-07T10:00:00Z')
+
+	def test_invalid_parameters(self):
+		self.assertEqual(self.get(clients='999').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.get(clients='x').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.get(clients=str(self.a.pk), tz='Mars/Olympus').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.get(clients=str(self.a.pk), days='funday').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecurrenceTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		self.a = Client.objects.create(name='A', email='a@example.test')
+		# Mondays 09:00-10:00 in Berlin: 08:00Z in winter, 07:00Z from 31 March 2030
+		r = self.client_api.post('/api/series/', {
+			'client': self.a.pk, 'title': 'Standup', 'rrule': 'FREQ=WEEKLY',
+			'start_time': '2030-01-07T08:00:00Z', 'end_time': '2030-01-07T09:00:00Z', 'timezone': 'Europe/Berlin',
+		}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		self.series = r.data['id']
+
+	def occurrences(self, start, end, **params):
+		r = self.client_api.get(f'/api/series/{self.series}/occurrences/', {'start': start, 'end': end, **params})
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		return r.data
+
+	def book(self, start, end, client=None):
+		return self.client_api.post('/api/meetings/', {
+			'client': (client or self.a).pk, 'title': 'One-off', 'start_time': start, 'end_time': end,
+		}, format='json')
+
+	def except_(self, **data):
+		return self.client_api.post(f'/api/series/{self.series}/exceptions/', data, format='json')
+
+	def test_occurrences_follow_wall_clock_time(self):
+		data = self.occurrences('2030-03-25T00:00:00Z', '2030-04-09T00:00:00Z')
+		self.assertEqual([o['start_time'] for o in data], [
+			'2030-03-25T08:00:00Z', '2030-04-01T07:00:00Z', '2030-04-08T07:00:00Z',
+		])
+		self.assertEqual(data[1]['original_start'], '2030-04-01T07:00:00Z')
+		self.assertEqual((data[1]['id'], data[1]['series'], data[1]['title']), (None, self.series, 'Standup'))
+		# One row, however far ahead it is read
+		self.assertEqual(len(self.occurrences('2040-01-01T00:00:00Z', '2040-12-31T00:00:00Z')), 52)
+		self.assertEqual(Meeting.objects.count(), 0)
+		r = self.client_api.get(f'/api/series/{self.series}/')
+		self.assertIsNone(r.data['ends_at'])
+
+	def test_skip_ahead_matches_full_expansion(self):
+		from . import recurrence
+		from .models import MeetingSeries
+		start = datetime(2030, 1, 7, 8, tzinfo=timezone.utc)
+		for rule in ['FREQ=DAILY;INTERVAL=3', 'FREQ=WEEKLY;BYDAY=MO,WE,FR', 'FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,SU;WKST=SU']:
+			series = MeetingSeries(
+				client=self.a, title='x', rrule=rule, timezone='America/New_York',
+				start_time=start, end_time=start + timedelta(minutes=45),
+			)
+			full = recurrence.series_rule(series)
+			for offset in (0, 40, 400, 4000):
+				lo = start + timedelta(days=offset, hours=5)
+				hi = lo + timedelta(days=30)
+				expected = [o.astimezone(timezone.utc) for o in full.between(lo - timedelta(minutes=45), hi)]
+				self.assertEqual([o.start_time for o in recurrence.expand(series, lo, hi)], expected, (rule, offset))
+
+	def test_bookings_are_checked_against_series(self):
+		self.assertEqual(self.book('2030-02-04T08:30:00Z', '2030-02-04T09:30:00Z').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.book('2030-02-04T09:00:00Z', '2030-02-04T10:00:00Z').status_code, status.HTTP_201_CREATED)
+		r = self.client_api.post('/api/meetings/bulk/', [
+			{'client': self.a.pk, 'title': 'clash', 'start_time': '2031-06-02T06:30:00Z', 'end_time': '2031-06-02T07:30:00Z'},
+			{'client': self.a.pk, 'title': 'ok', 'start_time': '2031-06-02T09:00:00Z', 'end_time': '2031-06-02T10:00:00Z'},
+		], format='json')
+		self.assertEqual([item['status'] for item in r.data['results']], ['error', 'created'])
+
+		# A cancelled occurrence frees its slot, which then cannot be restored
+		r = self.except_(original_start='2030-02-11T08:00:00Z', cancelled=True)
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		self.assertEqual(self.book('2030-02-11T08:00:00Z', '2030-02-11T09:00:00Z').status_code, status.HTTP_201_CREATED)
+		r = self.client_api.delete(f'/api/series/{self.series}/exceptions/?original_start=2030-02-11T08:00:00Z')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		r = self.client_api.delete(f'/api/series/{self.series}/exceptions/?original_start=2030-02-18T08:00:00Z')
+		self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_series_conflicts(self):
+		def create(**data):
+			return self.client_api.post('/api/series/', {
+				'client': self.a.pk, 'title': 'Other', 'timezone': 'Europe/Berlin', **data,
+			}, format='json')
+
+		self.book('2030-03-05T10:00:00Z', '2030-03-05T11:00:00Z')
+		r = create(rrule='FREQ=WEEKLY;BYDAY=TU', start_time='2030-01-08T10:30:00Z', end_time='2030-01-08T11:30:00Z')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn('2030-03-05T10:30:00Z', str(r.data))
+		r = create(rrule='FREQ=DAILY', start_time='2030-01-01T08:30:00Z', end_time='2030-01-01T08:45:00Z')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		r = create(rrule='FREQ=DAILY;COUNT=3', start_time='2030-06-01T10:00:00Z', end_time='2030-06-02T11:00:00Z')
+		self.assertIn('each other', str(r.data))
+		for rrule in ['FREQ=HOURLY', 'FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=30', 'FREQ=WEEKLY;UNTIL=20290101T000000Z']:
+			r = create(rrule=rrule, start_time='2030-06-01T10:00:00Z', end_time='2030-06-01T11:00:00Z')
+			self.assertIn('rrule', r.data, rrule)
+		r = create(rrule='FREQ=DAILY', timezone='Mars/Olympus', start_time='2030-06-01T10:00:00Z', end_time='2030-06-01T11:00:00Z')
+		self.assertIn('timezone', r.data)
+
+		r = create(rrule='FREQ=DAILY;COUNT=5', start_time='2030-06-01T10:00:00Z', end_time='2030-06-01T11:00:00Z')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		self.assertEqual(r.data['ends_at'], '2030-06-05T11:00:00Z')
+
+	def test_old_open_ended_series_is_checked_ahead(self):
+		b = Client.objects.create(name='B', email='b@example.test')
+		r = self.client_api.post('/api/series/', {
+			'client': b.pk, 'title': 'Weekly', 'rrule': 'FREQ=WEEKLY', 'timezone': 'UTC',
+			'start_time': '2020-01-06T09:00:00Z', 'end_time': '2020-01-06T10:00:00Z',
+		}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		series = r.data['id']
+		today = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+		tuesday = today + timedelta(days=(1 - today.weekday()) % 7 + 7)
+		r = self.book(tuesday.isoformat(), (tuesday + timedelta(hours=1)).isoformat(), client=b)
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		# More than CHECK_HORIZON after the series started
+		r = self.client_api.patch(f'/api/series/{series}/', {'rrule': 'FREQ=WEEKLY;BYDAY=TU'}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST, r.content)
+
+	def test_exceptions_override_occurrences(self):
+		r = self.except_(
+			original_start='2030-01-14T08:00:00Z', title='Moved',
+			start_time='2030-01-15T10:00:00Z', end_time='2030-01-15T11:00:00Z',
+		)
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		data = self.occurrences('2030-01-10T00:00:00Z', '2030-01-22T00:00:00Z')
+		self.assertEqual([(o['start_time'], o['original_start'], o['title']) for o in data], [
+			('2030-01-15T10:00:00Z', '2030-01-14T08:00:00Z', 'Moved'),
+			('2030-01-21T08:00:00Z', '2030-01-21T08:00:00Z', 'Standup'),
+		])
+		# The moved occurrence blocks its new slot, and only that one
+		self.assertEqual(self.book('2030-01-15T10:30:00Z', '2030-01-15T11:30:00Z').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.book('2030-01-14T08:00:00Z', '2030-01-14T09:00:00Z').status_code, status.HTTP_201_CREATED)
+		# Posting again replaces the exception: back in place, renamed only
+		r = self.except_(original_start='2030-01-14T08:00:00Z', title='Renamed')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		r = self.except_(original_start='2030-01-21T08:00:00Z', title='Renamed')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		self.assertEqual(self.except_(original_start='2030-01-21T08:00:00Z', title='Again').status_code, status.HTTP_200_OK)
+		r = self.except_(original_start='2030-01-22T08:00:00Z', cancelled=True)
+		self.assertIn('original_start', r.data)
+
+		# Rescheduling drops the exceptions, which named the old occurrences
+		r = self.client_api.patch(f'/api/series/{self.series}/', {'rrule': 'FREQ=WEEKLY;COUNT=3'}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+		r = self.client_api.patch(f'/api/series/{self.series}/', {'rrule': 'FREQ=WEEKLY;COUNT=3', 'start_time': '2030-01-07T12:00:00Z', 'end_time': '2030-01-07T13:00:00Z'}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		self.assertEqual((r.data['exceptions'], r.data['ends_at']), ([], '2030-01-21T13:00:00Z'))
+
+	def test_meeting_list_merges_occurrences(self):
+		self.book('2030-01-08T10:00:00Z', '2030-01-08T11:00:00Z')
+		params = {'client': self.a.pk, 'start': '2030-01-07T00:00:00Z', 'end': '2030-01-15T00:00:00Z', 'occurrences': 'true'}
+		r = self.client_api.get('/api/meetings/', params)
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		self.assertEqual([(m['start_time'], m['series']) for m in r.data], [
+			('2030-01-07T08:00:00Z', self.series), ('2030-01-08T10:00:00Z', None), ('2030-01-14T08:00:00Z', self.series),
+		])
+		self.assertEqual(r.data[0]['client_detail']['name'], 'A')
+		self.assertEqual(len(self.client_api.get('/api/meetings/', {**params, 'limit': 2}).data), 2)
+		r = self.client_api.get('/api/meetings/', {**params, 'fields': 'start_time,series'})
+		self.assertEqual(set(r.data[0]), {'start_time', 'series'})
+		r = self.client_api.get('/api/async/meetings/', params)
+		self.assertEqual([m['start_time'] for m in json.loads(r.content)][:2], ['2030-01-07T08:00:00Z', '2030-01-08T10:00:00Z'])
+		self.assertEqual(self.client_api.get('/api/meetings/', {'occurrences': 'true'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+		# Series writes change the list's ETag
+		etag = self.client_api.get('/api/meetings/', params)['ETag']
+		self.assertEqual(self.client_api.get('/api/meetings/', params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+		self.except_(original_start='2030-01-14T08:00:00Z', cancelled=True)
+		r = self.client_api.get('/api/meetings/', params, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(r.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(r.data), 2)
+
+	def test_availability_includes_series(self):
+		params = {
+			'clients': self.a.pk, 'start': '2030-01-07T00:00:00Z', 'end': '2030-01-08T00:00:00Z',
+			'tz': 'Europe/Berlin', 'duration': 60, 'limit': 1, 'busy': 'true',
+		}
+		for path in ('/api/availability/', '/api/async/availability/'):
+			data = json.loads(self.client_api.get(path, params).content)
+			self.assertEqual(data['slots'][0]['start'], '2030-01-07T09:00:00Z', path)
+			self.assertEqual(data['busy'], [{'start': '2030-01-07T08:00:00Z', 'end': '2030-01-07T09:00:00Z'}], path)
+
+
+class OccupancyTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		self.a = Client.objects.create(name='A', email='a@example.test')
+		self.b = Client.objects.create(name='B', email='b@example.test')
+
+	def book(self, start, end, client=None):
+		r = self.client_api.post('/api/meetings/', {
+			'client': (client or self.a).pk, 'title': 'm', 'start_time': start, 'end_time': end,
+		}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		return r.data['id']
+
+	def stored(self):
+		from .models import ClientDailyOccupancy
+		return list(ClientDailyOccupancy.objects.values_list('client_id', 'day', 'meetings', 'busy_seconds'))
+
+	def rebuilt(self):
+		from . import occupancy
+		with transaction.atomic():
+			occupancy.rebuild()
+			rows = self.stored()
+			transaction.set_rollback(True)
+		return rows
+
+	def occupancy(self, client, start, end):
+		return self.client_api.get(f'/api/clients/{client.pk}/occupancy/', {'start': start, 'end': end})
+
+	def test_maintained_with_meetings(self):
+		from datetime import date
+		first = self.book('2030-01-07T09:00:00Z', '2030-01-07T10:30:00Z')
+		self.book('2030-01-07T23:00:00Z', '2030-01-08T01:00:00Z')
+		self.assertEqual(self.stored(), [
+			(self.a.pk, date(2030, 1, 7), 2, 5400 + 3600),
+			(self.a.pk, date(2030, 1, 8), 1, 3600),
+		])
+		# Moved to another day and client, then deleted
+		r = self.client_api.patch(f'/api/meetings/{first}/', {
+			'client': self.b.pk, 'start_time': '2030-01-09T09:00:00Z', 'end_time': '2030-01-09T09:45:00Z',
+		}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		self.assertEqual(self.stored(), [
+			(self.a.pk, date(2030, 1, 7), 1, 3600),
+			(self.a.pk, date(2030, 1, 8), 1, 3600),
+			(self.b.pk, date(2030, 1, 9), 1, 2700),
+		])
+		# A change that keeps the times leaves the rows alone
+		with CaptureQueriesContext(connection) as queries:
+			self.client_api.patch(f'/api/meetings/{first}/', {'title': 'renamed'}, format='json')
+		self.assertFalse([q for q in queries if 'clientdailyoccupancy' in q['sql']])
+		self.assertEqual(self.client_api.delete(f'/api/meetings/{first}/').status_code, status.HTTP_204_NO_CONTENT)
+		self.assertEqual([row[0] for row in self.stored()], [self.a.pk, self.a.pk])
+
+		r = self.client_api.post('/api/meetings/bulk/', [
+			{'client': self.b.pk, 'title': f'b{h}', 'start_time': f'2030-01-07T{h:02d}:00:00Z', 'end_time': f'2030-01-07T{h:02d}:30:00Z'}
+			for h in (9, 10, 11)
+		], format='json')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		self.assertIn((self.b.pk, date(2030, 1, 7), 3, 5400), self.stored())
+		self.assertEqual(self.stored(), self.rebuilt())
+		self.client_api.delete(f'/api/clients/{self.b.pk}/')
+		self.assertEqual({row[0] for row in self.stored()}, {self.a.pk})
+
+	def test_endpoint(self):
+		self.book('2030-01-07T09:00:00Z', '2030-01-07T10:30:00Z')
+		self.book('2030-01-09T23:30:00Z', '2030-01-10T00:30:00Z')
+		# Daily 08:00-08:30 from the 8th; the 9th is cancelled
+		r = self.client_api.post('/api/series/', {
+			'client': self.a.pk, 'title': 'Standup', 'rrule': 'FREQ=DAILY',
+			'start_time': '2030-01-08T08:00:00Z', 'end_time': '2030-01-08T08:30:00Z',
+		}, format='json')
+		self.assertEqual(r.status_code, status.HTTP_201_CREATED, r.content)
+		self.client_api.post(f'/api/series/{r.data["id"]}/exceptions/', {'original_start': '2030-01-09T08:00:00Z', 'cancelled': True}, format='json')
+
+		r = self.occupancy(self.a, '2030-01-06', '2030-01-10')
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		self.assertEqual(
+			[(d['date'], d['meetings'], d['busy_minutes']) for d in r.data['days']],
+			[('2030-01-06', 0, 0), ('2030-01-07', 1, 90), ('2030-01-08', 1, 30), ('2030-01-09', 1, 30), ('2030-01-10', 2, 60)],
+		)
+		self.assertEqual((r.data['meetings'], r.data['busy_minutes']), (5, 210))
+		# A year of days costs the same few queries
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(len(self.occupancy(self.a, '2030-01-01', '2030-12-31').data['days']), 365)
+		self.assertLessEqual(len(queries), 5)
+
+		etag = r['ETag']
+		self.assertEqual(self.client_api.get(r.request['PATH_INFO'] + '?' + r.request['QUERY_STRING'], HTTP_IF_NONE_MATCH=etag).status_code, 304)
+		self.book('2030-01-06T09:00:00Z', '2030-01-06T10:00:00Z')
+		r = self.occupancy(self.a, '2030-01-06', '2030-01-10')
+		self.assertNotEqual(r['ETag'], etag)
+		self.assertEqual(r.data['days'][0]['meetings'], 1)
+
+		self.assertEqual(self.occupancy(self.a, '2030-01-10', '2030-01-06').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.occupancy(self.a, '2030-01-01', '2031-01-02').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.client_api.get('/api/clients/9999/occupancy/', {'start': '2030-01-01', 'end': '2030-01-02'}).status_code, 404)
+
+	def test_rebuild_command(self):
+		from io import StringIO
+		from django.core.management import call_command
+		from django.core.management.base import CommandError
+		from .models import ClientDailyOccupancy
+		self.book('2030-01-07T09:00:00Z', '2030-01-07T10:00:00Z')
+		self.book('2030-01-07T09:00:00Z', '2030-01-07T10:00:00Z', client=self.b)
+		expected = self.stored()
+		ClientDailyOccupancy.objects.update(meetings=7)
+		ClientDailyOccupancy.objects.create(client=self.a, day='2030-02-01', meetings=1, busy_seconds=60)
+		out = StringIO()
+		call_command('rebuild_occupancy', client=[self.a.pk], stdout=out)
+		self.assertIn('Rebuilt 1 occupancy rows for 1 clients', out.getvalue())
+		self.assertEqual([row[2] for row in self.stored()], [1, 7])
+		url = f'/api/clients/{self.b.pk}/occupancy/?start=2030-01-07&end=2030-01-07'
+		etag = self.client_api.get(url)['ETag']
+		call_command('rebuild_occupancy', stdout=out)
+		self.assertEqual(self.stored(), expected)
+		# A full rebuild invalidates every client's cached summary
+		self.assertEqual(self.client_api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+		with self.assertRaises(CommandError):
+			call_command('rebuild_occupancy', client=[9999], stdout=out)
+
+
+class ChangeFeedTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		if connection.vendor == 'postgresql':
+			# TestCase never commits: number entries as they are written
+			with connection.cursor() as cursor:
+				cursor.execute('SET CONSTRAINTS api_change_number IMMEDIATE')
+
+	def feed(self, path='/api/changes/', **params):
+		r = self.client_api.get(path, params)
+		self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+		return r.json()
+
+	def entries(self, since=0):
+		return [(c['resource'], c['action'], c['object_id']) for c in self.feed(since=since, limit=1000)['changes']]
+
+	def test_writes_are_logged_in_order(self):
+		head = self.feed()['next']
+		r = self.client_api.post('/api/clients/', {'name': 'A', 'email': 'a@example.test'}, format='json')
+		client = r.data['id']
+		r = self.client_api.post('/api/meetings/', {
+			'client': client, 'title': 'm', 'start_time': '2030-01-07T09:00:00Z', 'end_time': '2030-01-07T10:00:00Z',
+		}, format='json')
+		meeting = r.data['id']
+		self.client_api.patch(f'/api/meetings/{meeting}/', {'title': 'renamed'}, format='json')
+		r = self.client_api.post('/api/series/', {
+			'client': client, 'title': 'Weekly', 'rrule': 'FREQ=WEEKLY;COUNT=3',
+			'start_time': '2030-01-08T09:00:00Z', 'end_time': '2030-01-08T10:00:00Z',
+		}, format='json')
+		series = r.data['id']
+		self.client_api.post(f'/api/series/{series}/exceptions/', {'original_start': '2030-01-15T09:00:00Z', 'cancelled': True}, format='json')
+		self.client_api.delete(f'/api/meetings/{meeting}/')
+		self.assertEqual(self.entries(head), [
+			('client', 'created', client), ('meeting', 'created', meeting), ('meeting', 'updated', meeting),
+			('series', 'created', series), ('series', 'updated', series), ('meeting', 'deleted', meeting),
+		])
+		changes = self.feed(since=head, limit=3)
+		self.assertEqual(len(changes['changes']), 3)
+		self.assertEqual(changes['changes'][2]['data']['title'], 'renamed')
+		self.assertEqual(changes['changes'][2]['data']['start_time'], '2030-01-07T09:00:00Z')
+		self.assertEqual(changes['changes'][2]['client'], client)
+		rest = self.feed('/api/async/changes/', since=changes['next'])
+		self.assertEqual([c['seq'] for c in rest['changes']], sorted(c['seq'] for c in rest['changes']))
+		self.assertIsNone(rest['changes'][-1]['data'])
+
+		# The client's deletion stands for its series and meetings
+		r = self.client_api.post('/api/meetings/bulk/', [
+			{'client': client, 'title': f'b{h}', 'start_time': f'2030-02-01T{h:02d}:00:00Z', 'end_time': f'2030-02-01T{h:02d}:30:00Z'}
+			for h in (9, 10)
+		], format='json')
+		since = self.feed(since=rest['next'])
+		self.assertEqual([c['action'] for c in since['changes']], ['created', 'created'])
+		self.client_api.delete(f'/api/clients/{client}/')
+		self.assertEqual(self.entries(since['next']), [('client', 'deleted', client)])
+		self.assertEqual(self.feed(since=since['next'] + 1)['changes'], [])
+
+	def test_long_poll(self):
+		head = self.feed()['next']
+		with mock.patch('api.changes.POLL_INTERVAL', 0.01):
+			started = time.monotonic()
+			body = self.feed(since=head, wait=0.2)
+			self.assertGreaterEqual(time.monotonic() - started, 0.2)
+			self.assertEqual(body, {'changes': [], 'next': head, 'reset': False})
+			body = self.feed('/api/async/changes/', since=head, wait=0.05)
+			self.assertEqual(body['changes'], [])
+		Client.objects.create(name='A', email='a@example.test')
+		started = time.monotonic()
+		self.assertEqual(len(self.feed(since=head, wait=10)['changes']), 1)
+		self.assertLess(time.monotonic() - started, 5)
+		r = self.client_api.get('/api/changes/', {'since': head, 'wait': 31})
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+	def test_compaction_and_retention(self):
+		from io import StringIO
+		from django.core.management import call_command
+		from . import changes
+		from .models import Change
+		a = Client.objects.create(name='A', email='a@example.test')
+		b = Client.objects.create(name='B', email='b@example.test')
+		for name in ('A2', 'A3'):
+			a.name = name
+			a.save()
+		Change.objects.update(created_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+		# Recent entries are kept whole
+		a.name = 'A4'
+		a.save()
+		self.assertEqual(changes.compact(datetime(2021, 1, 1, tzinfo=timezone.utc)), 3)
+		self.assertEqual(self.entries(), [('client', 'created', b.pk), ('client', 'updated', a.pk)])
+		self.assertEqual(self.feed(since=0)['changes'][-1]['data']['name'], 'A4')
+
+		# Retention: consumers behind the pruned entries have to reload
+		first = Change.objects.order_by('seq').first().seq
+		out = StringIO()
+		call_command('prune_changes', max_rows=1, stdout=out)
+		self.assertIn('expired 1 change', out.getvalue())
+		self.assertEqual(self.feed(since=0), {'changes': [], 'next': changes.head(), 'reset': True})
+		self.assertFalse(self.feed(since=first)['reset'])
+		self.assertEqual(len(self.feed(since=first)['changes']), 1)
+
+		# Also runs after every CHANGES_PRUNE_EVERY writes
+		with override_settings(CHANGES_PRUNE_EVERY=1, CHANGES_MAX_ROWS=1), self.captureOnCommitCallbacks(execute=True):
+			Client.objects.create(name='C', email='c@example.test')
+		self.assertEqual(Change.objects.count(), 1)
+		self.assertEqual(changes.pruned_through(), changes.head() - 1)
+
+
+class DatabaseProfileTest(TestCase):
+	def test_pragmas_applied_to_new_connections(self):
+		from django.db import connections
+		from . import dbprofile
+		pragmas = {'synchronous': 'NORMAL', 'temp_store': 'MEMORY', 'cache_size': -4096, 'mmap_size': 1048576}
+		with override_settings(SQLITE_PRAGMAS=pragmas):
+			fresh = connections.create_connection('default')
+			try:
+				fresh.ensure_connection()
+				self.assertEqual(dbprofile.current(fresh), {'synchronous': 1, 'temp_store': 2, 'cache_size': -4096, 'mmap_size': 1048576})
+			finally:
+				fresh.close()
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+	"""Bookings from many threads, each on its own DB connection."""
+
+	base = datetime(2030, 1, 1, 9, tzinfo=timezone.utc)
+
+	def _run_threads(self, jobs):
+		results = [None] * len(jobs)
+		barrier = threading.Barrier(len(jobs))
+
+		def worker(i, client_id, start):
+			api = APIClient()
+			try:
+				barrier.wait()
+				r = api.post('/api/meetings/', {
+					'client': client_id,
+					'title': f'job{i}',
+					'start_time': start.isoformat(),
+					'end_time': (start + timedelta(minutes=30)).isoformat(),
+				}, format='json')
+				results[i] = r.status_code
+			finally:
+				connection.close()
+
+		threads = [threading.Thread(target=worker, args=(i, *job)) for i, job in enumerate(jobs)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+		return results
+
+	def test_same_client_overlaps_are_rejected(self):
+		c = Client.objects.create(name='Hot', email='hot@example.test')
+		# 16 requests for overlapping windows of one client: exactly one may win
+		jobs = [(c.pk, self.base + timedelta(minutes=i)) for i in range(16)]
+		results = self._run_threads(jobs)
+		self.assertEqual(results.count(status.HTTP_201_CREATED), 1, results)
+		self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), 15, results)
+		self.assertEqual(Meeting.objects.filter(client=c).count(), 1)
+
+	def test_same_client_overlaps_are_rejected_without_the_process_mutex(self):
+		from contextlib import nullcontext
+		from . import booking
+		c = Client.objects.create(name='Hot', email='hot@example.test')
+		# As with writers in separate processes, only BEGIN IMMEDIATE keeps
+		# the re-check and insert of one booking from interleaving with another
+		jobs = [(c.pk, self.base + timedelta(minutes=i)) for i in range(16)]
+		with mock.patch.object(booking, '_sqlite_writer', nullcontext()):
+			results = self._run_threads(jobs)
+		self.assertEqual(results.count(status.HTTP_201_CREATED), 1, results)
+		self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), 15, results)
+		self.assertEqual(Meeting.objects.filter(client=c).count(), 1)
+
+	def test_distinct_clients_all_succeed(self):
+		clients = [Client.objects.create(name=f'C{i}', email=f'c{i}@example.test') for i in range(8)]
+		# Each client gets 4 back-to-back slots plus a duplicate of the first one
+		jobs = []
+		for c in clients:
+			jobs += [(c.pk, self.base + timedelta(minutes=30 * k)) for k in range(4)]
+			jobs.append((c.pk, self.base))
+		started = time.perf_counter()
+		results = self._run_threads(jobs)
+		elapsed = time.perf_counter() - started
+		self.assertEqual(results.count(status.HTTP_201_CREATED), 32, results)
+		self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), 8, results)
+		for c in clients:
+			meetings = list(Meeting.objects.filter(client=c).order_by('start_time'))
+			self.assertEqual(len(meetings), 4)
+			for a, b in zip(meetings, meetings[1:]):
+				self.assertLessEqual(a.end_time, b.start_time)
+		# Generous bound: serialized-with-retries would take far longer
+		self.assertLess(elapsed, 10, f'{len(jobs)} bookings took {elapsed:.2f}s')
+
+
+@override_settings(ALLOWED_HOSTS=['localhost'])
+class EmbeddedBackendTest(TransactionTestCase):
+	"""MCP tools against the Django app mounted in-process (SCHEDULER_BACKEND=embedded)."""
+
+	def setUp(self):
+		from mcp_server import server
+		from mcp_server.cache import ToolCache, ValidatorCache
+		self.server = server
+		for patcher in (
+			mock.patch.object(server, 'BACKEND', 'embedded'),
+			mock.patch.object(server, '_http', None),
+			mock.patch.object(server, 'tool_cache', ToolCache(ttl=0)),
+			mock.patch.object(server, 'validators', ValidatorCache(maxsize=0)),
+		):
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	async def calls(self):
+		server = self.server
+		try:
+			client = await server.create_client(server.ClientIn(name='Emb', email='emb@example.test'))
+			meeting = await server.create_meeting(server.MeetingIn(
+				client=client.id, title='Sync', start_time='2030-01-07T10:00:00Z', end_time='2030-01-07T11:00:00Z',
+			))
+			return client, meeting, await server.list_meetings(client_id=client.id), await server.export_meetings(client_id=client.id)
+		finally:
+			await server._close_client()
+
+	def test_tools_round_trip(self):
+		import asyncio
+		client, meeting, listed, exported = asyncio.run(self.calls())
+		self.assertTrue(Meeting.objects.filter(pk=meeting.id, client_id=client.id).exists())
+		self.assertEqual(listed, [meeting])
+		self.assertEqual((exported.count, exported.meetings), (1, [meeting]))
+
+	def test_search_clients(self):
+		import asyncio
+		server = self.server
+		Client.objects.create(name='Embla Ortiz', email='ortiz@example.test')
+
+		async def search():
+			try:
+				return await server.search_clients('embla'), await server.search_clients('emblq ortis')
+			finally:
+				await server._close_client()
+
+		exact, fuzzy = asyncio.run(search())
+		self.assertEqual([c.name for c in exact], ['Embla Ortiz'])
+		self.assertGreater(exact[0].score, 1)
+		self.assertEqual([c.name for c in fuzzy], ['Embla Ortiz'])
+
+	def test_list_meetings_include_recurring(self):
+		import asyncio
+		from .models import MeetingSeries
+		server = self.server
+		client = Client.objects.create(name='Rec', email='rec@example.test')
+		series = MeetingSeries.objects.create(
+			client=client, title='Standup', rrule='FREQ=DAILY;COUNT=3',
+			start_time=datetime(2030, 1, 7, 9, tzinfo=timezone.utc), end_time=datetime(2030, 1, 7, 9, 15, tzinfo=timezone.utc),
+		)
+		Meeting.objects.create(
+			client=client, title='Sync',
+			start_time=datetime(2030, 1, 8, 10, tzinfo=timezone.utc), end_time=datetime(2030, 1, 8, 11, tzinfo=timezone.utc),
+		)
+
+		async def listed():
+			try:
+				return await server.list_meetings(
+					client_id=client.id, start='2030-01-07T00:00:00Z', end='2030-01-10T00:00:00Z', include_recurring=True,
+				)
+			finally:
+				await server._close_client()
+
+		meetings = asyncio.run(listed())
+		self.assertEqual([m.title for m in meetings], ['Standup', 'Standup', 'Sync', 'Standup'])
+		self.assertEqual({m.series for m in meetings if m.id is None}, {series.pk})
+		with self.assertRaises(ValueError):
+			asyncio.run(server.list_meetings(include_recurring=True))
+
+	def test_client_occupancy(self):
+		import asyncio
+		server = self.server
+		client = Client.objects.create(name='Occ', email='occ@example.test')
+		Meeting.objects.create(
+			client=client, title='Sync',
+			start_time=datetime(2030, 1, 8, 10, tzinfo=timezone.utc), end_time=datetime(2030, 1, 8, 11, 30, tzinfo=timezone.utc),
+		)
+
+		async def occupancy():
+			try:
+				return await server.client_occupancy(client.id, '2030-01-07', '2030-01-08')
+			finally:
+				await server._close_client()
+
+		result = asyncio.run(occupancy())
+		self.assertEqual([(d.date, d.meetings, d.busy_minutes) for d in result.days], [('2030-01-07', 0, 0), ('2030-01-08', 1, 90)])
+		self.assertEqual((result.meetings, result.busy_minutes), (1, 90))
+
+	def test_change_feed(self):
+		import asyncio
+		from asgiref.sync import sync_to_async
+		from mcp_server.cache import ToolCache
+		from mcp_server.feed import ChangeFeed
+		server = self.server
+		server.tool_cache = ToolCache(ttl=60)
+		client = Client.objects.create(name='Feed', email='feed@example.test')
+
+		async def follow():
+			feed = ChangeFeed(server._fetch_changes, on_change=server._apply_change, wait=0.5)
+			events = feed.follow(0)
+			try:
+				first = await asyncio.wait_for(anext(events), 5)
+				await server.tool_cache.get_or_load('k', lambda: asyncio.sleep(0, 'cached'), tags=[server._meetings_tag(client.id)])
+				# Written behind the bridge's back, as by another API client
+				await sync_to_async(Meeting.objects.create)(
+					client=client, title='Sync',
+					start_time=datetime(2030, 1, 7, 10, tzinfo=timezone.utc), end_time=datetime(2030, 1, 7, 11, tzinfo=timezone.utc),
+				)
+				second = await asyncio.wait_for(anext(events), 5)
+				# The poller drops the stale list once it sees the write
+				await asyncio.sleep(0.1)
+				return first, second
+			finally:
+				await events.aclose()
+				await feed.stop()
+				await server._close_client()
+
+		first, second = asyncio.run(follow())
+		self.assertEqual((first[1]['resource'], first[1]['object_id']), ('client', client.pk))
+		self.assertEqual((second[1]['resource'], second[1]['action'], second[1]['client']), ('meeting', 'created', client.pk))
+		self.assertEqual(server.tool_cache.stats()['size'], 0)
+		self.assertEqual(server._sse(*second).split('\n')[:2], [f"id: {second[1]['seq']}", 'event: change'])
+
+	def test_tool_metrics(self):
+		import asyncio
+		server = self.server
+		calls = server.TOOL_CALLS.value('list_meetings', 'ok')
+		upstream = server.UPSTREAM_SECONDS.count('list_meetings')
+		asyncio.run(self.calls())
+		self.assertEqual(server.TOOL_CALLS.value('list_meetings', 'ok'), calls + 1)
+		self.assertGreater(server.UPSTREAM_SECONDS.count('list_meetings'), upstream)
+		self.assertGreater(server.UPSTREAM_RESPONSES.value('create_client', '201'), 0)
+		# Every registered tool is wrapped
+		for tool in server.mcp._tool_manager.list_tools():
+			self.assertTrue(hasattr(tool.fn, '__wrapped__'), tool.name)
+
+
+class SeedScaleTest(TestCase):
+	def seed(self, **options):
+		from io import StringIO
+		from django.core.management import call_command
+		out = StringIO()
+		with self.captureOnCommitCallbacks(execute=True):
+			call_command('seed_scale', meetings_per_client=40, batch_size=100, stdout=out, **options)
+		return out.getvalue()
+
+	def snapshot(self):
+		return [
+			(c.email, c.name, c.phone, [(m.title, m.start_time, m.end_time, m.location) for m in c.meetings.order_by('start_time')])
+			for c in Client.objects.order_by('email')
+		]
+
+	def test_deterministic_and_non_overlapping(self):
+		from . import versions
+		Client.objects.create(name='Kept', email='kept@example.test')
+		self.assertIn('Seed complete: 7 clients, 280 meetings', self.seed(clients=7, seed=3))
+		self.assertEqual(versions.current([versions.CLIENT, versions.MEETING]), [2, 1])
+		for client in Client.objects.filter(email__endswith='@seed.example'):
+			meetings = list(client.meetings.order_by('start_time'))
+			self.assertEqual(len(meetings), 40)
+			for a, b in zip(meetings, meetings[1:]):
+				self.assertLessEqual(a.end_time, b.start_time)
+			self.assertTrue(all(m.start_time.weekday() < 5 and 8 <= m.start_time.hour < 18 for m in meetings))
+		seeded = [row for row in self.snapshot() if row[0] != 'kept@example.test']
+
+		# A rerun appends clients numbered after the existing ones
+		self.seed(clients=2, seed=3)
+		self.assertEqual(Client.objects.filter(email__endswith='@seed.example').count(), 9)
+
+		# --reset regenerates exactly the same data for the same seed
+		self.assertIn('Deleted 10 existing clients', self.seed(clients=7, seed=3, reset=True))
+		self.assertEqual(self.snapshot(), seeded)
+		from .models import ClientDailyOccupancy
+		self.assertEqual(
+			sum(ClientDailyOccupancy.objects.values_list('meetings', flat=True)), Meeting.objects.count(),
+		)
+		self.seed(clients=7, seed=4, reset=True)
+		self.assertNotEqual(self.snapshot(), seeded)
+
+
+class MetricsTest(TestCase):
+	def setUp(self):
+		self.client_api = APIClient()
+		c = Client.objects.create(name='A', email='a@example.test')
+		start = datetime(2030, 1, 7, 9, tzinfo=timezone.utc)
+		Meeting.objects.create(client=c, title='m', start_time=start, end_time=start + timedelta(hours=1))
+
+	def series(self, name, **labels):
+		from scheduler.metrics import REGISTRY
+		metric = REGISTRY.get(name)
+		key = tuple(labels[n] for n in metric.labelnames)
+		return metric.count(*key) if hasattr(metric, 'count') else metric.value(*key)
+
+	def test_request_and_query_metrics(self):
+		requests = self.series('http_request_duration_seconds', method='GET', route='meeting-list')
+		queries = self.series('django_db_queries_per_request', route='meeting-list')
+		with CaptureQueriesContext(connection) as captured:
+			self.assertEqual(self.client_api.get('/api/meetings/').status_code, status.HTTP_200_OK)
+		self.assertEqual(self.series('http_request_duration_seconds', method='GET', route='meeting-list'), requests + 1)
+		self.assertEqual(self.series('django_db_queries_per_request', route='meeting-list'), queries + 1)
+		from scheduler.metrics import REGISTRY
+		self.assertGreaterEqual(REGISTRY.get('django_db_queries_per_request').sum('meeting-list'), len(captured))
+		self.client_api.get('/api/nowhere/')
+		self.assertGreater(self.series('http_requests', method='GET', route='unmatched', status='404'), 0)
+
+		r = self.client_api.get('/metrics')
+		self.assertTrue(r['Content-Type'].startswith('text/plain; version=0.0.4'))
+		body = r.content.decode()
+		self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+		self.assertIn('http_request_duration_seconds_bucket{method="GET",route="meeting-list",le="+Inf"}', body)
+		self.assertIn('http_requests_total{method="GET",route="meeting-list",status="200"}', body)
+
+	async def test_async_views_count_queries(self):
+		from scheduler.metrics import REGISTRY
+		histogram = REGISTRY.get('django_db_queries_per_request')
+		before = histogram.sum('async-meeting-list')
+		r = await self.async_client.get('/api/async/meetings/')
+		self.assertEqual(r.status_code, status.HTTP_200_OK)
+		# Queries run in sync_to_async threads still land on this request
+		self.assertGreater(histogram.sum('async-meeting-list'), before)
+
+
+class QueryBudgetTest(TestCase):
+	"""Every route stays within its query and time budget (api/querybudget.py)."""
+
+	@classmethod
+	def setUpTestData(cls):
+		from django.contrib.auth.models import User
+		from .querybudget import build_dataset
+		cls.ids = build_dataset()
+		cls.admin = User.objects.create_superuser('admin', 'admin@example.test', 'unused')
+
+	def test_every_route_has_a_budget(self):
+		from django.urls import resolve
+		from .querybudget import ENDPOINTS, route_names
+		covered = {resolve(e.path.format(**self.ids)).view_name for e in ENDPOINTS}
+		self.assertEqual(route_names() - covered, set(), 'add these routes to querybudget.ENDPOINTS')
+
+	def test_endpoints_within_budget(self):
+		from django.db import transaction
+		from .querybudget import ENDPOINTS, duplicates, measure
+		for endpoint in ENDPOINTS:
+			with self.subTest(endpoint.method, path=endpoint.path, data=endpoint.data):
+				client = APIClient()
+				if endpoint.admin:
+					client.force_login(self.admin)
+				# Each request sees the same data: writes are rolled back
+				with transaction.atomic():
+					response, statements, elapsed = measure(client, endpoint, self.ids)
+					transaction.set_rollback(True)
+				self.assertLess(response.status_code, 400)
+				self.assertLessEqual(len(statements), endpoint.max_queries, '\n'.join(statements))
+				self.assertLess(elapsed, endpoint.max_seconds)
+				if endpoint.method == 'GET' and not endpoint.admin:
+					# Reads never repeat a statement; a repeat is an N+1
+					self.assertEqual(duplicates(statements), [])
+
+	def test_cascaded_delete_bumps_versions_once(self):
+		from .querybudget import duplicates
+		with CaptureQueriesContext(connection) as captured:
+			self.assertEqual(APIClient().delete(f"/api/clients/{self.ids['client']}/").status_code, status.HTTP_204_NO_CONTENT)
+		# 20 meetings went with the client; their versions were bumped together
+		self.assertLessEqual(max((n for _, n in duplicates([q['sql'] for q in captured.captured_queries])), default=0), 2)
+
+	def test_duplicate_query_middleware_logs_repeats(self):
+		from .querybudget import DuplicateQueryMiddleware
+
+		def view(request):
+			for pk in Client.objects.values_list('pk', flat=True)[:4]:
+				Meeting.objects.filter(client_id=pk).count()
+			return Response()
+
+		request = APIClient().get('/api/').wsgi_request
+		with self.assertLogs('api.querybudget', 'WARNING') as logs:
+			DuplicateQueryMiddleware(view)(request)
+		self.assertEqual(len(logs.output), 1)
+		self.assertIn('ran 4 similar queries', logs.output[0])
+		self.assertIn('"api_meeting"."client_id" = ?', logs.output[0])
+
+
+class ClientSearchTest(TestCase):
+	"""The indexed `search` filter matches like SearchFilter; `/api/clients/search/` ranks (api/search.py)."""
+
+	@classmethod
+	def setUpTestData(cls):
+		for name, email, phone in [
+			('Alice Johnson', 'alice@example.test', '+1 555 0101'),
+			('Alicia Keys', 'keys@example.test', ''),
+			('Bob Malice', 'bob@example.test', '+1 555 0199'),
+			('Carol Ng', 'carol.ng@example.test', ''),
+			('Dan Al', 'dan@sample.test', '+44 20 7946'),
+		]:
+			Client.objects.create(name=name, email=email, phone=phone)
+
+	def setUp(self):
+		self.client_api = APIClient()
+
+	def names(self, search):
+		r = self.client_api.get('/api/clients/', {'search': search, 'limit': 100})
+		self.assertEqual(r.status_code, status.HTTP_200_OK)
+		return sorted(c['name'] for c in r.data['results'])
+
+	def test_index_is_used_on_sqlite(self):
+		from .search import get_backend
+		self.assertEqual(get_backend().name, 'sqlite-fts5')
+
+	def test_filter_matches_icontains(self):
+		for search in ['ali', 'ALICE', 'lic', 'al', 'ng', 'example alice', 'al ice', '"alice j"', '555 01', '7946', 'nobody', 'a "b']:
+			with self.subTest(search=search):
+				indexed = self.names(search)
+				with self.settings(CLIENT_SEARCH_BACKEND='scan'):
+					self.assertEqual(indexed, self.names(search))
+		self.assertEqual(self.names('al ice'), ['Alice Johnson', 'Bob Malice'])
+
+	def test_index_follows_writes(self):
+		client = Client.objects.get(name='Carol Ng')
+		self.client_api.patch(f'/api/clients/{client.pk}/', {'name': 'Caroline Zed', 'email': 'cz@example.test'}, format='json')
+		self.assertEqual(self.names('ng'), [])
+		self.assertEqual(self.names('zed'), ['Caroline Zed'])
+		Client.objects.filter(name='Bob Malice').delete()
+		self.assertEqual(self.names('malice'), [])
+		Client.objects.bulk_create([Client(name='Eve Malice', email='eve@example.test')])
+		self.assertEqual(self.names('malice'), ['Eve Malice'])
+
+	def test_ranked_search(self):
+		r = self.client_api.get('/api/clients/search/', {'q': 'ali'})
+		self.assertEqual(r.status_code, status.HTTP_200_OK)
+		names = [c['name'] for c in r.data]
+		# Prefixes of a name or email first, then other substrings
+		self.assertEqual(set(names[:2]), {'Alice Johnson', 'Alicia Keys'})
+		self.assertEqual(names[2:], ['Bob Malice'])
+		self.assertGreater(r.data[0]['score'], 1)
+		self.assertEqual(set(r.data[0]), {'id', 'name', 'email', 'phone', 'created_at', 'score'})
+
+		r = self.client_api.get('/api/clients/search/', {'q': 'ali', 'limit': 1})
+		self.assertEqual(len(r.data), 1)
+
+	def test_fuzzy_search(self):
+		r = self.client_api.get('/api/clients/search/', {'q': 'alcie johnsen'})
+		self.assertEqual([c['name'] for c in r.data][:1], ['Alice Johnson'])
+		self.assertLess(r.data[0]['score'], 1)
+		r = self.client_api.get('/api/clients/search/', {'q': 'alcie johnsen', 'fuzzy': 'false'})
+		self.assertEqual(r.data, [])
+
+	def test_short_and_invalid_queries(self):
+		r = self.client_api.get('/api/clients/search/', {'q': 'al'})
+		self.assertIn('Dan Al', [c['name'] for c in r.data])
+		self.assertEqual(self.client_api.get('/api/clients/search/').status_code, status.HTTP_400_BAD_REQUEST)
+		r = self.client_api.get('/api/clients/search/', {'q': 'ali', 'limit': 0})
+		self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+	@override_settings(CLIENT_SEARCH_BACKEND='scan')
+	def test_scan_backend_ranks_exact_matches(self):
+		r = self.client_api.get('/api/clients/search/', {'q': 'ali'})
+		self.assertEqual([c['name'] for c in r.data][2:], ['Bob Malice'])
+
+
 # Create your tests here.
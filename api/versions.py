@@ -0,0 +1,97 @@
+"""Per-scope write counters backing the ETags in api/etags.py.
+
+Every write to a client bumps `client`; every write to a meeting, a
+meeting series or a series exception bumps `meeting` and
+`meeting:client:<id>`. Signals cover ORM saves and deletes
+(api/signals.py); code using `bulk_create`/`update()` calls `bump()`
+itself. Counters are bumped inside the writing transaction, so a rolled
+back write leaves them untouched.
+
+On databases with row locks (PostgreSQL) the global `meeting` counter is
+the exception: it is bumped once the write commits. Every booking
+touches it, and an UPDATE in the booking transaction would hold that one
+row's lock until commit, serializing bookings of all clients despite the
+per-client locks in api/booking.py. Until the bump lands, a moment after
+the commit, an unfiltered meeting list can still answer 304 to the
+previous ETag; if it fails, the error is logged and the booking still
+succeeds. SQLite serializes writers anyway, so there it is bumped in the
+transaction like the others instead of paying for a second one.
+"""
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import ResourceVersion
+
+CLIENT = 'client'
+MEETING = 'meeting'
+
+
+def meeting_client_scope(client_id):
+	return f'meeting:client:{client_id}'
+
+
+def meeting_scopes(client_ids):
+	return [MEETING, *(meeting_client_scope(c) for c in sorted(set(client_ids)))]
+
+
+# Scopes bumped after commit where rows can be locked, see above
+AFTER_COMMIT = frozenset({MEETING})
+
+
+def bump(scopes):
+	"""Increment every scope in `scopes`, creating missing rows: one upsert statement.
+
+	On databases with row locks, scopes in `AFTER_COMMIT` are incremented
+	when the current transaction commits (immediately outside one); Django
+	logs a failure there instead of failing the committed write.
+	"""
+	scopes = list(dict.fromkeys(scopes))
+	if not connection.features.has_select_for_update:
+		_increment(scopes)
+		return
+	deferred = [scope for scope in scopes if scope in AFTER_COMMIT]
+	if deferred:
+		transaction.on_commit(partial(_increment, deferred), robust=True)
+	_increment([scope for scope in scopes if scope not in AFTER_COMMIT])
+
+
+def _upsert(scopes):
+	quote = connection.ops.quote_name
+	table = quote(ResourceVersion._meta.db_table)
+	version = quote('version')
+	with connection.cursor() as cursor:
+		cursor.execute(
+			f'INSERT INTO {table} ({quote("scope")}, {version}) VALUES {", ".join(["(%s, 1)"] * len(scopes))} '
+			f'ON CONFLICT ({quote("scope")}) DO UPDATE SET {version} = {table}.{version} + 1',
+			scopes,
+		)
+
+
+def _increment(scopes):
+	if not scopes:
+		return
+	if connection.vendor in ('sqlite', 'postgresql'):
+		_upsert(scopes)
+		return
+	versions = ResourceVersion.objects.filter(scope__in=scopes)
+	if versions.update(version=F('version') + 1) == len(scopes):
+		return
+	existing = set(versions.values_list('scope', flat=True))
+	missing = [scope for scope in scopes if scope not in existing]
+	# Rows created concurrently are skipped here and still bumped below
+	ResourceVersion.objects.bulk_create([ResourceVersion(scope=scope) for scope in missing], ignore_conflicts=True)
+	ResourceVersion.objects.filter(scope__in=missing).update(version=F('version') + 1)
+
+
+def current(scopes):
+	"""Versions of `scopes` in the given order (0 for never-written scopes)."""
+	found = dict(ResourceVersion.objects.filter(scope__in=scopes).values_list('scope', 'version'))
+	return [found.get(scope, 0) for scope in scopes]
+
+
+async def acurrent(scopes):
+	"""`current()` for async views."""
+	found = {scope: version async for scope, version in ResourceVersion.objects.filter(scope__in=scopes).values_list('scope', 'version')}
+	return [found.get(scope, 0) for scope in scopes]
@@ -1,13 +1,56 @@
-from rest_framework import viewsets, filters
+import heapq
+from datetime import timedelta
+from itertools import islice
+from operator import attrgetter
+
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, filters, serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Client, Meeting
-from .serializers import ClientSerializer, MeetingSerializer
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from . import availability, bulk, changes, export, occupancy, recurrence, versions
+from .etags import ConditionalGetMixin
+from .fastpath import FastListMixin
+from .fieldsets import FIELDSET_PARAMETERS, SparseFieldsetMixin
+from .models import Client, Meeting, MeetingSeries
+from .pagination import ClientKeysetPagination, MeetingKeysetPagination, SeriesKeysetPagination
+from .search import ClientSearchFilter, get_backend
+from .serializers import (
+	AvailabilityQuerySerializer, AvailabilitySerializer, ChangeFeedSerializer, ChangeQuerySerializer, ClientMatchSerializer,
+	ClientSearchQuerySerializer, ClientSerializer, MeetingOccurrenceSerializer, MeetingSeriesSerializer,
+	MeetingSerializer, OccupancyQuerySerializer, OccupancySerializer, OccurrenceQuerySerializer,
+	SeriesExceptionSerializer,
+)
+
+OCCURRENCE_PARAMETERS = [
+	OpenApiParameter('occurrences', bool, description=(
+		'Also return the occurrences of recurring series, merged by start_time. Needs `start` and `end` '
+		'(at most 366 days apart); `limit` caps the items (default 1000) and the list is not paginated.'
+	)),
+]
+
 
+def bulk_response(results):
+	"""201 if every item was created, 400 if none was, 207 otherwise."""
+	created = sum(1 for r in results if r['status'] == 'created')
+	if created == len(results):
+		code = status.HTTP_201_CREATED
+	elif created == 0:
+		code = status.HTTP_400_BAD_REQUEST
+	else:
+		code = status.HTTP_207_MULTI_STATUS
+	return Response({'created': created, 'failed': len(results) - created, 'results': results}, status=code)
 
-class ClientViewSet(viewsets.ModelViewSet):
+
+@extend_schema_view(list=extend_schema(parameters=FIELDSET_PARAMETERS), retrieve=extend_schema(parameters=FIELDSET_PARAMETERS))
+class ClientViewSet(ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
 	queryset = Client.objects.all()
 	serializer_class = ClientSerializer
-	filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+	pagination_class = ClientKeysetPagination
+	filter_backends = [DjangoFilterBackend, ClientSearchFilter, filters.OrderingFilter]
 	filterset_fields = ['email', 'name']
 	search_fields = ['name', 'email', 'phone']
 	ordering_fields = ['name', 'created_at']
@@ -15,16 +58,63 @@ class ClientViewSet(viewsets.ModelViewSet):
 	def get_queryset(self):
 		return Client.objects.all()
 
+	def get_version_scopes(self):
+		if self.action == 'occupancy':
+			# Occupancy rows and series change with the client's meetings
+			return [versions.meeting_client_scope(self.kwargs['pk'])]
+		return [versions.CLIENT]
+
+	@action(detail=False, methods=['post'], url_path='bulk')
+	def bulk_create(self, request):
+		"""Create up to 1000 clients in one request; results are reported per item."""
+		return bulk_response(bulk.create_clients(request.data))
+
+	@extend_schema(parameters=[ClientSearchQuerySerializer], responses=ClientMatchSerializer(many=True))
+	@action(detail=False, methods=['get'], url_path='search')
+	def search(self, request):
+		"""The best `limit` clients for `q`, highest `score` first: prefix matches, other substring matches, then near matches."""
+		query = ClientSearchQuerySerializer(data=request.query_params)
+		query.is_valid(raise_exception=True)
+		q = query.validated_data
+		matches = []
+		for client, score in get_backend(Client.objects.db).rank(q['q'], limit=q['limit'], fuzzy=q['fuzzy']):
+			client.score = score
+			matches.append(client)
+		return Response(ClientMatchSerializer(matches, many=True).data)
 
-class MeetingViewSet(viewsets.ModelViewSet):
-	queryset = Meeting.objects.select_related('client').all()
+	@extend_schema(parameters=[OccupancyQuerySerializer], responses=OccupancySerializer)
+	@action(detail=True, methods=['get'], url_path='occupancy')
+	def occupancy(self, request, pk=None):
+		"""Meetings and busy minutes per UTC day `start`..`end`, from the daily summary rows."""
+		return self._conditional(request, self._occupancy)
+
+	def _occupancy(self, request):
+		q = OccupancyQuerySerializer(data=request.query_params)
+		q.is_valid(raise_exception=True)
+		q = q.validated_data
+		client = self.get_object()
+		days = occupancy.summary(client, q['start'], q['end'])
+		return Response(OccupancySerializer({
+			'client': client.pk, 'start': q['start'], 'end': q['end'],
+			'meetings': sum(day['meetings'] for day in days), 'days': days,
+		}).data)
+
+
+@extend_schema_view(
+	list=extend_schema(parameters=[*FIELDSET_PARAMETERS, *OCCURRENCE_PARAMETERS], responses=MeetingOccurrenceSerializer(many=True)),
+	retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
+class MeetingViewSet(ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
+	queryset = Meeting.objects.all()
 	serializer_class = MeetingSerializer
+	pagination_class = MeetingKeysetPagination
 	filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
 	filterset_fields = ['client', 'title']
 	ordering_fields = ['start_time', 'end_time', 'created_at']
 
 	def get_queryset(self):
-		qs = Meeting.objects.select_related('client')
+		# `client` is joined by SparseFieldsetMixin when client_detail is returned
+		qs = Meeting.objects.all()
 		start = self.request.query_params.get('start')
 		end = self.request.query_params.get('end')
 		if start:
@@ -33,4 +123,201 @@ class MeetingViewSet(viewsets.ModelViewSet):
 			qs = qs.filter(start_time__lt=end)
 		return qs
 
+	def get_version_scopes(self):
+		# Meetings embed `client_detail`, so client writes matter too. A list
+		# filtered to one client only depends on that client's meetings.
+		client = self.request.query_params.get('client', '')
+		if self.action == 'list' and client.isdigit():
+			return [versions.meeting_client_scope(int(client)), versions.CLIENT]
+		return [versions.MEETING, versions.CLIENT]
+
+	def wants_occurrences(self):
+		value = self.request.query_params.get('occurrences', '')
+		return self.action == 'list' and value in serializers.BooleanField.TRUE_VALUES
+
+	def get_serializer_class(self):
+		if self.wants_occurrences():
+			return MeetingOccurrenceSerializer
+		return super().get_serializer_class()
+
+	def list(self, request, *args, **kwargs):
+		if self.wants_occurrences():
+			return self._conditional(request, self.list_occurrences)
+		return super().list(request, *args, **kwargs)
+
+	def list_occurrences(self, request, queryset=None):
+		"""Meetings and series occurrences of the window, merged lazily by start_time.
+
+		`queryset` is the already filtered meeting queryset, if any.
+		"""
+		q = OccurrenceQuerySerializer(data=request.query_params)
+		q.is_valid(raise_exception=True)
+		q = q.validated_data
+		if queryset is None:
+			queryset = self.filter_queryset(self.get_queryset())
+		meetings = queryset.order_by('start_time', 'id')
+		series = MeetingSeries.objects.filter(**{
+			name: request.query_params[name] for name in self.filterset_fields if name in request.query_params
+		})
+		merged = heapq.merge(
+			meetings.iterator(), recurrence.occurrences(series, q['start'], q['end']), key=attrgetter('start_time'),
+		)
+		return Response(self.get_serializer(list(islice(merged, q['limit'])), many=True).data)
+
+	@action(detail=False, methods=['post'], url_path='bulk')
+	def bulk_create(self, request):
+		"""Create up to 1000 meetings in one request; results are reported per item."""
+		return bulk_response(bulk.create_meetings(request.data))
+
+	@extend_schema(
+		parameters=[
+			*FIELDSET_PARAMETERS,
+			OpenApiParameter('limit', int, description='Stop after this many meetings (default: all).'),
+		],
+		responses=MeetingSerializer(many=True),
+	)
+	@action(detail=False, methods=['get'], url_path='export', renderer_classes=[export.NDJSONRenderer, JSONRenderer])
+	def export(self, request):
+		"""Stream every matching meeting as NDJSON (default) or, for `Accept: application/json`, one JSON array.
+
+		Takes the list filters (`client`, `title`, `start`, `end`, `ordering`, `fields`) but is never paginated.
+		"""
+		limit = request.query_params.get('limit')
+		if limit is not None and not limit.isdigit():
+			raise serializers.ValidationError({'limit': ['A non-negative integer is required.']})
+		queryset = self.filter_queryset(self.get_queryset())
+		return export.stream_response(self, queryset, request, limit=int(limit) if limit is not None else None)
+
+
+@extend_schema_view(list=extend_schema(parameters=[OpenApiParameter('client', int)]))
+class MeetingSeriesViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+	"""Recurring meetings. Their occurrences are computed per window, never stored."""
+	queryset = MeetingSeries.objects.all()
+	serializer_class = MeetingSeriesSerializer
+	pagination_class = SeriesKeysetPagination
+	filter_backends = [DjangoFilterBackend]
+	filterset_fields = ['client']
+
+	def get_queryset(self):
+		return MeetingSeries.objects.select_related('client').prefetch_related('exceptions')
+
+	def get_version_scopes(self):
+		# Series and their exceptions bump the meeting scopes (api/signals.py)
+		client = self.request.query_params.get('client', '')
+		if self.action == 'list' and client.isdigit():
+			return [versions.meeting_client_scope(int(client))]
+		return [versions.MEETING]
+
+	@extend_schema(parameters=[OccurrenceQuerySerializer], responses=MeetingOccurrenceSerializer(many=True))
+	@action(detail=True, methods=['get'], url_path='occurrences')
+	def occurrences(self, request, pk=None):
+		"""Occurrences of the series intersecting `start`..`end`, exceptions applied, in start order."""
+		return self._conditional(request, self._occurrences)
+
+	def _occurrences(self, request):
+		q = OccurrenceQuerySerializer(data=request.query_params)
+		q.is_valid(raise_exception=True)
+		q = q.validated_data
+		series = self.get_object()
+		rows = islice(recurrence.expand(series, q['start'], q['end'], series.exceptions.all()), q['limit'])
+		return Response(MeetingOccurrenceSerializer(list(rows), many=True).data)
+
+	@extend_schema(
+		methods=['POST'], request=SeriesExceptionSerializer, responses=SeriesExceptionSerializer,
+		description='Cancel or override one occurrence; replaces an earlier exception for it.',
+	)
+	@extend_schema(
+		methods=['DELETE'], request=None, responses={204: None},
+		parameters=[OpenApiParameter('original_start', str, required=True)],
+		description='Drop the exception of the occurrence scheduled at `original_start`, restoring it.',
+	)
+	@action(detail=True, methods=['post', 'delete'], url_path='exceptions')
+	def exceptions(self, request, pk=None):
+		series = self.get_object()
+		if request.method == 'DELETE':
+			try:
+				original = serializers.DateTimeField().to_internal_value(request.query_params.get('original_start', ''))
+			except serializers.ValidationError as exc:
+				raise serializers.ValidationError({'original_start': exc.detail})
+			exception = get_object_or_404(series.exceptions.all(), original_start=original)
+			SeriesExceptionSerializer.restore(series, exception)
+			return Response(status=status.HTTP_204_NO_CONTENT)
+		serializer = SeriesExceptionSerializer(data=request.data, context={'series': series})
+		serializer.is_valid(raise_exception=True)
+		_, created = serializer.upsert()
+		return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+def availability_query(params):
+	"""Validated `/api/availability/` parameters."""
+	query = AvailabilityQuerySerializer(data=params)
+	query.is_valid(raise_exception=True)
+	return query.validated_data
+
+
+def check_clients_exist(ids, found):
+	if len(found) != len(ids):
+		missing = [pk for pk in ids if pk not in found]
+		raise serializers.ValidationError({'clients': [f'Unknown client id(s): {", ".join(map(str, missing))}']})
+
+
+def availability_slot_kwargs(q):
+	return {
+		'duration': timedelta(minutes=q['duration']),
+		'limit': q['limit'],
+		'work_start': q['work_start'],
+		'work_end': q['work_end'],
+		'weekdays': q['days'],
+		'tz': q['tz'],
+		'step': timedelta(minutes=q['step']) if q.get('step') else None,
+	}
+
+
+def availability_body(q, slots, busy=None):
+	fmt = serializers.DateTimeField().to_representation
+	body = {
+		'clients': q['clients'],
+		'start': fmt(q['start']),
+		'end': fmt(q['end']),
+		'duration': q['duration'],
+		'slots': [{'start': fmt(a), 'end': fmt(b)} for a, b in slots],
+	}
+	if busy is not None:
+		body['busy'] = [{'start': fmt(a), 'end': fmt(b)} for a, b in busy]
+	return body
+
+
+class AvailabilityView(APIView):
+	"""Common free slots of one or many clients within working hours."""
+
+	@extend_schema(parameters=[AvailabilityQuerySerializer], responses=AvailabilitySerializer)
+	def get(self, request):
+		q = availability_query(request.query_params)
+		ids = q['clients']
+		check_clients_exist(ids, set(Client.objects.filter(pk__in=ids).values_list('pk', flat=True)))
+		slots = availability.find_free_slots(ids, q['start'], q['end'], **availability_slot_kwargs(q))
+		busy = availability.merged_busy(ids, q['start'], q['end']) if q['busy'] else None
+		return Response(availability_body(q, slots, busy))
+
+
+def changes_query(params):
+	"""Validated `/api/changes/` parameters."""
+	query = ChangeQuerySerializer(data=params)
+	query.is_valid(raise_exception=True)
+	return query.validated_data
+
+
+class ChangesView(APIView):
+	"""Client, meeting and series writes after `since`, oldest first (api/changes.py).
+
+	With `wait`, an empty answer is held back until an entry arrives or
+	`wait` seconds pass. This holds a worker thread; under ASGI prefer
+	`/api/async/changes/`.
+	"""
+
+	@extend_schema(parameters=[ChangeQuerySerializer], responses=ChangeFeedSerializer)
+	def get(self, request):
+		q = changes_query(request.query_params)
+		return Response(ChangeFeedSerializer(changes.wait(q.get('since'), q['limit'], q['wait'])).data)
+
 # Create your views here.
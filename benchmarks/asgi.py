@@ -0,0 +1,109 @@
+"""Concurrent read load: WSGI runserver vs. uvicorn (DRF views) vs. uvicorn async views.
+
+Seeds a throwaway SQLite file, starts each server on it in a subprocess
+and drives a fixed mix of reads (a page of one client's meetings, a
+client detail, a free-slot search) from `--concurrency` async callers,
+the way the MCP bridge fans out tool calls.
+
+    python -m benchmarks.asgi --requests 2000 --concurrency 64 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.common import SEED_START, emit, free_port, seed_sqlite, start_server, stop_server, summarize, wait_until_up
+
+SERVERS = {'wsgi-runserver': 'runserver', 'asgi-drf': 'uvicorn', 'asgi-async': 'uvicorn'}
+
+
+async def _drive(base_url, prefix, ids, total, concurrency, seed):
+	import httpx
+	rng = random.Random(seed)
+	day = {'start': SEED_START.isoformat(), 'end': (SEED_START + timedelta(days=7)).isoformat()}
+	calls = []
+	for i in range(total):
+		client_id = rng.choice(ids)
+		kind = i % 3
+		if kind == 0:
+			calls.append(('meetings_page', f'{prefix}/meetings/', {'client': client_id, 'limit': 50}))
+		elif kind == 1:
+			calls.append(('client_detail', f'{prefix}/clients/{client_id}/', {}))
+		else:
+			calls.append(('availability', f'{prefix}/availability/', {'clients': client_id, 'duration': 30, **day}))
+
+	samples = {name: [] for name, _, _ in calls[:3]}
+	errors = 0
+	queue = iter(calls)
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+	async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+		async def worker():
+			nonlocal errors
+			for name, path, params in queue:
+				started = time.perf_counter()
+				response = await client.get(path, params=params)
+				samples[name].append(time.perf_counter() - started)
+				if response.status_code != 200:
+					errors += 1
+
+		started = time.perf_counter()
+		await asyncio.gather(*(worker() for _ in range(concurrency)))
+		elapsed = time.perf_counter() - started
+
+	every = [s for values in samples.values() for s in values]
+	return {
+		'requests': total,
+		'errors': errors,
+		'elapsed_s': round(elapsed, 3),
+		'requests_per_s': round(total / elapsed, 1),
+		'all': summarize(every),
+		**{name: summarize(values) for name, values in samples.items()},
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--requests', type=int, default=2000)
+	parser.add_argument('--concurrency', type=int, default=64)
+	parser.add_argument('--workers', type=int, default=4, help='uvicorn worker processes')
+	parser.add_argument('--clients', type=int, default=200)
+	parser.add_argument('--meetings-per-client', type=int, default=100)
+	parser.add_argument('--modes', nargs='+', default=['wsgi-runserver', 'asgi-drf', 'asgi-async'])
+	parser.add_argument('--seed', type=int, default=42)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as tmp:
+		db_path = Path(tmp) / 'bench.sqlite3'
+		ids = seed_sqlite(db_path, args.clients, args.meetings_per_client)
+		env = {**os.environ, 'SCHEDULER_DB_PATH': str(db_path), 'DJANGO_SETTINGS_MODULE': 'scheduler.settings'}
+		results = {}
+		for mode in args.modes:
+			port = free_port()
+			base_url = f'http://127.0.0.1:{port}'
+			server = start_server(SERVERS[mode], port, env, workers=args.workers)
+			try:
+				asyncio.run(wait_until_up(f'{base_url}/api/clients/?limit=1'))
+				prefix = '/api/async' if mode == 'asgi-async' else '/api'
+				# Warm up connections, imports and the page cache before measuring
+				asyncio.run(_drive(base_url, prefix, ids, min(200, args.requests), args.concurrency, args.seed + 1))
+				results[mode] = asyncio.run(_drive(base_url, prefix, ids, args.requests, args.concurrency, args.seed))
+			finally:
+				stop_server(server)
+
+	emit({
+		'benchmark': 'asgi',
+		'concurrency': args.concurrency,
+		'workers': args.workers,
+		'data': {'clients': args.clients, 'meetings_per_client': args.meetings_per_client},
+		'results': results,
+	}, args.output)
+
+
+if __name__ == '__main__':
+	main()
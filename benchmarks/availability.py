@@ -0,0 +1,70 @@
+"""Free-slot search latency across many clients.
+
+Seeds `--clients` clients with `--per-day` non-overlapping meetings per
+working day over `--days` days, then times `find_free_slots` for a single
+client and for every client at once, plus the full merged busy timeline.
+
+    python -m benchmarks.availability --clients 1000 --days 31
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import emit, scratch_database, setup_django, summarize, timed
+
+
+def seed(clients, days, per_day, rng):
+	from api.models import Client, Meeting
+	Client.objects.bulk_create([Client(name=f'c{i}', email=f'c{i}@example.test') for i in range(clients)])
+	ids = list(Client.objects.values_list('pk', flat=True))
+	base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+	batch = []
+	for client_id in ids:
+		for d in range(days):
+			day = base + timedelta(days=d)
+			if day.weekday() >= 5:
+				continue
+			# per_day meetings at distinct half-hour marks between 08:00 and 18:00
+			for mark in sorted(rng.sample(range(20), per_day)):
+				start = day + timedelta(hours=8, minutes=30 * mark)
+				batch.append(Meeting(client_id=client_id, title='m', start_time=start, end_time=start + timedelta(minutes=30)))
+		if len(batch) >= 10000:
+			Meeting.objects.bulk_create(batch)
+			batch = []
+	Meeting.objects.bulk_create(batch)
+	return ids, base
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--clients', type=int, default=1000)
+	parser.add_argument('--days', type=int, default=31)
+	parser.add_argument('--per-day', type=int, default=2, help='Meetings per client per working day')
+	parser.add_argument('--duration', type=int, default=30, help='Slot length in minutes')
+	parser.add_argument('--limit', type=int, default=5)
+	parser.add_argument('--repeat', type=int, default=20)
+	parser.add_argument('--seed', type=int, default=42)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	from api.availability import find_free_slots, merged_busy
+	with scratch_database():
+		rng = random.Random(args.seed)
+		ids, base = seed(args.clients, args.days, args.per_day, rng)
+		end = base + timedelta(days=args.days)
+		duration = timedelta(minutes=args.duration)
+		report = {
+			'benchmark': 'availability',
+			'clients': args.clients,
+			'days': args.days,
+			'meetings': args.clients * args.per_day * sum(1 for d in range(args.days) if (base + timedelta(days=d)).weekday() < 5),
+			'single_client': summarize(timed(lambda: find_free_slots([rng.choice(ids)], base, end, duration, args.limit), args.repeat)),
+			'all_clients': summarize(timed(lambda: find_free_slots(ids, base, end, duration, args.limit), args.repeat)),
+			'all_clients_busy_timeline': summarize(timed(lambda: merged_busy(ids, base, end), max(1, args.repeat // 4))),
+		}
+	emit(report, args.output)
+
+
+if __name__ == '__main__':
+	main()
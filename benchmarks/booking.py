@@ -0,0 +1,121 @@
+"""Concurrent booking throughput and correctness.
+
+Runs the same workload twice: once with every booking behind a single
+process-wide lock (the old "serialize all writes" workaround) and once
+through the per-client locking in api/booking.py. Each thread books its
+own stream of slots and every tenth request deliberately collides with
+another thread's slot for the same client.
+
+    python -m benchmarks.booking --threads 8 --clients 4 --bookings 200
+"""
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import emit, scratch_database, setup_django, summarize
+
+
+def run(mode, threads, clients, bookings):
+	from django.db import connection
+	from rest_framework.exceptions import ValidationError
+	from api.models import Client, Meeting
+	from api.serializers import MeetingSerializer
+
+	Meeting.objects.all().delete()
+	Client.objects.all().delete()
+	ids = [Client.objects.create(name=f'{mode}-{i}', email=f'{mode}-{i}@example.test').pk for i in range(clients)]
+	base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+	global_lock = threading.Lock()
+	samples, outcomes = [], {'created': 0, 'rejected': 0, 'rejected_under_lock': 0, 'errors': 0}
+	tally = threading.Lock()
+	barrier = threading.Barrier(threads)
+
+	def book(client_id, start):
+		s = MeetingSerializer(data={
+			'client': client_id, 'title': 'bench',
+			'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat(),
+		})
+		if s.is_valid():
+			s.save()
+			return True
+		return False
+
+	def worker(t):
+		client_id = ids[t % clients]
+		barrier.wait()
+		try:
+			for k in range(bookings):
+				# Threads sharing a client use disjoint slots, except every
+				# tenth booking which reuses the slot of thread 0.
+				slot = k * threads + (0 if k % 10 == 9 else t)
+				start = base + timedelta(hours=slot)
+				began = time.perf_counter()
+				try:
+					if mode == 'global':
+						with global_lock:
+							ok = book(client_id, start)
+					else:
+						ok = book(client_id, start)
+					key = 'created' if ok else 'rejected'
+				except ValidationError:
+					# Passed validate() but lost the race at the locked re-check
+					key = 'rejected_under_lock'
+				except Exception:
+					key = 'errors'
+				with tally:
+					samples.append(time.perf_counter() - began)
+					outcomes[key] += 1
+		finally:
+			connection.close()
+
+	started = time.perf_counter()
+	pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+	for t in pool:
+		t.start()
+	for t in pool:
+		t.join()
+	elapsed = time.perf_counter() - started
+
+	overlaps = 0
+	for client_id in ids:
+		prev_end = None
+		for start, end in Meeting.objects.filter(client_id=client_id).order_by('start_time').values_list('start_time', 'end_time'):
+			if prev_end is not None and start < prev_end:
+				overlaps += 1
+			prev_end = end
+	return {
+		'mode': mode,
+		'elapsed_s': round(elapsed, 3),
+		'bookings_per_s': round(len(samples) / elapsed, 1),
+		'outcomes': outcomes,
+		'overlapping_pairs': overlaps,
+		'latency': summarize(samples),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--threads', type=int, default=8)
+	parser.add_argument('--clients', type=int, default=4)
+	parser.add_argument('--bookings', type=int, default=200, help='Bookings per thread')
+	parser.add_argument('--journal-mode', help='SQLite journal mode for the scratch DB, e.g. WAL')
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	with scratch_database() as connection:
+		if args.journal_mode and connection.vendor == 'sqlite':
+			with connection.cursor() as cursor:
+				cursor.execute(f'PRAGMA journal_mode={args.journal_mode}')
+		results = [run(mode, args.threads, args.clients, args.bookings) for mode in ('global', 'per-client')]
+	emit({
+		'benchmark': 'booking', 'threads': args.threads, 'clients': args.clients,
+		'journal_mode': args.journal_mode, 'results': results,
+	}, args.output)
+	if any(r['overlapping_pairs'] for r in results):
+		raise SystemExit('overlapping meetings detected')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,148 @@
+"""Shared helpers for the benchmark scripts in this folder.
+
+Scripts run from the repo root, e.g. `python -m benchmarks.overlap`, and
+print a JSON report so runs can be diffed between commits.
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# Monday; seeded meetings start here, every 3 hours
+SEED_START = datetime(2030, 1, 7, tzinfo=timezone.utc)
+SEED_TITLES = ('Standup', 'Planning', 'Review', 'Demo', 'Retro', 'Sync')
+
+
+def setup_django():
+	if str(ROOT_DIR) not in sys.path:
+		sys.path.insert(0, str(ROOT_DIR))
+	os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scheduler.settings')
+	import django
+	django.setup()
+
+
+@contextmanager
+def scratch_database(keepdb=False):
+	"""Create (and afterwards destroy) a migrated test database for the run."""
+	from django.db import connection
+	old_name = connection.settings_dict['NAME']
+	connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+	try:
+		yield connection
+	finally:
+		connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def seed_sqlite(db_path, clients, meetings_per_client):
+	"""Migrate the SQLite file `db_path` and fill it; returns the client ids.
+
+	Points this process's Django at the file (`SCHEDULER_DB_PATH`), so call
+	it before anything else sets Django up.
+	"""
+	os.environ['SCHEDULER_DB_PATH'] = str(db_path)
+	setup_django()
+	from django.core.management import call_command
+	from api.models import Client, Meeting
+	call_command('migrate', verbosity=0)
+	Client.objects.bulk_create(
+		[Client(name=f'Client {i}', email=f'c{i}@example.test') for i in range(clients)], batch_size=5000,
+	)
+	ids = list(Client.objects.values_list('pk', flat=True))
+	batch = []
+	for client_id in ids:
+		for k in range(meetings_per_client):
+			start = SEED_START + timedelta(hours=3 * k)
+			batch.append(Meeting(
+				client_id=client_id, title=f'{SEED_TITLES[k % len(SEED_TITLES)]} {k}',
+				start_time=start, end_time=start + timedelta(hours=1),
+			))
+			if len(batch) >= 5000:
+				Meeting.objects.bulk_create(batch)
+				batch = []
+	Meeting.objects.bulk_create(batch)
+	return ids
+
+
+def free_port():
+	with socket.socket() as s:
+		s.bind(('127.0.0.1', 0))
+		return s.getsockname()[1]
+
+
+def start_server(kind, port, env, workers=1):
+	"""Start `runserver`, `uvicorn` (the Django ASGI app) or `mcp` (the MCP bridge) on `port`."""
+	if kind == 'runserver':
+		cmd = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload']
+	else:
+		app = 'mcp_server.server:app' if kind == 'mcp' else 'scheduler.asgi:application'
+		cmd = [
+			sys.executable, '-m', 'uvicorn', app,
+			'--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning',
+		]
+	return subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop_server(process):
+	process.terminate()
+	process.wait(timeout=30)
+
+
+async def wait_until_up(url, timeout=30):
+	"""Poll `url` until it answers with a 2xx."""
+	import httpx
+	deadline = time.monotonic() + timeout
+	async with httpx.AsyncClient() as client:
+		while time.monotonic() < deadline:
+			try:
+				if (await client.get(url)).is_success:
+					return
+			except httpx.TransportError:
+				pass
+			await asyncio.sleep(0.2)
+	raise RuntimeError(f'{url} did not come up within {timeout}s')
+
+
+def percentile(sorted_samples, pct):
+	if not sorted_samples:
+		return 0.0
+	k = (len(sorted_samples) - 1) * pct / 100
+	lo = int(k)
+	hi = min(lo + 1, len(sorted_samples) - 1)
+	return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def summarize(samples):
+	"""Latency summary in milliseconds for a list of durations in seconds."""
+	ordered = sorted(s * 1000 for s in samples)
+	return {
+		'count': len(ordered),
+		'mean_ms': round(statistics.fmean(ordered), 4) if ordered else 0.0,
+		'p50_ms': round(percentile(ordered, 50), 4),
+		'p95_ms': round(percentile(ordered, 95), 4),
+		'p99_ms': round(percentile(ordered, 99), 4),
+		'max_ms': round(ordered[-1], 4) if ordered else 0.0,
+	}
+
+
+def timed(fn, repeat):
+	samples = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		fn()
+		samples.append(time.perf_counter() - started)
+	return samples
+
+
+def emit(report, output=None):
+	text = json.dumps(report, indent=2, default=str)
+	if output:
+		Path(output).write_text(text + '\n', encoding='utf-8')
+	print(text)
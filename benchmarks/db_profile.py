@@ -0,0 +1,123 @@
+"""Concurrent write throughput: the default SQLite setup vs. SCHEDULER_DB_PROFILE=performance.
+
+Seeds a throwaway SQLite file, then for each profile starts uvicorn
+(`--workers` processes) on its own copy and drives `--concurrency`
+async callers creating meetings and clients, the way the MCP bridge
+fans out batch tool calls. Every write is a separate transaction, so
+the default rollback journal pays for its fsyncs and lock retries;
+`errors` counts failed writes (with the default profile mostly
+"database is locked" after SQLite's 5 second busy timeout).
+
+    python -m benchmarks.db_profile --requests 2000 --concurrency 32 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.common import SEED_START, emit, free_port, seed_sqlite, start_server, stop_server, summarize, wait_until_up
+
+PROFILES = ('default', 'performance')
+
+
+async def _drive(base_url, ids, total, concurrency, offset):
+	import httpx
+	calls = []
+	for i in range(offset, offset + total):
+		if i % 4 == 3:
+			calls.append(('create_client', '/api/clients/', {'name': f'Bench {i}', 'email': f'bench{i}@example.test'}))
+		else:
+			# One slot per request, after the seeded meetings: never overlaps
+			start = SEED_START + timedelta(days=400, hours=i)
+			calls.append(('create_meeting', '/api/meetings/', {
+				'client': ids[i % len(ids)], 'title': 'Bench',
+				'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat(),
+			}))
+
+	samples = {name: [] for name in ('create_meeting', 'create_client')}
+	statuses = {}
+	queue = iter(calls)
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+	async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+		async def worker():
+			for name, path, body in queue:
+				started = time.perf_counter()
+				response = await client.post(path, json=body)
+				samples[name].append(time.perf_counter() - started)
+				statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+		started = time.perf_counter()
+		await asyncio.gather(*(worker() for _ in range(concurrency)))
+		elapsed = time.perf_counter() - started
+
+	every = [s for values in samples.values() for s in values]
+	created = statuses.get(201, 0)
+	return {
+		'requests': total,
+		'created': created,
+		'errors': total - created,
+		'statuses': {str(code): count for code, count in sorted(statuses.items())},
+		'elapsed_s': round(elapsed, 3),
+		'writes_per_s': round(created / elapsed, 1),
+		'all': summarize(every),
+		**{name: summarize(values) for name, values in samples.items()},
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--requests', type=int, default=2000)
+	parser.add_argument('--concurrency', type=int, default=32)
+	parser.add_argument('--workers', type=int, default=4, help='uvicorn worker processes')
+	parser.add_argument('--clients', type=int, default=200)
+	parser.add_argument('--meetings-per-client', type=int, default=100)
+	parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+	parser.add_argument('--dir', help='Directory for the database files (default: the system temp dir); fsync costs depend on its disk')
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	# The seed file must start out untuned: WAL would stick to every copy
+	os.environ['SCHEDULER_DB_PROFILE'] = 'default'
+	with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+		seeded = Path(tmp) / 'seed.sqlite3'
+		ids = seed_sqlite(seeded, args.clients, args.meetings_per_client)
+		from django.db import connection
+		connection.close()
+		results = {}
+		for profile in args.profiles:
+			db_path = Path(tmp) / f'{profile}.sqlite3'
+			shutil.copyfile(seeded, db_path)
+			env = {
+				**os.environ, 'SCHEDULER_DB_PATH': str(db_path), 'SCHEDULER_DB_PROFILE': profile,
+				'DJANGO_SETTINGS_MODULE': 'scheduler.settings',
+			}
+			port = free_port()
+			base_url = f'http://127.0.0.1:{port}'
+			server = start_server('uvicorn', port, env, workers=args.workers)
+			try:
+				asyncio.run(wait_until_up(f'{base_url}/api/clients/?limit=1'))
+				warmup = min(200, args.requests)
+				asyncio.run(_drive(base_url, ids, warmup, args.concurrency, 0))
+				results[profile] = asyncio.run(_drive(base_url, ids, args.requests, args.concurrency, warmup))
+			finally:
+				stop_server(server)
+			with sqlite3.connect(db_path) as db:
+				results[profile]['journal_mode'] = db.execute('PRAGMA journal_mode').fetchone()[0]
+
+	emit({
+		'benchmark': 'db_profile',
+		'concurrency': args.concurrency,
+		'workers': args.workers,
+		'data': {'clients': args.clients, 'meetings_per_client': args.meetings_per_client},
+		'results': results,
+	}, args.output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,195 @@
+"""Load test of the REST API and the MCP tools: throughput and latency percentiles.
+
+By default seeds `--clients` x `--meetings-per-client` into a throwaway
+SQLite file and starts the API (`--server uvicorn|runserver`) and the MCP
+bridge on it. `--api-base` / `--mcp-url` target servers that are already
+running instead (nothing is seeded; client ids are read from the API).
+
+Each scenario runs `--requests` operations from `--concurrency` callers:
+
+- rest: `/api/clients/` (search, ordering) and `/api/meetings/` (by
+  client, date range, title, ordering, first page), one shared pool;
+- mcp: `list_clients`, `list_meetings` and `find_free_slots` over
+  Streamable HTTP, one MCP session per caller.
+
+    python -m benchmarks.load --clients 1000 --meetings-per-client 50 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, nullcontext
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.common import SEED_START, emit, free_port, seed_sqlite, start_server, stop_server, summarize, wait_until_up
+
+WEEK = {'start': SEED_START.isoformat(), 'end': (SEED_START + timedelta(days=7)).isoformat()}
+
+
+def rest_ops(ids, total, seed):
+	rng = random.Random(seed)
+	ops = []
+	for i in range(total):
+		client_id = rng.choice(ids)
+		ops.append([
+			('clients_page', '/clients/', {'limit': 50, 'ordering': 'name'}),
+			('clients_search', '/clients/', {'search': f'Client {client_id % 100}', 'limit': 20}),
+			('meetings_by_client', '/meetings/', {'client': client_id, 'limit': 50}),
+			('meetings_week', '/meetings/', {**WEEK, 'limit': 100, 'ordering': '-start_time'}),
+			('meetings_by_title', '/meetings/', {'title': 'Review 2', 'limit': 50}),
+			('meetings_page', '/meetings/', {'limit': 100}),
+		][i % 6])
+	return ops
+
+
+def mcp_ops(ids, total, seed):
+	rng = random.Random(seed)
+	ops = []
+	for i in range(total):
+		client_id = rng.choice(ids)
+		ops.append([
+			('list_clients', 'list_clients', {'search': f'Client {client_id % 100}', 'limit': 20}),
+			('list_meetings', 'list_meetings', {'client_id': client_id, 'limit': 50}),
+			('find_free_slots', 'find_free_slots', {'client_ids': [client_id], **WEEK}),
+		][i % 3])
+	return ops
+
+
+async def drive(ops, concurrency, open_caller):
+	"""Run `ops` from `concurrency` callers; `open_caller()` yields one caller's `call(target, args)`."""
+	samples = defaultdict(list)
+	errors = Counter()
+	queue = iter(ops)
+	ready = asyncio.Barrier(concurrency + 1)
+
+	async def caller():
+		async with open_caller() as call:
+			await ready.wait()
+			for name, target, args in queue:
+				started = time.perf_counter()
+				try:
+					ok = await call(target, args)
+				except Exception:
+					ok = False
+				samples[name].append(time.perf_counter() - started)
+				if not ok:
+					errors[name] += 1
+
+	tasks = [asyncio.create_task(caller()) for _ in range(concurrency)]
+	# Sessions and connections are opened before the clock starts
+	await ready.wait()
+	started = time.perf_counter()
+	await asyncio.gather(*tasks)
+	elapsed = time.perf_counter() - started
+	every = [s for values in samples.values() for s in values]
+	return {
+		'requests': len(every),
+		'errors': sum(errors.values()),
+		'elapsed_s': round(elapsed, 3),
+		'requests_per_s': round(len(every) / elapsed, 1),
+		'latency': {'all': summarize(every), **{name: summarize(values) for name, values in samples.items()}},
+		**({'errors_by_op': dict(errors)} if errors else {}),
+	}
+
+
+async def run_rest(api_base, ops, concurrency):
+	import httpx
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+	async with httpx.AsyncClient(base_url=api_base, limits=limits, timeout=60) as client:
+		async def call(path, params):
+			return (await client.get(path, params=params)).status_code == 200
+
+		return await drive(ops, concurrency, lambda: nullcontext(call))
+
+
+async def run_mcp(mcp_url, ops, concurrency):
+	from mcp import ClientSession
+	from mcp.client.streamable_http import streamablehttp_client
+
+	@asynccontextmanager
+	async def session():
+		async with streamablehttp_client(mcp_url, timeout=60) as (read, write, _):
+			async with ClientSession(read, write) as s:
+				await s.initialize()
+
+				async def call(tool, args):
+					return not (await s.call_tool(tool, arguments=args)).isError
+
+				yield call
+
+	return await drive(ops, concurrency, session)
+
+
+async def client_ids(api_base):
+	import httpx
+	async with httpx.AsyncClient(base_url=api_base, timeout=60) as client:
+		r = await client.get('/clients/', params={'fields': 'id', 'limit': 1000})
+		r.raise_for_status()
+		return [row['id'] for row in r.json()['results']]
+
+
+def run(args, api_base, mcp_url, ids):
+	scenarios = {'rest': (rest_ops, run_rest, api_base), 'mcp': (mcp_ops, run_mcp, mcp_url)}
+	results = {}
+	for name in args.scenarios:
+		make_ops, runner, target = scenarios[name]
+		asyncio.run(runner(target, make_ops(ids, min(100, args.requests), args.seed + 1), args.concurrency))
+		results[name] = asyncio.run(runner(target, make_ops(ids, args.requests, args.seed), args.concurrency))
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--scenarios', nargs='+', choices=['rest', 'mcp'], default=['rest', 'mcp'])
+	parser.add_argument('--requests', type=int, default=1200, help='Operations per scenario')
+	parser.add_argument('--concurrency', type=int, default=16)
+	parser.add_argument('--clients', type=int, default=1000)
+	parser.add_argument('--meetings-per-client', type=int, default=50)
+	parser.add_argument('--server', choices=['uvicorn', 'runserver'], default='uvicorn')
+	parser.add_argument('--workers', type=int, default=1, help='uvicorn workers for the API')
+	parser.add_argument('--mcp-cache-ttl', type=float, default=0, help='MCP_CACHE_TTL of the started bridge')
+	parser.add_argument('--api-base', help='Use this running API instead of starting one')
+	parser.add_argument('--mcp-url', help='Use this running MCP endpoint instead of starting one')
+	parser.add_argument('--seed', type=int, default=42)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	config = {
+		'scenarios': args.scenarios, 'requests': args.requests, 'concurrency': args.concurrency,
+		'server': args.server, 'workers': args.workers, 'mcp_cache_ttl': args.mcp_cache_ttl,
+	}
+	processes = []
+	with tempfile.TemporaryDirectory() as tmp:
+		try:
+			if args.api_base:
+				api_base = args.api_base.rstrip('/')
+				ids = asyncio.run(client_ids(api_base))
+				config['data'] = {'api_base': api_base}
+			else:
+				ids = seed_sqlite(Path(tmp) / 'load.sqlite3', args.clients, args.meetings_per_client)
+				config['data'] = {'clients': args.clients, 'meetings_per_client': args.meetings_per_client}
+				port = free_port()
+				api_base = f'http://127.0.0.1:{port}/api'
+				processes.append(start_server(args.server, port, dict(os.environ), workers=args.workers))
+				asyncio.run(wait_until_up(f'{api_base}/clients/?limit=1'))
+			mcp_url = args.mcp_url
+			if mcp_url is None and 'mcp' in args.scenarios:
+				port = free_port()
+				env = {**os.environ, 'SCHEDULER_API_BASE': api_base, 'MCP_CACHE_TTL': str(args.mcp_cache_ttl)}
+				processes.append(start_server('mcp', port, env))
+				asyncio.run(wait_until_up(f'http://127.0.0.1:{port}/health'))
+				mcp_url = f'http://127.0.0.1:{port}/mcp'
+			results = run(args, api_base, mcp_url, ids)
+		finally:
+			for process in processes:
+				stop_server(process)
+
+	emit({'benchmark': 'load', **config, 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+	main()
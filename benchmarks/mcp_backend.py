@@ -0,0 +1,105 @@
+"""Per-call latency of MCP tools: HTTP backend vs. the embedded Django app.
+
+Seeds a throwaway SQLite file and calls the bridge's tools one at a time,
+first through `SCHEDULER_BACKEND=http` against a local server on that file
+(runserver and uvicorn), then with `SCHEDULER_BACKEND=embedded` in this
+process. The tool cache and ETag revalidation are off, so every call
+reaches Django.
+
+    python -m benchmarks.mcp_backend --calls 300
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.common import SEED_START, emit, free_port, seed_sqlite, start_server, stop_server, summarize, wait_until_up
+
+
+def _calls(ids, total, seed):
+	rng = random.Random(seed)
+	end = (SEED_START + timedelta(days=7)).isoformat()
+	calls = []
+	for i in range(total):
+		client_id = rng.choice(ids)
+		kind = i % 3
+		if kind == 0:
+			calls.append(('list_meetings', 'list_meetings', {'client_id': client_id, 'limit': 50}))
+		elif kind == 1:
+			calls.append(('list_clients', 'list_clients', {'limit': 20}))
+		else:
+			calls.append(('find_free_slots', 'find_free_slots', {'client_ids': [client_id], 'start': SEED_START.isoformat(), 'end': end}))
+	return calls
+
+
+async def _drive(server, calls):
+	samples = {name: [] for name, _, _ in calls[:3]}
+	try:
+		for name, tool, kwargs in calls:
+			started = time.perf_counter()
+			await getattr(server, tool)(**kwargs)
+			samples[name].append(time.perf_counter() - started)
+	finally:
+		await server._close_client()
+	every = [s for values in samples.values() for s in values]
+	return {'all': summarize(every), **{name: summarize(values) for name, values in samples.items()}}
+
+
+def _run(server, backend, base, calls, warmup):
+	from mcp_server.cache import ToolCache, ValidatorCache
+	with mock.patch.multiple(
+		server, BACKEND=backend, SCHEDULER_API_BASE=base, _http=None,
+		tool_cache=ToolCache(ttl=0), validators=ValidatorCache(maxsize=0),
+	):
+		asyncio.run(_drive(server, warmup))
+		return asyncio.run(_drive(server, calls))
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--calls', type=int, default=300)
+	parser.add_argument('--clients', type=int, default=200)
+	parser.add_argument('--meetings-per-client', type=int, default=100)
+	parser.add_argument('--modes', nargs='+', default=['http-runserver', 'http-uvicorn', 'embedded'])
+	parser.add_argument('--seed', type=int, default=42)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as tmp:
+		db_path = Path(tmp) / 'bench.sqlite3'
+		ids = seed_sqlite(db_path, args.clients, args.meetings_per_client)
+		from django.test.utils import override_settings
+		from mcp_server import server
+		env = {**os.environ, 'SCHEDULER_DB_PATH': str(db_path), 'DJANGO_SETTINGS_MODULE': 'scheduler.settings'}
+		calls = _calls(ids, args.calls, args.seed)
+		warmup = _calls(ids, min(30, args.calls), args.seed + 1)
+		results = {}
+		for mode in args.modes:
+			if mode == 'embedded':
+				with override_settings(ALLOWED_HOSTS=['localhost']):
+					results[mode] = _run(server, 'embedded', 'http://localhost/api', calls, warmup)
+				continue
+			port = free_port()
+			base_url = f'http://127.0.0.1:{port}'
+			process = start_server('runserver' if mode == 'http-runserver' else 'uvicorn', port, env)
+			try:
+				asyncio.run(wait_until_up(f'{base_url}/api/clients/?limit=1'))
+				results[mode] = _run(server, 'http', f'{base_url}/api', calls, warmup)
+			finally:
+				stop_server(process)
+
+	emit({
+		'benchmark': 'mcp_backend',
+		'calls': args.calls,
+		'data': {'clients': args.clients, 'meetings_per_client': args.meetings_per_client},
+		'results': results,
+	}, args.output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,80 @@
+"""Daily occupancy of one client: summary rows vs. adding up its meetings.
+
+For each history size one client gets that many meetings, eight per
+working day from 2030 on, and the busy time per day of a month and of a
+year is computed twice: from the `ClientDailyOccupancy` rows
+(api/occupancy.py) and by reading the window's meetings, as a caller of
+`/api/meetings/` would. `rebuild` is the time to recompute the rows.
+
+    python -m benchmarks.occupancy --sizes 1000 10000 100000
+"""
+import argparse
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from benchmarks.common import SEED_START, emit, scratch_database, setup_django, summarize, timed
+
+
+def _meetings(client, count):
+	from api.models import Meeting
+	rows, day = [], SEED_START
+	while len(rows) < count:
+		if day.weekday() < 5:
+			for hour in range(9, 17):
+				start = day + timedelta(hours=hour)
+				rows.append(Meeting(client=client, title='m', start_time=start, end_time=start + timedelta(minutes=45)))
+		day += timedelta(days=1)
+	return rows[:count]
+
+
+def _scan(client, first, last):
+	"""Busy seconds per day from the meetings themselves."""
+	from api.models import Meeting
+	from api.occupancy import ONE_DAY, midnight, split
+	start, end = midnight(first), midnight(last + ONE_DAY)
+	days = defaultdict(int)
+	for begin, finish in Meeting.objects.filter(client=client, start_time__lt=end, end_time__gt=start).values_list('start_time', 'end_time'):
+		for day, seconds in split(max(begin, start), min(finish, end)):
+			days[day] += seconds
+	return days
+
+
+def run(sizes, repeat):
+	from api import occupancy
+	from api.models import Client, Meeting
+
+	results = []
+	for size in sizes:
+		client = Client.objects.create(name=f'Client {size}', email=f'c{size}@example.test')
+		Meeting.objects.bulk_create(_meetings(client, size), batch_size=5000)
+		started = time.perf_counter()
+		occupancy.rebuild([client.pk])
+		row = {'meetings': size, 'rebuild_s': round(time.perf_counter() - started, 4)}
+		# The last weeks of the client's history
+		last = (Meeting.objects.filter(client=client).order_by('-start_time').values_list('start_time', flat=True)[0]).date()
+		for label, days in (('month', 31), ('year', 366)):
+			first = max(last - timedelta(days=days - 1), date(2030, 1, 1))
+			row[label] = {
+				'summary': summarize(timed(lambda: occupancy.summary(client, first, last), repeat)),
+				'scan': summarize(timed(lambda: _scan(client, first, last), repeat)),
+			}
+		results.append(row)
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Meetings of the client')
+	parser.add_argument('--repeat', type=int, default=50)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	with scratch_database():
+		results = run(args.sizes, args.repeat)
+	emit({'benchmark': 'occupancy', 'repeat': args.repeat, 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,84 @@
+"""Booking-validation latency as one client's meeting history grows.
+
+Compares the indexed probe in api/overlap.py with the previous
+`Meeting.overlaps` range filter at each history size.
+
+    python -m benchmarks.overlap --sizes 1000 10000 100000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import emit, scratch_database, setup_django, summarize, timed
+
+
+def _fill(client, count, base):
+	from api.models import Meeting
+	batch = []
+	for i in range(count):
+		start = base + timedelta(hours=i)
+		batch.append(Meeting(client=client, title=f'm{i}', start_time=start, end_time=start + timedelta(minutes=30)))
+		if len(batch) >= 5000:
+			Meeting.objects.bulk_create(batch)
+			batch = []
+	Meeting.objects.bulk_create(batch)
+
+
+def run(sizes, repeat, seed):
+	from api.models import Client, Meeting
+	from api.overlap import has_overlap
+	from api.serializers import MeetingSerializer
+
+	rng = random.Random(seed)
+	base = datetime(2020, 1, 1, tzinfo=timezone.utc)
+	results = []
+	for size in sizes:
+		client = Client.objects.create(name=f'bench-{size}', email=f'bench-{size}@example.test')
+		_fill(client, size, base)
+
+		def window():
+			# Probes fall in the free half hour after a random meeting: the
+			# successful-booking case, where a range scan cannot stop early.
+			start = base + timedelta(hours=rng.randrange(size), minutes=40)
+			return start, start + timedelta(minutes=15)
+
+		def indexed():
+			start, end = window()
+			has_overlap(client, start, end)
+
+		def legacy():
+			start, end = window()
+			Meeting.overlaps(Meeting.objects.filter(client=client), start, end)
+
+		def booking():
+			start, end = window()
+			MeetingSerializer(data={
+				'client': client.pk, 'title': 'probe',
+				'start_time': start.isoformat(), 'end_time': end.isoformat(),
+			}).is_valid()
+
+		results.append({
+			'history': size,
+			'indexed_probe': summarize(timed(indexed, repeat)),
+			'legacy_range_filter': summarize(timed(legacy, repeat)),
+			'serializer_validate': summarize(timed(booking, repeat)),
+		})
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+	parser.add_argument('--repeat', type=int, default=500)
+	parser.add_argument('--seed', type=int, default=42)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	with scratch_database():
+		results = run(args.sizes, args.repeat, args.seed)
+	emit({'benchmark': 'overlap', 'repeat': args.repeat, 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,98 @@
+"""Queries and latency of every route as the data grows.
+
+Replays `api.querybudget.ENDPOINTS` against `build_dataset()` at each scale
+(clients x meetings per client). A query count that changes with the scale
+is an N+1 and is listed under `growing`; counts over the endpoint's budget
+are listed under `over_budget`. Writes are rolled back after each request.
+
+    python -m benchmarks.queries --scales 10x20 100x100 1000x100 --repeat 5
+"""
+import argparse
+
+from benchmarks.common import emit, scratch_database, setup_django, summarize
+
+
+def _label(endpoint):
+	data = '' if endpoint.data is None or isinstance(endpoint.data, list) else f' {endpoint.data}'
+	return f'{endpoint.method} {endpoint.path}{data}'
+
+
+def _measure_scale(clients, meetings_per_client, repeat):
+	from django.contrib.auth.models import User
+	from django.db import transaction
+	from rest_framework.test import APIClient
+	from api.querybudget import ENDPOINTS, build_dataset, duplicates, measure
+
+	ids = build_dataset(clients, meetings_per_client)
+	admin = User.objects.create_superuser('admin', 'admin@example.test', 'unused')
+	results = []
+	for endpoint in ENDPOINTS:
+		client = APIClient()
+		if endpoint.admin:
+			client.force_login(admin)
+		samples = []
+		for _ in range(repeat):
+			with transaction.atomic():
+				response, statements, elapsed = measure(client, endpoint, ids)
+				transaction.set_rollback(True)
+			samples.append(elapsed)
+		results.append({
+			'status': response.status_code,
+			'queries': len(statements),
+			'repeated': duplicates(statements)[:3],
+			**summarize(samples),
+		})
+	return results
+
+
+def run(scales, repeat):
+	from api.querybudget import ENDPOINTS
+	per_scale = []
+	for clients, meetings_per_client in scales:
+		with scratch_database():
+			per_scale.append(_measure_scale(clients, meetings_per_client, repeat))
+
+	endpoints, growing, over_budget = [], [], []
+	for i, endpoint in enumerate(ENDPOINTS):
+		label = _label(endpoint)
+		rows = [
+			{'clients': c, 'meetings': c * m, **{k: scale[i][k] for k in ('status', 'queries', 'p50_ms', 'p95_ms')}}
+			for (c, m), scale in zip(scales, per_scale)
+		]
+		counts = {row['queries'] for row in rows}
+		if len(counts) > 1:
+			growing.append(label)
+		if max(counts) > endpoint.max_queries:
+			over_budget.append(label)
+		endpoints.append({
+			'endpoint': label,
+			'budget': endpoint.max_queries,
+			'scales': rows,
+			'repeated': per_scale[-1][i]['repeated'],
+		})
+	return {'growing': growing, 'over_budget': over_budget, 'endpoints': endpoints}
+
+
+def _scale(text):
+	clients, _, meetings = text.partition('x')
+	return int(clients), int(meetings or 1)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--scales', type=_scale, nargs='+', default=[(10, 20), (100, 100), (1000, 100)],
+		help='CLIENTSxMEETINGS_PER_CLIENT, smallest first (default 10x20 100x100 1000x100)')
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	from django.test.utils import setup_test_environment
+	# Lets the test client's `testserver` host through ALLOWED_HOSTS
+	setup_test_environment()
+	report = run(args.scales, args.repeat)
+	emit({'benchmark': 'queries', 'repeat': args.repeat, **report}, args.output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,112 @@
+"""Client search latency as the client table grows, indexed vs scanned.
+
+For each size the table is grown with generated people (name, email,
+phone) and the `search` filter of `/api/clients/` (first page of 100) and
+the ranked `/api/clients/search/` lookup are timed through the
+database's index backend (api/search.py) and through the `scan` fallback.
+Queries: a rare email fragment (`selective`), a common first name
+(`broad`), a short term (`short`), and a misspelled surname (`fuzzy`).
+
+    python -m benchmarks.search --sizes 100000 1000000 5000000
+"""
+import argparse
+import random
+
+from benchmarks.common import emit, scratch_database, setup_django, summarize, timed
+
+FIRST = ['Alice', 'Bruno', 'Chloe', 'Dmitri', 'Elena', 'Farah', 'Goran', 'Hana', 'Ivan', 'Jonas',
+	'Keiko', 'Liam', 'Maria', 'Nadia', 'Omar', 'Priya', 'Quinn', 'Rafael', 'Sofia', 'Tariq']
+LAST = ['Anderson', 'Baptiste', 'Castellano', 'Dubois', 'Eriksen', 'Fontaine', 'Gallagher', 'Hakimi',
+	'Ivanova', 'Jovanovic', 'Kowalski', 'Lindqvist', 'Moreau', 'Nakamura', 'Okonkwo', 'Petrov',
+	'Quintero', 'Rasmussen', 'Schneider', 'Takahashi']
+
+
+def _grow(start, stop, rng):
+	"""Insert clients start..stop-1 with raw INSERTs (the search triggers still run)."""
+	from django.db import connection, transaction
+	from django.utils import timezone
+	now = timezone.now()
+	sql = 'INSERT INTO api_client (name, email, phone, created_at) VALUES (%s, %s, %s, %s)'
+	for chunk in range(start, stop, 10000):
+		rows = []
+		for i in range(chunk, min(chunk + 10000, stop)):
+			first, last = rng.choice(FIRST), rng.choice(LAST)
+			rows.append((f'{first} {last}', f'{first}.{last}{i}@example.test'.lower(), f'+1 {rng.randrange(10**9, 10**10)}', now))
+		with transaction.atomic(), connection.cursor() as cursor:
+			cursor.executemany(sql, rows)
+
+
+def _misspell(word, rng):
+	i = rng.randrange(1, len(word) - 2)
+	return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def run(sizes, repeat, seed):
+	from django.db import connection
+	from api.models import Client
+	from api.search import BACKENDS, get_backend
+
+	rng = random.Random(seed)
+	index = get_backend()
+	scan = BACKENDS['scan']('default')
+	scans = max(repeat // 20, 3)
+	results, grown = [], 0
+	for size in sizes:
+		_grow(grown, size, rng)
+		grown = size
+		with connection.cursor() as cursor:
+			cursor.execute('ANALYZE')
+		low, high = Client.objects.order_by('pk').values_list('pk', flat=True)[0], Client.objects.order_by('-pk').values_list('pk', flat=True)[0]
+
+		def samples(kind, count):
+			"""`count` queries of `kind`, built from random clients before timing starts."""
+			made = []
+			for client in Client.objects.filter(pk__in=[rng.randint(low, high) for _ in range(count)]):
+				made.append({
+					'selective': client.email.split('@')[0][-9:],
+					'broad': rng.choice(FIRST),
+					'short': 'zz',
+					'fuzzy': _misspell(client.name.split()[1], rng),
+				}[kind])
+			return iter(made * (count // max(len(made), 1) + 1))
+
+		def filtered(backend, kind, count):
+			queries = samples(kind, count)
+			return lambda: list(backend.filter(Client.objects.order_by('pk'), next(queries).split())[:100])
+
+		def ranked(backend, kind, count):
+			queries = samples(kind, count)
+			return lambda: backend.rank(next(queries), limit=10)
+
+		row = {'clients': size, 'index_backend': index.name}
+		for kind in ('selective', 'broad', 'short'):
+			row[f'filter_{kind}'] = {
+				'index': summarize(timed(filtered(index, kind, repeat), repeat)),
+				'scan': summarize(timed(filtered(scan, kind, scans), scans)),
+			}
+		for kind in ('selective', 'fuzzy'):
+			row[f'rank_{kind}'] = {
+				'index': summarize(timed(ranked(index, kind, repeat), repeat)),
+				'scan': summarize(timed(ranked(scan, kind, scans), scans)),
+			}
+		results.append(row)
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+		help='Client counts, smallest first')
+	parser.add_argument('--repeat', type=int, default=100, help='Samples per indexed query (scans take 1/20)')
+	parser.add_argument('--seed', type=int, default=42)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	with scratch_database():
+		results = run(args.sizes, args.repeat, args.seed)
+	emit({'benchmark': 'search', 'repeat': args.repeat, 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+	main()
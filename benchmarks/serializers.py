@@ -0,0 +1,102 @@
+"""List-endpoint throughput: DRF serializers vs. the api/fastpath.py row plan.
+
+Each size is served end to end through the viewsets (query, serialization
+and JSON rendering) with `API_FAST_LIST` off and on, for the full payload
+and for the sparse fieldset the MCP bridge requests.
+
+    python -m benchmarks.serializers --sizes 10000 100000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import emit, scratch_database, setup_django
+
+# What mcp_server's list_meetings requests (the fields of MeetingOut)
+MEETING_FIELDS = 'id,client,title,start_time,end_time,location,notes,created_at'
+
+
+def _fill(ids, first, last):
+	from api.models import Meeting
+	base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+	batch = []
+	for i in range(first, last):
+		start = base + timedelta(minutes=30 * i)
+		batch.append(Meeting(
+			client_id=ids[i % len(ids)], title=f'Meeting {i}', location='Room 1',
+			notes='Agenda: review, planning, follow-ups.', start_time=start, end_time=start + timedelta(minutes=25),
+		))
+		if len(batch) >= 5000:
+			Meeting.objects.bulk_create(batch)
+			batch = []
+	Meeting.objects.bulk_create(batch)
+
+
+def _serve(view, path, repeat):
+	from django.test import override_settings
+	from rest_framework.response import Response
+	from rest_framework.test import APIRequestFactory
+	factory = APIRequestFactory()
+	report = {}
+	for mode, enabled in (('drf', False), ('fast', True)):
+		samples = []
+		with override_settings(API_FAST_LIST=enabled):
+			for _ in range(repeat):
+				started = time.perf_counter()
+				response = view(factory.get(path))
+				if isinstance(response, Response):
+					response.render()
+				samples.append(time.perf_counter() - started)
+		rows = len(response.data)
+		best = min(samples)
+		report[mode] = {
+			'rows': rows,
+			'bytes': len(response.content),
+			'best_s': round(best, 4),
+			'rows_per_s': round(rows / best),
+		}
+	report['speedup'] = round(report['fast']['rows_per_s'] / report['drf']['rows_per_s'], 2)
+	return report
+
+
+def run(sizes, clients, repeat):
+	from api.models import Client
+	from api.views import ClientViewSet, MeetingViewSet
+	meetings = MeetingViewSet.as_view({'get': 'list'})
+	client_list = ClientViewSet.as_view({'get': 'list'})
+	Client.objects.bulk_create(
+		[Client(name=f'Client {i}', email=f'c{i}@example.test', phone='+1 555 0100') for i in range(clients)],
+		batch_size=5000,
+	)
+	ids = list(Client.objects.values_list('pk', flat=True))
+	results = []
+	filled = 0
+	for size in sorted(sizes):
+		# The table only grows, so each size reuses the rows of the previous one
+		_fill(ids, filled, size)
+		filled = size
+		results.append({
+			'meetings': size,
+			'full': _serve(meetings, '/api/meetings/', repeat),
+			'mcp_fields': _serve(meetings, f'/api/meetings/?fields={MEETING_FIELDS}', repeat),
+		})
+	results.append({'clients': clients, 'full': _serve(client_list, '/api/clients/', repeat)})
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+	parser.add_argument('--clients', type=int, default=1000)
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--output', help='Also write the JSON report to this path')
+	args = parser.parse_args()
+
+	setup_django()
+	with scratch_database():
+		results = run(args.sizes, args.clients, args.repeat)
+	emit({'benchmark': 'serializers', 'repeat': args.repeat, 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,201 @@
+"""Conversation context for the chat loop in openai_app.py, kept within a token budget.
+
+- Tool results longer than `max_result_chars` are stored on the client and
+  replaced in the history by a compact summary: for tabular JSON the row
+  count, the columns and the first rows as a table. The summary carries a
+  handle the model can page through with the local `fetch_result` tool.
+- Before each model call, whole turns are dropped oldest-first while the
+  history is over `budget` tokens. They are replaced by a one-line recap
+  each, so the thread of the conversation survives without re-sending old
+  tool output.
+
+Tokens are counted with tiktoken when it is installed, and estimated at
+about four characters per token otherwise.
+"""
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional, for exact counts
+    tiktoken = None
+
+FETCH_TOOL_NAME = "fetch_result"
+FETCH_TOOL: Dict[str, Any] = {
+    "type": "function",
+    "function": {
+        "name": FETCH_TOOL_NAME,
+        "description": "Read rows of an earlier tool result that was summarized to save space. Use the handle from the summary.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string"},
+                "offset": {"type": "integer", "default": 0},
+                "limit": {"type": "integer", "default": 20},
+            },
+            "required": ["handle"],
+        },
+    },
+}
+RECAP_PREFIX = "Summary of earlier turns (dropped to save space):"
+
+
+class TokenCounter:
+    def __init__(self, model: str | None = None):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model or "")
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def messages(self, messages: List[Dict[str, Any]]) -> int:
+        total = 0
+        for m in messages:
+            # A few tokens of framing per message, as the chat format adds
+            total += 4 + self.count(m.get("content") or "")
+            if m.get("tool_calls"):
+                total += self.count(json.dumps(m["tool_calls"]))
+        return total
+
+
+def _rows(data: Any) -> List[Dict[str, Any]] | None:
+    """The list of objects in a tool result: the result itself or its only list-of-objects field."""
+    if isinstance(data, list) and data and all(isinstance(r, dict) for r in data):
+        return data
+    if isinstance(data, dict):
+        lists = [v for v in data.values() if isinstance(v, list) and v and all(isinstance(r, dict) for r in v)]
+        if len(lists) == 1:
+            return lists[0]
+    return None
+
+
+def _cell(value: Any, width: int = 40) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    text = text.replace("|", "/").replace("\n", " ")
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def _clip(text: str, width: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+class ConversationContext:
+    """The `messages` of one chat session plus the full tool results behind summarized ones."""
+
+    def __init__(self, system: str | None = None, budget: int = 8000, max_result_chars: int = 2000, preview_rows: int = 5, counter: TokenCounter | None = None, max_stored_results: int = 50):
+        self.system = system
+        self.budget = budget
+        self.max_result_chars = max_result_chars
+        self.preview_rows = preview_rows
+        self.counter = counter or TokenCounter()
+        self.max_stored_results = max_stored_results
+        self.messages: List[Dict[str, Any]] = []
+        self.results: "OrderedDict[str, Any]" = OrderedDict()
+        self.recap: List[str] = []
+        self.dropped_turns = 0
+        self._handles = 0
+        self.reset()
+
+    def reset(self) -> None:
+        # In place: the chat loop holds on to this list
+        self.messages[:] = [{"role": "system", "content": self.system}] if self.system else []
+        self.results.clear()
+        self.recap.clear()
+
+    def add_user(self, text: str) -> None:
+        self.messages.append({"role": "user", "content": text})
+
+    def add_assistant(self, text: str | None) -> None:
+        self.messages.append({"role": "assistant", "content": text or ""})
+
+    def tokens(self) -> int:
+        return self.counter.messages(self.messages)
+
+    # Tool results
+
+    def compact_tool_result(self, tool: str, text: str) -> str:
+        """`text`, or a summary with a `fetch_result` handle when it is too long."""
+        if len(text) <= self.max_result_chars:
+            return text
+        try:
+            rows = _rows(json.loads(text))
+        except ValueError:
+            rows = None
+        handle = self._store(rows if rows is not None else text.splitlines())
+        if rows is None:
+            lines = self.results[handle]
+            head = text[:self.max_result_chars // 2]
+            return (
+                f"{head}…\n[{tool} returned {len(text)} characters in {len(lines)} lines; truncated. "
+                f'Call {FETCH_TOOL_NAME}(handle="{handle}", offset, limit) to read lines.]'
+            )
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        shown = rows[:self.preview_rows]
+        table = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+        table += ["| " + " | ".join(_cell(row.get(c, "")) for c in columns) + " |" for row in shown]
+        return "\n".join([
+            f"{tool} returned {len(rows)} rows with columns {', '.join(columns)}. First {len(shown)}:",
+            *table,
+            f'Call {FETCH_TOOL_NAME}(handle="{handle}", offset, limit) for the other rows or full values.',
+        ])
+
+    def fetch(self, handle: str, offset: int = 0, limit: int = 20) -> str:
+        if handle not in self.results:
+            return f"Unknown or expired handle {handle!r}; call the original tool again."
+        items = self.results[handle]
+        offset, limit = max(0, int(offset)), max(1, min(int(limit), 100))
+        return json.dumps({"total": len(items), "offset": offset, "items": items[offset:offset + limit]}, ensure_ascii=False)
+
+    def _store(self, items: List[Any]) -> str:
+        self._handles += 1
+        handle = f"r{self._handles}"
+        self.results[handle] = items
+        while len(self.results) > self.max_stored_results:
+            self.results.popitem(last=False)
+        return handle
+
+    # Budget
+
+    def fit(self) -> int:
+        """Drop the oldest turns (never the current one) until the history fits the budget; returns turns dropped."""
+        dropped = 0
+        while self.tokens() > self.budget:
+            starts = [i for i, m in enumerate(self.messages) if m["role"] == "user"]
+            if len(starts) < 2:
+                break
+            turn = self.messages[starts[0]:starts[1]]
+            del self.messages[starts[0]:starts[1]]
+            self.recap.append(self._recap_line(turn))
+            dropped += 1
+        if dropped:
+            self.dropped_turns += dropped
+            self._write_recap()
+        return dropped
+
+    def _recap_line(self, turn: List[Dict[str, Any]]) -> str:
+        tools = [m["name"] for m in turn if m["role"] == "tool" and m.get("name")]
+        replies = [m["content"] for m in turn if m["role"] == "assistant" and m.get("content")]
+        line = f"- User: {_clip(turn[0]['content'], 160)}"
+        if tools:
+            line += f" | tools: {', '.join(dict.fromkeys(tools))}"
+        if replies:
+            line += f" | assistant: {_clip(replies[-1], 200)}"
+        return line
+
+    def _write_recap(self) -> None:
+        # Recaps are small but unbounded sessions still need a cap
+        del self.recap[:-20]
+        recap = {"role": "system", "content": "\n".join([RECAP_PREFIX, *self.recap])}
+        at = 1 if self.system else 0
+        if len(self.messages) > at and (self.messages[at].get("content") or "").startswith(RECAP_PREFIX):
+            self.messages[at] = recap
+        else:
+            self.messages.insert(at, recap)
@@ -2,38 +2,122 @@ import argparse
 import asyncio
 import json
 import os
-from typing import Any, Dict, List, Tuple
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, TextIO, Tuple
 
 from mcp import types as mcp_types
 from mcp.client.streamable_http import streamablehttp_client
 from mcp import ClientSession
 
+import tool_cache
 
-async def _list_tools(server_url: str) -> None:
+
+async def _list_tools(server_url: str, cache_dir: Path | None) -> None:
     async with streamablehttp_client(server_url) as (read, write, _):
         async with ClientSession(read, write) as session:
-            await session.initialize()
-            tools_resp = await session.list_tools()
-            for t in tools_resp.tools:
+            init = await session.initialize()
+            for t in await tool_cache.list_tools(session, server_url, init, cache_dir):
                 print(f"- {t.name}: {t.description}")
 
 
+def _result_payload(result: mcp_types.CallToolResult) -> Any:
+    """Structured content when the tool returned some, else its text."""
+    if hasattr(result, "structuredContent") and result.structuredContent:
+        return result.structuredContent
+    parts: List[str] = []
+    for c in result.content:
+        if isinstance(c, mcp_types.TextContent):
+            parts.append(c.text)
+        else:
+            parts.append(json.dumps(c.model_dump(mode="json")))
+    return "\n".join(parts)
+
+
 async def _call_tool(server_url: str, name: str, arguments: Dict[str, Any]) -> None:
     async with streamablehttp_client(server_url) as (read, write, _):
         async with ClientSession(read, write) as session:
             await session.initialize()
             result = await session.call_tool(name, arguments=arguments)
-            # Prefer structured content
-            if hasattr(result, "structuredContent") and result.structuredContent:
-                print(json.dumps(result.structuredContent, ensure_ascii=False, indent=2))
-                return
-            parts: List[str] = []
-            for c in result.content:
-                if isinstance(c, mcp_types.TextContent):
-                    parts.append(c.text)
-                else:
-                    parts.append(json.dumps(c.model_dump(mode="json")))
-            print("\n".join(parts))
+            payload = _result_payload(result)
+            if isinstance(payload, str):
+                print(payload)
+            else:
+                print(json.dumps(payload, ensure_ascii=False, indent=2))
+
+
+async def _batch_call(session: ClientSession, lineno: int, line: str) -> Dict[str, Any]:
+    """Run one JSONL invocation (`{"tool": ..., "arguments": {...}, "id": ...}`) and describe the outcome."""
+    record: Dict[str, Any] = {"line": lineno}
+    started = time.perf_counter()
+    try:
+        spec = json.loads(line)
+        if not isinstance(spec, dict) or not isinstance(spec.get("tool"), str):
+            raise ValueError('expected an object with a "tool" name')
+        if "id" in spec:
+            record["id"] = spec["id"]
+        record["tool"] = spec["tool"]
+        result = await session.call_tool(spec["tool"], arguments=spec.get("arguments") or {})
+        payload = _result_payload(result)
+        if result.isError:
+            record.update(ok=False, error=payload)
+        else:
+            record.update(ok=True, result=payload)
+    except Exception as exc:
+        record.update(ok=False, error=f"{type(exc).__name__}: {exc}")
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return record
+
+
+async def run_batch(session: ClientSession, source: TextIO, out: TextIO, concurrency: int = 8) -> Tuple[int, int]:
+    """Run every invocation in `source` over `session`, at most `concurrency` at a time.
+
+    Input is read lazily and results are written to `out` as JSONL as soon
+    as each call finishes (so not necessarily in input order; `line` and
+    `id` identify the invocation). Returns (calls, failures).
+    """
+    concurrency = max(1, concurrency)
+    queue: asyncio.Queue[Tuple[int, str] | None] = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"calls": 0, "failures": 0}
+
+    async def produce() -> None:
+        lineno = 0
+        while line := await asyncio.to_thread(source.readline):
+            lineno += 1
+            if line.strip():
+                await queue.put((lineno, line))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def consume() -> None:
+        while (item := await queue.get()) is not None:
+            record = await _batch_call(session, *item)
+            counts["calls"] += 1
+            counts["failures"] += not record["ok"]
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(produce())
+        for _ in range(concurrency):
+            group.create_task(consume())
+    return counts["calls"], counts["failures"]
+
+
+async def _batch(server_url: str, path: str, concurrency: int) -> int:
+    started = time.perf_counter()
+    source = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        async with streamablehttp_client(server_url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                calls, failures = await run_batch(session, source, sys.stdout, concurrency)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"{calls} calls, {failures} failed in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 1 if failures else 0
 
 
 def _parse_args_payload(arg: str | None) -> Dict[str, Any]:
@@ -57,14 +141,20 @@ def main() -> None:
     parser.add_argument("--list-tools", action="store_true", help="List tools and exit")
     parser.add_argument("--tool", help="Tool name to call")
     parser.add_argument("--args", default=None, help='JSON arguments, @file.json, or file path')
+    parser.add_argument("--batch", metavar="FILE", help='Run JSONL invocations ({"tool": ..., "arguments": {...}, "id": ...}) from FILE, or - for stdin, over one session')
+    parser.add_argument("--concurrency", type=int, default=8, help="Batch calls in flight at once (default 8)")
+    parser.add_argument("--no-tool-cache", action="store_true", help="Always list tools from the server")
     args = parser.parse_args()
 
     if args.list_tools:
-        asyncio.run(_list_tools(args.server_url))
+        asyncio.run(_list_tools(args.server_url, None if args.no_tool_cache else tool_cache.DEFAULT_CACHE_DIR))
         return
 
+    if args.batch:
+        sys.exit(asyncio.run(_batch(args.server_url, args.batch, args.concurrency)))
+
     if not args.tool:
-        print("Provide --tool or use --list-tools")
+        print("Provide --tool, --batch or use --list-tools")
         return
 
     payload = _parse_args_payload(args.args)
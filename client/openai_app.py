@@ -2,14 +2,28 @@ import argparse
 import asyncio
 import json
 import os
-from typing import Any, Dict, List
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List
 
-from openai import OpenAI
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
 
 from mcp import types as mcp_types
 from mcp.client.streamable_http import streamablehttp_client
 from mcp import ClientSession
 
+import tool_cache
+from context import FETCH_TOOL, FETCH_TOOL_NAME, ConversationContext, TokenCounter
+
+# Tool calls of one assistant turn that may run at the same time
+TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "4"))
+# Tokens of history sent with each request; older turns are summarized beyond it
+CONTEXT_BUDGET = int(os.getenv("OPENAI_CONTEXT_BUDGET", "8000"))
+# Tool results longer than this are summarized, with the rest fetchable on demand
+TOOL_RESULT_CHARS = int(os.getenv("MCP_TOOL_RESULT_CHARS", "2000"))
+
 
 def mcp_tools_to_openai_tools(tools: List[mcp_types.Tool]) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
@@ -28,12 +42,11 @@ def mcp_tools_to_openai_tools(tools: List[mcp_types.Tool]) -> List[Dict[str, Any
     return out
 
 
-async def list_tools(server_url: str) -> None:
+async def list_tools(server_url: str, cache_dir: Path | None = tool_cache.DEFAULT_CACHE_DIR) -> None:
     async with streamablehttp_client(server_url) as (read, write, _):
         async with ClientSession(read, write) as session:
-            await session.initialize()
-            tools_resp = await session.list_tools()
-            for t in tools_resp.tools:
+            init = await session.initialize()
+            for t in await tool_cache.list_tools(session, server_url, init, cache_dir):
                 print(f"- {t.name}: {t.description}")
 
 
@@ -52,99 +65,188 @@ async def call_mcp_tool(session: ClientSession, name: str, arguments: Dict[str,
     return "\n".join(parts) if parts else ""
 
 
-async def _complete_with_tools(client: OpenAI, session: ClientSession, model: str, messages: List[Dict[str, Any]], oa_tools: List[Dict[str, Any]]) -> Dict[str, Any]:
-    completion = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        tools=oa_tools or None,
-        tool_choice="auto" if oa_tools else None,
-    )
-
-    msg = completion.choices[0].message
+def _add_usage(usage: Dict[str, int] | None, reported: Any) -> None:
+    if usage is None or reported is None:
+        return
+    usage["requests"] = usage.get("requests", 0) + 1
+    usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + (reported.prompt_tokens or 0)
+    usage["completion_tokens"] = usage.get("completion_tokens", 0) + (reported.completion_tokens or 0)
+
+
+async def _create(client: AsyncOpenAI, model: str, messages: List[Dict[str, Any]], oa_tools: List[Dict[str, Any]], on_token: Callable[[str], None] | None = None, usage: Dict[str, int] | None = None) -> ChatCompletionMessage:
+    """Request one assistant message; streamed when `on_token` is given, which receives each content delta.
+
+    Token usage reported by the API is added to `usage` when given.
+    """
+    kwargs: Dict[str, Any] = {"model": model, "messages": messages}
+    if oa_tools:
+        kwargs.update(tools=oa_tools, tool_choice="auto")
+    if on_token is None:
+        completion = await client.chat.completions.create(**kwargs)
+        _add_usage(usage, completion.usage)
+        return completion.choices[0].message
+
+    content: List[str] = []
+    calls: Dict[int, Dict[str, Any]] = {}
+    stream = await client.chat.completions.create(**kwargs, stream=True, stream_options={"include_usage": True})
+    async for chunk in stream:
+        # Usage comes in a final chunk without choices
+        _add_usage(usage, chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content.append(delta.content)
+            on_token(delta.content)
+        # Tool calls arrive in fragments, keyed by their position in the message
+        for tc in delta.tool_calls or []:
+            call = calls.setdefault(tc.index, {"id": "", "name": "", "arguments": []})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["arguments"].append(tc.function.arguments)
+    tool_calls = [
+        ChatCompletionMessageToolCall(id=c["id"], type="function", function=Function(name=c["name"], arguments="".join(c["arguments"])))
+        for _, c in sorted(calls.items())
+    ]
+    return ChatCompletionMessage(role="assistant", content="".join(content) or None, tool_calls=tool_calls or None)
+
+
+async def _run_tool_calls(session: ClientSession, tool_calls: List[ChatCompletionMessageToolCall], concurrency: int = TOOL_CONCURRENCY, context: ConversationContext | None = None) -> List[Dict[str, Any]]:
+    """Execute one turn's tool calls concurrently, at most `concurrency` at a time; results keep the calls' order.
+
+    With a `context`, long results are summarized and `fetch_result` calls
+    are answered from it without a round trip to the server.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(tc: ChatCompletionMessageToolCall) -> Dict[str, Any]:
+        fname = tc.function.name
+        try:
+            fargs = json.loads(tc.function.arguments or "{}")
+        except json.JSONDecodeError:
+            fargs = {}
+        async with limit:
+            try:
+                if context is not None and fname == FETCH_TOOL_NAME:
+                    result_text = context.fetch(**fargs)
+                else:
+                    result_text = await call_mcp_tool(session, fname, fargs)
+                    if context is not None:
+                        result_text = context.compact_tool_result(fname, result_text)
+            except Exception as exc:
+                # Report the failure to the model rather than losing the other results
+                result_text = f"Tool {fname} failed: {exc}"
+        return {
+            "role": "tool",
+            "tool_call_id": tc.id,
+            "name": fname,
+            "content": result_text or "(no result)",
+        }
+
+    return list(await asyncio.gather(*(run(tc) for tc in tool_calls)))
+
+
+async def _complete_with_tools(client: AsyncOpenAI, session: ClientSession, model: str, messages: List[Dict[str, Any]], oa_tools: List[Dict[str, Any]], on_token: Callable[[str], None] | None = None, tool_concurrency: int = TOOL_CONCURRENCY, context: ConversationContext | None = None, usage: Dict[str, int] | None = None) -> ChatCompletionMessage:
+    """Run the model and its tool calls until it answers.
+
+    With a `context` (whose `messages` these must be), the history is fitted
+    to its token budget before every request.
+    """
+    if context is not None:
+        context.fit()
+    msg = await _create(client, model, messages, oa_tools, on_token, usage)
 
     # Handle tool calls if any
     while msg.tool_calls:
-        tool_messages: List[Dict[str, Any]] = []
-        for tc in msg.tool_calls:
-            fname = tc.function.name
-            try:
-                fargs = json.loads(tc.function.arguments or "{}")
-            except json.JSONDecodeError:
-                fargs = {}
-            # Execute via MCP session
-            result_text = await call_mcp_tool(session, fname, fargs)
-            tool_messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tc.id,
-                    "name": fname,
-                    "content": result_text or "(no result)",
-                }
-            )
-
+        tool_messages = await _run_tool_calls(session, msg.tool_calls, tool_concurrency, context)
         messages.append({
             "role": "assistant",
             "content": msg.content or "",
             "tool_calls": [tc.model_dump() for tc in msg.tool_calls],
         })
         messages.extend(tool_messages)
+        if context is not None:
+            context.fit()
+        msg = await _create(client, model, messages, oa_tools, on_token, usage)
 
-        completion = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            tools=oa_tools or None,
-            tool_choice="auto" if oa_tools else None,
-        )
-        msg = completion.choices[0].message
+    return msg
 
+
+def _token_report(usage: Dict[str, int], context: ConversationContext) -> str:
+    parts = []
+    if usage.get("requests"):
+        parts.append(
+            f"prompt {usage['prompt_tokens']:,} + completion {usage['completion_tokens']:,} tokens "
+            f"over {usage['requests']} request{'s' if usage['requests'] != 1 else ''}"
+        )
+    history = f"history ~{context.tokens():,}/{context.budget:,}"
+    if context.dropped_turns:
+        history += f" ({context.dropped_turns} earlier turn{'s' if context.dropped_turns != 1 else ''} summarized)"
+    parts.append(history)
+    return "[tokens] " + "; ".join(parts)
+
+
+async def _answer(client: AsyncOpenAI, session: ClientSession, model: str, context: ConversationContext, oa_tools: List[Dict[str, Any]], stream: bool, tool_concurrency: int) -> ChatCompletionMessage:
+    """Run the user turn at the end of `context`, print the reply (token by token when streaming) and the turn's token counts."""
+    printed: List[str] = []
+    usage: Dict[str, int] = {}
+
+    def on_token(text: str) -> None:
+        printed.append(text)
+        print(text, end="", flush=True)
+
+    msg = await _complete_with_tools(client, session, model, context.messages, oa_tools, on_token if stream else None, tool_concurrency, context, usage)
+    context.add_assistant(msg.content)
+    if printed:
+        print()
+    if not (printed and msg.content):
+        print(msg.content or "(no assistant content)")
+    print(_token_report(usage, context), file=sys.stderr)
     return msg
 
 
-async def chat_once(server_url: str, model: str, prompt: str, system: str | None) -> None:
+def _context(model: str, system: str | None, budget: int, result_chars: int) -> ConversationContext:
+    return ConversationContext(system, budget=budget, max_result_chars=result_chars, counter=TokenCounter(model))
+
+
+async def chat_once(server_url: str, model: str, prompt: str, system: str | None, stream: bool = True, tool_concurrency: int = TOOL_CONCURRENCY, cache_dir: Path | None = tool_cache.DEFAULT_CACHE_DIR, budget: int = CONTEXT_BUDGET, result_chars: int = TOOL_RESULT_CHARS) -> None:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("Set OPENAI_API_KEY to use the OpenAI API")
 
-    client = OpenAI(api_key=api_key)
-
-    async with streamablehttp_client(server_url) as (read, write, _):
+    async with AsyncOpenAI(api_key=api_key) as client, streamablehttp_client(server_url) as (read, write, _):
         async with ClientSession(read, write) as session:
-            await session.initialize()
-
-            tools_resp = await session.list_tools()
-            oa_tools = mcp_tools_to_openai_tools(tools_resp.tools)
+            init_result = await session.initialize()
 
-            messages: List[Dict[str, Any]] = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
+            # Tool schemas come from the on-disk cache when the server version is unchanged
+            oa_tools = mcp_tools_to_openai_tools(await tool_cache.list_tools(session, server_url, init_result, cache_dir)) + [FETCH_TOOL]
 
-            msg = await _complete_with_tools(client, session, model, messages, oa_tools)
-            print(msg.content or "(no assistant content)")
+            context = _context(model, system, budget, result_chars)
+            context.add_user(prompt)
+            await _answer(client, session, model, context, oa_tools, stream, tool_concurrency)
 
 
-async def chat_interactive(server_url: str, model: str, system: str | None, init: str | None) -> None:
+async def chat_interactive(server_url: str, model: str, system: str | None, init: str | None, stream: bool = True, tool_concurrency: int = TOOL_CONCURRENCY, cache_dir: Path | None = tool_cache.DEFAULT_CACHE_DIR, budget: int = CONTEXT_BUDGET, result_chars: int = TOOL_RESULT_CHARS) -> None:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("Set OPENAI_API_KEY to use the OpenAI API")
 
-    client = OpenAI(api_key=api_key)
-
-    async with streamablehttp_client(server_url) as (read, write, _):
+    async with AsyncOpenAI(api_key=api_key) as client, streamablehttp_client(server_url) as (read, write, _):
         async with ClientSession(read, write) as session:
-            await session.initialize()
+            init_result = await session.initialize()
 
-            tools_resp = await session.list_tools()
-            oa_tools = mcp_tools_to_openai_tools(tools_resp.tools)
+            # Tool schemas come from the on-disk cache when the server version is unchanged
+            oa_tools = mcp_tools_to_openai_tools(await tool_cache.list_tools(session, server_url, init_result, cache_dir)) + [FETCH_TOOL]
 
-            messages: List[Dict[str, Any]] = []
-            if system:
-                messages.append({"role": "system", "content": system})
+            # History within the token budget; _answer appends each reply
+            context = _context(model, system, budget, result_chars)
             if init:
-                messages.append({"role": "user", "content": init})
+                context.add_user(init)
                 # Run initial turn
-                msg = _complete_with_tools(client, session, model, messages, oa_tools)
-                print(msg.content or "(no assistant content)")
+                await _answer(client, session, model, context, oa_tools, stream, tool_concurrency)
 
             print("Interactive chat. Type /exit to quit, /reset to clear context.")
             loop = asyncio.get_event_loop()
@@ -160,17 +262,12 @@ async def chat_interactive(server_url: str, model: str, system: str | None, init
                 if user_input.strip().lower() in {"/exit", "/quit", ":q"}:
                     break
                 if user_input.strip().lower() == "/reset":
-                    messages = []
-                    if system:
-                        messages.append({"role": "system", "content": system})
+                    context.reset()
                     print("Context cleared.")
                     continue
 
-                messages.append({"role": "user", "content": user_input})
-                msg = await _complete_with_tools(client, session, model, messages, oa_tools)
-                # Append assistant message to history
-                messages.append({"role": "assistant", "content": msg.content or ""})
-                print(msg.content or "(no assistant content)")
+                context.add_user(user_input)
+                await _answer(client, session, model, context, oa_tools, stream, tool_concurrency)
 
 
 def main() -> None:
@@ -182,18 +279,24 @@ def main() -> None:
     parser.add_argument("--system", default=None, help="Optional system prompt")
     parser.add_argument("--interactive", action="store_true", help="Start an interactive chat session with context")
     parser.add_argument("--init", default=None, help="Optional initial user message in interactive mode")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="Print replies when complete instead of streaming tokens")
+    parser.add_argument("--no-tool-cache", action="store_true", help="Always list tools from the server instead of the on-disk schema cache")
+    parser.add_argument("--tool-concurrency", type=int, default=TOOL_CONCURRENCY, help="Tool calls of one assistant turn run at the same time (default from MCP_TOOL_CONCURRENCY, 4)")
+    parser.add_argument("--context-budget", type=int, default=CONTEXT_BUDGET, help="Tokens of history sent per request; older turns are summarized beyond it (default from OPENAI_CONTEXT_BUDGET, 8000)")
+    parser.add_argument("--tool-result-chars", type=int, default=TOOL_RESULT_CHARS, help="Tool results longer than this are summarized, with details fetchable on demand (default from MCP_TOOL_RESULT_CHARS, 2000)")
     args = parser.parse_args()
+    cache_dir = None if args.no_tool_cache else tool_cache.DEFAULT_CACHE_DIR
 
     if args.list_tools:
-        asyncio.run(list_tools(args.server_url))
+        asyncio.run(list_tools(args.server_url, cache_dir))
         return
 
     if args.ask:
-        asyncio.run(chat_once(args.server_url, args.model, args.ask, args.system))
+        asyncio.run(chat_once(args.server_url, args.model, args.ask, args.system, args.stream, args.tool_concurrency, cache_dir, args.context_budget, args.tool_result_chars))
         return
 
     if args.interactive:
-        asyncio.run(chat_interactive(args.server_url, args.model, args.system, args.init))
+        asyncio.run(chat_interactive(args.server_url, args.model, args.system, args.init, args.stream, args.tool_concurrency, cache_dir, args.context_budget, args.tool_result_chars))
         return
 
     print("Nothing to do. Use --list-tools, --ask \"...\", or --interactive.")
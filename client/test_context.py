@@ -0,0 +1,127 @@
+import json
+import unittest
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from context import FETCH_TOOL, RECAP_PREFIX, ConversationContext
+from openai_app import _complete_with_tools, mcp_tools_to_openai_tools
+from test_openai_app import FakeOpenAI
+
+
+def meetings(n: int):
+    return [
+        {"id": i, "title": f"Meeting {i}", "start_time": f"2026-01-{i % 28 + 1:02d}T09:00:00Z", "client": i % 7}
+        for i in range(n)
+    ]
+
+
+class CompactToolResultTest(unittest.TestCase):
+    def test_short_results_are_kept(self):
+        context = ConversationContext(max_result_chars=2000)
+        text = json.dumps(meetings(3))
+        self.assertEqual(context.compact_tool_result("list_meetings", text), text)
+
+    def test_table_summary_and_fetch(self):
+        context = ConversationContext(max_result_chars=500, preview_rows=3)
+        rows = meetings(200)
+        summary = context.compact_tool_result("list_meetings", json.dumps({"result": rows}))
+        self.assertIn("200 rows with columns id, title, start_time, client", summary)
+        self.assertIn("| Meeting 2 |", summary)
+        self.assertNotIn("Meeting 3 ", summary)
+        self.assertIn('fetch_result(handle="r1"', summary)
+        self.assertLess(len(summary), 1000)
+
+        page = json.loads(context.fetch("r1", offset=150, limit=2))
+        self.assertEqual(page["total"], 200)
+        self.assertEqual(page["items"], rows[150:152])
+        self.assertIn("Unknown", context.fetch("r9"))
+
+    def test_plain_text_is_truncated(self):
+        context = ConversationContext(max_result_chars=100)
+        text = "\n".join(f"line {i}" for i in range(100))
+        summary = context.compact_tool_result("export", text)
+        self.assertIn("truncated", summary)
+        self.assertEqual(json.loads(context.fetch("r1", offset=99))["items"], ["line 99"])
+
+    def test_stored_results_are_bounded(self):
+        context = ConversationContext(max_result_chars=10, max_stored_results=2)
+        for _ in range(3):
+            context.compact_tool_result("t", json.dumps(meetings(5)))
+        self.assertEqual(list(context.results), ["r2", "r3"])
+
+
+class FitTest(unittest.TestCase):
+    def add_turn(self, context, i, size=400):
+        context.add_user(f"question {i}")
+        context.messages.append({"role": "assistant", "content": "", "tool_calls": [{"id": f"c{i}", "type": "function", "function": {"name": "list_meetings", "arguments": "{}"}}]})
+        context.messages.append({"role": "tool", "tool_call_id": f"c{i}", "name": "list_meetings", "content": "x" * size})
+        context.add_assistant(f"answer {i}")
+
+    def test_drops_oldest_whole_turns_with_recap(self):
+        context = ConversationContext("Be brief.", budget=150)
+        for i in range(4):
+            self.add_turn(context, i)
+        context.add_user("current question")
+        self.assertEqual(context.fit(), 4)
+        self.assertEqual(context.messages[0], {"role": "system", "content": "Be brief."})
+        self.assertTrue(context.messages[1]["content"].startswith(RECAP_PREFIX))
+        self.assertIn("- User: question 0 | tools: list_meetings | assistant: answer 0", context.messages[1]["content"])
+        self.assertEqual(context.messages[2:], [{"role": "user", "content": "current question"}])
+        self.assertLessEqual(context.tokens(), 150)
+
+        # A later fit updates the same recap message
+        context.add_assistant("done")
+        self.add_turn(context, 4)
+        context.add_user("next")
+        context.fit()
+        recaps = [m for m in context.messages if (m["content"] or "").startswith(RECAP_PREFIX)]
+        self.assertEqual(len(recaps), 1)
+        self.assertIn("question 4", recaps[0]["content"])
+        self.assertEqual(context.dropped_turns, 6)
+
+    def test_keeps_the_current_turn_over_budget(self):
+        context = ConversationContext(budget=10)
+        self.add_turn(context, 0)
+        self.assertEqual(context.fit(), 0)
+        self.assertEqual(len(context.messages), 4)
+
+    def test_reset_keeps_list_identity(self):
+        context = ConversationContext("sys")
+        messages = context.messages
+        self.add_turn(context, 0)
+        context.reset()
+        self.assertIs(context.messages, messages)
+        self.assertEqual(messages, [{"role": "system", "content": "sys"}])
+
+
+class ContextChatLoopTest(unittest.IsolatedAsyncioTestCase):
+    async def test_large_result_is_summarized_then_fetched(self):
+        server = FastMCP("fake")
+
+        @server.tool()
+        async def list_meetings(n: int) -> list[dict]:
+            return meetings(n)
+
+        context = ConversationContext(max_result_chars=1000)
+        context.add_user("what is on?")
+        fake = FakeOpenAI([("list_meetings", {"n": 300})])
+        async with create_connected_server_and_client_session(server._mcp_server) as session:
+            oa_tools = mcp_tools_to_openai_tools((await session.list_tools()).tools) + [FETCH_TOOL]
+            msg = await _complete_with_tools(fake.client(), session, "fake", context.messages, oa_tools, context=context)
+            self.assertIn("300 rows", msg.content)
+            tool_message = context.messages[-1]
+            self.assertEqual(tool_message["role"], "tool")
+            self.assertLess(len(tool_message["content"]), 1000)
+
+            # The model pages through the rest locally
+            context.add_assistant(msg.content)
+            context.add_user("and later ones?")
+            fake.calls = [("fetch_result", {"handle": "r1", "offset": 290, "limit": 5})]
+            msg = await _complete_with_tools(fake.client(), session, "fake", context.messages, oa_tools, context=context)
+        page = json.loads(context.messages[-1]["content"])
+        self.assertEqual([m["id"] for m in page["items"]], [290, 291, 292, 293, 294])
+
+
+if __name__ == "__main__":
+    unittest.main()
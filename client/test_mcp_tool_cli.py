@@ -0,0 +1,82 @@
+import asyncio
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import tool_cache
+from mcp_tool_cli import run_batch
+
+
+def fake_server(active: dict, version: str = "1") -> FastMCP:
+    server = FastMCP("fake")
+    server._mcp_server.version = version
+
+    @server.tool()
+    async def wait(name: str, delay: float = 0.02) -> dict[str, str]:
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(delay)
+        active["now"] -= 1
+        return {"name": name}
+
+    return server
+
+
+class BatchTest(unittest.IsolatedAsyncioTestCase):
+    async def test_jsonl_over_one_session(self):
+        active = {"now": 0, "peak": 0}
+        lines = [json.dumps({"tool": "wait", "arguments": {"name": str(i)}, "id": i}) for i in range(20)]
+        lines[3:3] = ["", "not json", json.dumps({"tool": "missing"})]
+        out = io.StringIO()
+        async with create_connected_server_and_client_session(fake_server(active)._mcp_server) as session:
+            calls, failures = await run_batch(session, io.StringIO("\n".join(lines) + "\n"), out, concurrency=3)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual((calls, failures), (22, 2))
+        self.assertEqual(active["peak"], 3)
+        ok = sorted((r for r in records if r["ok"]), key=lambda r: r["id"])
+        self.assertEqual([r["result"] for r in ok], [{"name": str(i)} for i in range(20)])
+        failed = {r["line"]: r for r in records if not r["ok"]}
+        self.assertEqual(sorted(failed), [5, 6])
+        self.assertIn("JSONDecodeError", failed[5]["error"])
+        self.assertEqual(failed[6]["tool"], "missing")
+
+
+class ToolCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def list_with(self, cache_dir, version):
+        async with create_connected_server_and_client_session(fake_server({}, version)._mcp_server) as session:
+            listed = []
+            list_tools = session.list_tools
+
+            async def counting():
+                listed.append(1)
+                return await list_tools()
+
+            session.list_tools = counting
+            init = await session.initialize()
+            tools = await tool_cache.list_tools(session, "http://fake/mcp", init, cache_dir)
+            return [t.name for t in tools], len(listed), tools
+
+    async def test_cached_per_server_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            names, listed, tools = await self.list_with(tmp, "1")
+            self.assertEqual((names, listed), (["wait"], 1))
+            cached_names, listed, cached = await self.list_with(tmp, "1")
+            self.assertEqual((cached_names, listed), (["wait"], 0))
+            self.assertEqual(cached, tools)
+            # A new server version (changed tool definitions) lists again
+            self.assertEqual((await self.list_with(tmp, "2"))[1], 1)
+            # A corrupt entry is ignored and rewritten
+            for path in Path(tmp).glob("*.json"):
+                path.write_text("{")
+            self.assertEqual((await self.list_with(tmp, "1"))[1], 1)
+            self.assertEqual((await self.list_with(tmp, "1"))[1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
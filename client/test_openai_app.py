@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+import unittest
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+from openai import AsyncOpenAI
+
+from openai_app import _complete_with_tools, mcp_tools_to_openai_tools
+
+
+def fake_mcp_server(active: dict) -> FastMCP:
+    """MCP server whose tools sleep, recording how many run at once."""
+    server = FastMCP("fake")
+
+    @server.tool()
+    async def slow(name: str, delay: float) -> str:
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            active["now"] -= 1
+        return f"done {name}"
+
+    @server.tool()
+    async def boom() -> str:
+        raise RuntimeError("broken")
+
+    return server
+
+
+class FakeOpenAI:
+    """OpenAI-compatible chat completions stub behind an httpx mock transport.
+
+    The first turn asks for `self.calls` (tool name, arguments) in one
+    assistant message; once tool results are in, it answers with their
+    contents, in message order.
+    """
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def client(self) -> AsyncOpenAI:
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        return AsyncOpenAI(api_key="test", base_url="http://fake/v1", http_client=http)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if body["messages"][-1]["role"] == "tool":
+            results = [m["content"] for m in body["messages"] if m["role"] == "tool"]
+            message = {"role": "assistant", "content": "Results: " + ", ".join(results)}
+        else:
+            message = {"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+                for i, (name, args) in enumerate(self.calls)
+            ]}
+        if not body.get("stream"):
+            return httpx.Response(200, json=self.completion({"index": 0, "message": message, "finish_reason": "stop"}))
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self.sse(message))
+
+    def completion(self, choice, obj="chat.completion"):
+        return {"id": "cmpl", "object": obj, "created": 0, "model": "fake", "choices": [choice]}
+
+    def sse(self, message) -> bytes:
+        deltas = []
+        content = message.get("content") or ""
+        # Split content and tool call arguments into fragments, like the real API
+        for i in range(0, len(content), 4):
+            deltas.append({"content": content[i:i + 4]})
+        for index, tc in enumerate(message.get("tool_calls") or []):
+            args = tc["function"]["arguments"]
+            deltas.append({"tool_calls": [{"index": index, "id": tc["id"], "type": "function", "function": {"name": tc["function"]["name"], "arguments": args[:5]}}]})
+            deltas.append({"tool_calls": [{"index": index, "function": {"arguments": args[5:]}}]})
+        events = [self.completion({"index": 0, "delta": delta, "finish_reason": None}, "chat.completion.chunk") for delta in deltas]
+        lines = [f"data: {json.dumps(event)}\n\n" for event in events] + ["data: [DONE]\n\n"]
+        return "".join(lines).encode()
+
+
+def done(name: str) -> str:
+    """What `call_mcp_tool` returns for `slow(name)`: its structured content."""
+    return json.dumps({"result": f"done {name}"})
+
+
+class CompleteWithToolsTest(unittest.IsolatedAsyncioTestCase):
+    async def run_turn(self, calls, stream=True, concurrency=4):
+        active = {"now": 0, "peak": 0}
+        fake = FakeOpenAI(calls)
+        tokens = []
+        async with create_connected_server_and_client_session(fake_mcp_server(active)._mcp_server) as session:
+            oa_tools = mcp_tools_to_openai_tools((await session.list_tools()).tools)
+            messages = [{"role": "user", "content": "go"}]
+            started = time.perf_counter()
+            msg = await _complete_with_tools(
+                fake.client(), session, "fake", messages, oa_tools,
+                on_token=tokens.append if stream else None, tool_concurrency=concurrency,
+            )
+            elapsed = time.perf_counter() - started
+        return msg, messages, tokens, active["peak"], elapsed
+
+    async def test_tool_calls_run_concurrently_in_order(self):
+        delays = {"a": 0.3, "b": 0.1, "c": 0.2, "d": 0.1}
+        calls = [("slow", {"name": name, "delay": delay}) for name, delay in delays.items()]
+        msg, messages, tokens, peak, elapsed = await self.run_turn(calls, concurrency=4)
+        self.assertEqual(msg.content, "Results: " + ", ".join(done(name) for name in "abcd"))
+        self.assertEqual([m["tool_call_id"] for m in messages if m["role"] == "tool"], ["call_0", "call_1", "call_2", "call_3"])
+        self.assertEqual(peak, 4)
+        self.assertLess(elapsed, sum(delays.values()))
+        # Streamed: the answer arrived in several pieces
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), msg.content)
+
+    async def test_concurrency_limit_and_failures(self):
+        calls = [("slow", {"name": str(i), "delay": 0.05}) for i in range(5)] + [("boom", {})]
+        msg, messages, _, peak, _ = await self.run_turn(calls, concurrency=2)
+        self.assertEqual(peak, 2)
+        tool_results = [m["content"] for m in messages if m["role"] == "tool"]
+        self.assertEqual(tool_results[:5], [done(str(i)) for i in range(5)])
+        self.assertIn("broken", tool_results[5])
+
+    async def test_without_streaming(self):
+        msg, _, tokens, _, _ = await self.run_turn([("slow", {"name": "x", "delay": 0})], stream=False)
+        self.assertEqual(msg.content, "Results: " + done("x"))
+        self.assertEqual(tokens, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""On-disk cache of MCP tool schemas (`tools/list`), shared by the CLI clients.
+
+Entries are keyed by server URL and the server's advertised name and
+version (`initialize` result). The Meeting Scheduler MCP server puts a
+digest of its tool definitions in that version, so a changed tool gets a
+new key and stale schemas are never reused.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import List
+
+from mcp import ClientSession
+from mcp import types as mcp_types
+
+DEFAULT_CACHE_DIR = Path(os.getenv("MCP_TOOL_CACHE_DIR", Path.home() / ".cache" / "meeting-scheduler" / "mcp-tools"))
+
+
+def cache_path(cache_dir: Path, server_url: str, init: mcp_types.InitializeResult) -> Path:
+    key = "\n".join([server_url, init.protocolVersion, init.serverInfo.name, init.serverInfo.version])
+    return Path(cache_dir) / f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.json"
+
+
+def load(path: Path) -> List[mcp_types.Tool] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return [mcp_types.Tool.model_validate(t) for t in data["tools"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing, unreadable or from an incompatible client version: list again
+        return None
+
+
+def store(path: Path, server_url: str, tools: List[mcp_types.Tool]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"server_url": server_url, "tools": [t.model_dump(mode="json", exclude_none=True) for t in tools]}
+        # Write then rename, so concurrent runs never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # The cache is an optimization; a read-only home is not an error
+
+
+async def list_tools(session: ClientSession, server_url: str, init: mcp_types.InitializeResult, cache_dir: Path | None = DEFAULT_CACHE_DIR) -> List[mcp_types.Tool]:
+    """The server's tools, from the cache when this server version was seen before.
+
+    `init` is the result of `session.initialize()`; `cache_dir=None` always lists.
+    """
+    if cache_dir is None:
+        return (await session.list_tools()).tools
+    path = cache_path(cache_dir, server_url, init)
+    tools = load(path)
+    if tools is None:
+        tools = (await session.list_tools()).tools
+        store(path, server_url, tools)
+    return tools
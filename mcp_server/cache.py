@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable
+
+# Returned by `ValidatorCache.revalidated` when the entry was evicted meanwhile
+MISSING = object()
+
+
+def cache_key(tool: str, arguments: dict[str, Any]) -> str:
+	"""Stable key for a tool call: `None` arguments are dropped and keys sorted."""
+	args = {k: v for k, v in arguments.items() if v is not None}
+	return tool + ":" + json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolCache:
+	"""In-process async TTL/LRU cache for read-only tool results.
+
+	- Entries expire after `ttl` seconds; at most `maxsize` are kept (LRU).
+	- Concurrent misses for the same key share one upstream call (single-flight).
+	  If the caller running it is cancelled, the others start it again.
+	- Entries carry tags; `invalidate(tags)` drops every entry with any of
+	  them. A load that was already running when its tags were invalidated,
+	  or when the cache was cleared, still answers its own callers but is
+	  not stored.
+
+	A `ttl` or `maxsize` of 0 disables caching.
+	"""
+
+	def __init__(self, maxsize: int = 256, ttl: float = 10.0):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._entries: OrderedDict[str, tuple[float, Any, frozenset[str]]] = OrderedDict()
+		self._inflight: dict[str, tuple[asyncio.Future, frozenset[str]]] = {}
+		self._generations: dict[str, int] = {}
+		# Bumped by clear(), like a generation shared by every tag
+		self._epoch = 0
+		self.hits = 0
+		self.misses = 0
+		self.coalesced = 0
+		self.evictions = 0
+		self.expirations = 0
+		self.invalidations = 0
+
+	@property
+	def enabled(self) -> bool:
+		return self.ttl > 0 and self.maxsize > 0
+
+	def stats(self) -> dict[str, Any]:
+		lookups = self.hits + self.misses + self.coalesced
+		return {
+			"enabled": self.enabled,
+			"size": len(self._entries),
+			"maxsize": self.maxsize,
+			"ttl": self.ttl,
+			"hits": self.hits,
+			"misses": self.misses,
+			"coalesced": self.coalesced,
+			"evictions": self.evictions,
+			"expirations": self.expirations,
+			"invalidations": self.invalidations,
+			"hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+		}
+
+	async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], tags: Iterable[str] = ()) -> Any:
+		if not self.enabled:
+			return await loader()
+
+		entry = self._entries.get(key)
+		if entry is not None:
+			expires, value, _ = entry
+			if expires > time.monotonic():
+				self.hits += 1
+				self._entries.move_to_end(key)
+				return value
+			del self._entries[key]
+			self.expirations += 1
+
+		while (inflight := self._inflight.get(key)) is not None:
+			self.coalesced += 1
+			try:
+				return await asyncio.shield(inflight[0])
+			except asyncio.CancelledError:
+				# Only the caller that started the load was cancelled: load it again
+				if not inflight[0].cancelled() or asyncio.current_task().cancelling():
+					raise
+
+		self.misses += 1
+		tags = frozenset(tags)
+		generations = {tag: self._generations.get(tag, 0) for tag in tags}
+		epoch = self._epoch
+		future: asyncio.Future = asyncio.get_running_loop().create_future()
+		self._inflight[key] = (future, tags)
+		try:
+			value = await loader()
+		except asyncio.CancelledError:
+			future.cancel()
+			raise
+		except BaseException as exc:
+			future.set_exception(exc)
+			# Mark retrieved so an un-awaited failure is not logged as unhandled
+			future.exception()
+			raise
+		finally:
+			if self._inflight.get(key, (None,))[0] is future:
+				del self._inflight[key]
+
+		future.set_result(value)
+		if epoch == self._epoch and all(self._generations.get(tag, 0) == gen for tag, gen in generations.items()):
+			self._store(key, value, tags)
+		return value
+
+	def _store(self, key: str, value: Any, tags: frozenset[str]) -> None:
+		self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.maxsize:
+			self._entries.popitem(last=False)
+			self.evictions += 1
+
+	def invalidate(self, tags: Iterable[str]) -> int:
+		"""Drop entries carrying any of `tags`; returns how many were removed."""
+		tags = set(tags)
+		for tag in tags:
+			self._generations[tag] = self._generations.get(tag, 0) + 1
+		# Later callers must not join loads that started before the write
+		for key in [k for k, (_, t) in self._inflight.items() if t & tags]:
+			del self._inflight[key]
+		stale = [k for k, (_, _, t) in self._entries.items() if t & tags]
+		for key in stale:
+			del self._entries[key]
+		self.invalidations += len(stale)
+		return len(stale)
+
+	def clear(self) -> None:
+		self._epoch += 1
+		self._inflight.clear()
+		self._entries.clear()
+
+
+class ValidatorCache:
+	"""LRU of upstream GET bodies keyed on URL, with the ETag they were served with.
+
+	Lets repeated GETs send `If-None-Match` and reuse the stored body when the
+	API answers 304, skipping the download and JSON decoding. Unlike
+	`ToolCache`, nothing is served without asking the API first, so entries
+	never go stale. A `maxsize` of 0 disables it.
+	"""
+
+	def __init__(self, maxsize: int = 512):
+		self.maxsize = maxsize
+		self._entries: OrderedDict[str, tuple[str, Any]] = OrderedDict()
+		self.not_modified = 0
+		self.modified = 0
+
+	def etag(self, url: str) -> str | None:
+		entry = self._entries.get(url)
+		return entry[0] if entry else None
+
+	def revalidated(self, url: str) -> Any:
+		"""Body stored for `url`, after the API confirmed it with a 304.
+
+		Other requests may have evicted the entry while this one waited for the
+		API; then `MISSING` is returned and the caller has to fetch the body.
+		"""
+		entry = self._entries.get(url)
+		if entry is None:
+			return MISSING
+		self.not_modified += 1
+		self._entries.move_to_end(url)
+		return entry[1]
+
+	def store(self, url: str, etag: str | None, body: Any) -> None:
+		if url in self._entries:
+			self.modified += 1
+		if not etag or self.maxsize <= 0:
+			self._entries.pop(url, None)
+			return
+		self._entries[url] = (etag, body)
+		self._entries.move_to_end(url)
+		while len(self._entries) > self.maxsize:
+			self._entries.popitem(last=False)
+
+	def stats(self) -> dict[str, Any]:
+		return {
+			"size": len(self._entries),
+			"maxsize": self.maxsize,
+			"not_modified": self.not_modified,
+			"modified": self.modified,
+		}
@@ -0,0 +1,167 @@
+"""Follows the scheduler's change feed (`GET /api/changes/`) for many subscribers.
+
+One background task long-polls the API and fans the entries out, so any
+number of SSE subscribers (`/changes/stream` in server.py) cost a single
+upstream request at a time. The newest `buffer` entries are kept in
+memory: a subscriber resuming from a `seq` the buffer still covers is
+served from it, an older one pages through the API on its own until it
+has caught up. When the API answers `reset` (the entries it asked for
+were pruned) the subscriber gets a `reset` event and must reload.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+# fetch(since, wait) -> {"changes": [...], "next": seq, "reset": bool}
+Fetch = Callable[[int | None, float], Awaitable[dict[str, Any]]]
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+	"""Shared, buffered follower of the change feed.
+
+	- `start()` launches the poller (idempotent); `follow()` starts it too.
+	- `on_change(entry)` is called for every entry the poller receives, and
+	  with a `resync` entry when the API reports a `reset`.
+	- `follow(since)` yields `("change", entry)`, `("reset", {"next": seq})`
+	  and, after `heartbeat` idle seconds, `("ping", {})`.
+	"""
+
+	def __init__(
+		self,
+		fetch: Fetch,
+		on_change: Callable[[dict[str, Any]], None] | None = None,
+		buffer: int = 1000,
+		wait: float = 25.0,
+		retry: float = 1.0,
+		heartbeat: float = 15.0,
+	):
+		self._fetch = fetch
+		self._on_change = on_change
+		self.wait = wait
+		self.retry = retry
+		self.heartbeat = heartbeat
+		self.recent: deque[dict[str, Any]] = deque(maxlen=buffer)
+		# `recent` holds every entry after `floor`, up to `head`
+		self.floor: int | None = None
+		self.head: int | None = None
+		self._updated = asyncio.Condition()
+		self._task: asyncio.Task | None = None
+		self.polls = 0
+		self.errors = 0
+		self.resets = 0
+		self.subscribers = 0
+
+	def start(self) -> None:
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		task, self._task = self._task, None
+		if task is None:
+			return
+		task.cancel()
+		try:
+			await task
+		except asyncio.CancelledError:
+			pass
+
+	async def _run(self) -> None:
+		since = None
+		while True:
+			try:
+				body = await self._fetch(since, 0 if since is None else self.wait)
+			except asyncio.CancelledError:
+				raise
+			except Exception:
+				self.errors += 1
+				logger.warning("Polling the change feed failed; retrying in %.1fs", self.retry, exc_info=True)
+				await asyncio.sleep(self.retry)
+				continue
+			self.polls += 1
+			async with self._updated:
+				if since is None or body["reset"]:
+					self.recent.clear()
+					self.floor = body["next"]
+				for change in body["changes"]:
+					if len(self.recent) == self.recent.maxlen:
+						self.floor = self.recent[0]["seq"]
+					self.recent.append(change)
+				since = self.head = body["next"]
+				self._updated.notify_all()
+			if body["reset"]:
+				self.resets += 1
+			if self._on_change:
+				if body["reset"]:
+					self._on_change({"seq": body["next"], "resource": "*", "action": "resync"})
+				for change in body["changes"]:
+					self._on_change(change)
+
+	def _buffered(self, since: int) -> tuple[list[dict[str, Any]], int] | None:
+		"""Entries after `since` and the seq to continue from, or None if the buffer no longer covers it."""
+		if since < self.floor:
+			return None
+		return [c for c in self.recent if c["seq"] > since], max(since, self.head)
+
+	async def follow(self, since: int | None = None) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+		"""Events after `since` (default: from now on), until the caller stops iterating."""
+		self.start()
+		self.subscribers += 1
+		try:
+			async with self._updated:
+				await self._updated.wait_for(lambda: self.head is not None)
+				if since is None:
+					since = self.head
+			while True:
+				batch = None
+				try:
+					async with self._updated:
+						await asyncio.wait_for(
+							self._updated.wait_for(lambda: self.head > since or since < self.floor), self.heartbeat,
+						)
+						batch = self._buffered(since)
+				except asyncio.TimeoutError:
+					yield "ping", {}
+					continue
+				if batch is None:
+					# Fell behind the buffer: catch up from the API
+					try:
+						body = await self._fetch(since, 0)
+					except asyncio.CancelledError:
+						raise
+					except Exception:
+						self.errors += 1
+						logger.warning("Catching up on the change feed failed; retrying in %.1fs", self.retry, exc_info=True)
+						await asyncio.sleep(self.retry)
+						# Keeps the connection alive while the API is unavailable
+						yield "ping", {}
+						continue
+					if body["reset"]:
+						yield "reset", {"next": body["next"]}
+						since = body["next"]
+						continue
+					changes, next_seq = body["changes"], body["next"]
+					if not changes:
+						# Nothing left upstream before the buffer starts
+						next_seq = max(since, self.floor)
+				else:
+					changes, next_seq = batch
+				for change in changes:
+					yield "change", change
+				since = next_seq
+		finally:
+			self.subscribers -= 1
+
+	def stats(self) -> dict[str, Any]:
+		return {
+			"running": self._task is not None and not self._task.done(),
+			"head": self.head,
+			"floor": self.floor,
+			"buffered": len(self.recent),
+			"subscribers": self.subscribers,
+			"polls": self.polls,
+			"errors": self.errors,
+			"resets": self.resets,
+		}
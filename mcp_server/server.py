@@ -1,17 +1,69 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
 import os
-from typing import Any, Literal, TypedDict
+import time
+from typing import Any, AsyncIterator, Iterator, Literal, TypedDict
 
 import httpx
-from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager, contextmanager
 from pydantic import AnyHttpUrl, BaseModel, Field
 
 from mcp.server.fastmcp import FastMCP
 
+from mcp_server.cache import MISSING, ToolCache, ValidatorCache, cache_key
+from mcp_server.feed import ChangeFeed
+from scheduler import metrics
+
 
 # Configuration
 SCHEDULER_API_BASE = os.getenv("SCHEDULER_API_BASE", "http://localhost:8000/api")
 
+# "http" talks to SCHEDULER_API_BASE over the network; "embedded" loads the
+# Django project into this process and calls it in a worker thread (same
+# host, no loopback hop). Tools behave the same either way.
+BACKEND = os.getenv("SCHEDULER_BACKEND", "http").lower()
+
+# Read list/availability calls from the async endpoints (/api/async/...),
+# for APIs served by uvicorn (DJANGO_SERVER=uvicorn scripts/start_servers.sh)
+ASYNC_READS = os.getenv("SCHEDULER_ASYNC_READS", "0").lower() in {"1", "true", "yes"}
+READ_PREFIX = "/async" if ASYNC_READS else ""
+
+# Connection pool for the shared upstream client (see _client())
+HTTP_MAX_CONNECTIONS = int(os.getenv("SCHEDULER_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("SCHEDULER_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SCHEDULER_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("SCHEDULER_HTTP2", "0").lower() in {"1", "true", "yes"}
+HTTP_TIMEOUT = float(os.getenv("SCHEDULER_HTTP_TIMEOUT", "10"))
+
+# Upper bound on rows fetched per upstream page when following cursors
+PAGE_SIZE = int(os.getenv("SCHEDULER_PAGE_SIZE", "200"))
+
+# Per-tool timeouts in seconds; override with SCHEDULER_TOOL_TIMEOUTS='{"list_meetings": 30}'
+TOOL_TIMEOUTS: dict[str, float] = {
+	"api_info": 2.0,
+	**{k: float(v) for k, v in json.loads(os.getenv("SCHEDULER_TOOL_TIMEOUTS", "{}")).items()},
+}
+
+# Read-through cache for list tools; MCP_CACHE_TTL=0 disables it
+CACHE_TTL = float(os.getenv("MCP_CACHE_TTL", "10"))
+CACHE_SIZE = int(os.getenv("MCP_CACHE_SIZE", "256"))
+# Upstream GET bodies kept for ETag revalidation; 0 disables conditional requests
+ETAG_CACHE_SIZE = int(os.getenv("MCP_ETAG_CACHE_SIZE", "512"))
+# Follow the API's change feed from startup, dropping cached results that
+# other writers made stale; /changes/stream starts it on first use anyway
+CHANGE_FEED = os.getenv("MCP_CHANGE_FEED", "0").lower() in {"1", "true", "yes"}
+# Entries kept in memory for SSE subscribers that resume with Last-Event-ID
+CHANGE_FEED_BUFFER = int(os.getenv("MCP_CHANGE_FEED_BUFFER", "1000"))
+# Seconds each upstream long-poll waits for new entries (the API caps it at 30)
+CHANGE_FEED_WAIT = float(os.getenv("MCP_CHANGE_FEED_WAIT", "25"))
+
+logger = logging.getLogger(__name__)
+
 
 # Pydantic models for structured tool I/O
 class ClientIn(BaseModel):
@@ -28,6 +80,10 @@ class ClientOut(BaseModel):
 	created_at: str
 
 
+class ClientMatch(ClientOut):
+	score: float
+
+
 class MeetingIn(BaseModel):
 	client: int = Field(description="Client ID")
 	title: str
@@ -38,7 +94,7 @@ class MeetingIn(BaseModel):
 
 
 class MeetingOut(BaseModel):
-	id: int
+	id: int | None = Field(description="Null for an occurrence of a recurring series")
 	client: int
 	title: str
 	start_time: str
@@ -46,6 +102,61 @@ class MeetingOut(BaseModel):
 	location: str | None = None
 	notes: str | None = None
 	created_at: str
+	series: int | None = Field(default=None, description="Recurring series this occurrence belongs to")
+	original_start: str | None = Field(default=None, description="Scheduled start of the occurrence, which identifies it")
+
+
+class MeetingExport(BaseModel):
+	count: int
+	truncated: bool = Field(description="True when more meetings matched than `max_rows`")
+	meetings: list[MeetingOut]
+
+
+class BatchItemResult(BaseModel):
+	index: int = Field(description="Position of the item in the submitted batch")
+	status: Literal["created", "error"]
+	id: int | None = None
+	errors: Any = None
+
+
+class BatchResult(BaseModel):
+	created: int
+	failed: int
+	results: list[BatchItemResult]
+
+
+class TimeSlot(BaseModel):
+	start: str
+	end: str
+
+
+class AvailabilityOut(BaseModel):
+	clients: list[int]
+	start: str
+	end: str
+	duration: int = Field(description="Slot length in minutes")
+	slots: list[TimeSlot]
+
+
+class OccupancyDay(BaseModel):
+	date: str
+	meetings: int
+	busy_minutes: float
+
+
+class OccupancyOut(BaseModel):
+	client: int
+	start: str
+	end: str
+	meetings: int = Field(description="Sum over the days; a meeting spanning midnight counts on both")
+	busy_minutes: float
+	days: list[OccupancyDay]
+
+
+# Sparse fieldsets requested from the API (`?fields=`), matching the output models
+CLIENT_FIELDS = ",".join(ClientOut.model_fields)
+OCCURRENCE_FIELDS = ",".join(MeetingOut.model_fields)
+MEETING_FIELDS = ",".join(f for f in MeetingOut.model_fields if f not in ("series", "original_start"))
 
 
 # Create FastMCP server
@@ -54,31 +165,298 @@ mcp = FastMCP(name="Meeting Scheduler MCP")
 mcp.settings.streamable_http_path = "/"
 
 
+class PoolStats:
+	"""Request counters for the shared client, used to spot pool saturation."""
+
+	def __init__(self, max_connections: int):
+		self.max_connections = max_connections
+		self.in_flight = 0
+		self.peak_in_flight = 0
+		self.requests = 0
+		self.errors = 0
+		self.saturated = 0  # requests issued while every connection was busy
+
+	def snapshot(self) -> dict[str, Any]:
+		return {
+			"max_connections": self.max_connections,
+			"in_flight": self.in_flight,
+			"peak_in_flight": self.peak_in_flight,
+			"requests": self.requests,
+			"errors": self.errors,
+			"saturated": self.saturated,
+			"utilization": round(self.in_flight / self.max_connections, 3) if self.max_connections else 0.0,
+		}
+
+
+_http: httpx.AsyncClient | None = None
+pool_stats = PoolStats(HTTP_MAX_CONNECTIONS)
+tool_cache = ToolCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+validators = ValidatorCache(maxsize=ETAG_CACHE_SIZE)
+
+# Exposed on /metrics with everything else in scheduler.metrics.REGISTRY
+TOOL_SECONDS = metrics.Histogram("mcp_tool_duration_seconds", "Tool call latency, including cache hits", ("tool",))
+TOOL_CALLS = metrics.Counter("mcp_tool_calls", "Tool calls by outcome (error: the tool raised)", ("tool", "outcome"))
+UPSTREAM_SECONDS = metrics.Histogram("mcp_upstream_request_duration_seconds", "Scheduler API request latency, by calling tool", ("tool",))
+UPSTREAM_RESPONSES = metrics.Counter("mcp_upstream_responses", "Scheduler API responses by status code", ("tool", "status"))
+UPSTREAM_ERRORS = metrics.Counter("mcp_upstream_errors", "Scheduler API requests that failed without a response (connect errors, timeouts)", ("tool",))
+metrics.Gauge("mcp_upstream_in_flight", "Scheduler API requests in flight", function=lambda: pool_stats.in_flight)
+metrics.Counter("mcp_upstream_saturated", "Requests issued while every pooled connection was busy", function=lambda: pool_stats.saturated)
+metrics.Gauge("mcp_tool_cache_entries", "Entries in the tool result cache", function=lambda: len(tool_cache._entries))
+metrics.Counter(
+	"mcp_tool_cache_lookups", "Tool result cache lookups by result", ("result",),
+	function=lambda: {("hit",): tool_cache.hits, ("miss",): tool_cache.misses, ("coalesced",): tool_cache.coalesced},
+)
+metrics.Counter(
+	"mcp_etag_revalidations", "Conditional upstream GETs by result", ("result",),
+	function=lambda: {("not_modified",): validators.not_modified, ("modified",): validators.modified},
+)
+
+
+def _http2_enabled() -> bool:
+	if not HTTP2:
+		return False
+	try:
+		import h2  # noqa: F401
+	except ImportError:
+		logger.warning("SCHEDULER_HTTP2 is set but 'h2' is not installed; falling back to HTTP/1.1")
+		return False
+	return True
+
+
+class EmbeddedTransport(httpx.AsyncBaseTransport):
+	"""Hands requests to the Django project loaded into this process.
+
+	Each request runs through Django's WSGI handler in a worker thread:
+	one thread hop per call, where the ASGI handler takes one or two per
+	middleware. Responses are read in full inside the thread, so streamed
+	endpoints (`export_meetings`) are buffered.
+	"""
+
+	def __init__(self) -> None:
+		os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scheduler.settings")
+		from django.core.wsgi import get_wsgi_application
+
+		self._wsgi = httpx.WSGITransport(app=get_wsgi_application())
+
+	def _call(self, request: httpx.Request) -> httpx.Response:
+		response = self._wsgi.handle_request(request)
+		try:
+			response.read()
+		finally:
+			# Fires request_finished, which gives the thread's DB connection back
+			response.close()
+		return response
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		await request.aread()
+		response = await asyncio.to_thread(self._call, request)
+		return httpx.Response(response.status_code, headers=response.headers, content=response.content)
+
+
+def _new_client() -> httpx.AsyncClient:
+	if BACKEND == "embedded":
+		# The host part of SCHEDULER_API_BASE only ends up in the Host header
+		return httpx.AsyncClient(base_url=SCHEDULER_API_BASE, timeout=HTTP_TIMEOUT, transport=EmbeddedTransport())
+	if BACKEND != "http":
+		raise ValueError(f"SCHEDULER_BACKEND must be 'http' or 'embedded', not {BACKEND!r}")
+	limits = httpx.Limits(
+		max_connections=HTTP_MAX_CONNECTIONS,
+		max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+		keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+	)
+	return httpx.AsyncClient(
+		base_url=SCHEDULER_API_BASE,
+		timeout=HTTP_TIMEOUT,
+		limits=limits,
+		http2=_http2_enabled(),
+	)
+
+
 def _client() -> httpx.AsyncClient:
-	return httpx.AsyncClient(base_url=SCHEDULER_API_BASE, timeout=10.0)
+	"""Return the shared pooled client, creating it on first use.
+
+	The FastAPI lifespan opens and closes it; the lazy path covers `mcp.run()`,
+	which does not go through the FastAPI app.
+	"""
+	global _http
+	if _http is None or _http.is_closed:
+		_http = _new_client()
+	return _http
+
+
+async def _close_client() -> None:
+	global _http
+	if _http is not None:
+		await _http.aclose()
+		_http = None
+
+
+@contextmanager
+def _tracked(tool: str) -> Iterator[None]:
+	"""Pool accounting and latency metrics around one upstream request."""
+	stats = pool_stats
+	stats.requests += 1
+	if stats.in_flight >= stats.max_connections:
+		stats.saturated += 1
+	stats.in_flight += 1
+	stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+	started = time.perf_counter()
+	try:
+		yield
+	except httpx.HTTPError:
+		stats.errors += 1
+		UPSTREAM_ERRORS.inc(tool)
+		raise
+	finally:
+		stats.in_flight -= 1
+		UPSTREAM_SECONDS.observe(time.perf_counter() - started, tool)
+
+
+async def _request(tool: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+	"""Send a request on the shared client with the tool's timeout and pool accounting."""
+	kwargs.setdefault("timeout", TOOL_TIMEOUTS.get(tool, HTTP_TIMEOUT))
+	with _tracked(tool):
+		r = await _client().request(method, url, **kwargs)
+	UPSTREAM_RESPONSES.inc(tool, str(r.status_code))
+	return r
+
+
+@asynccontextmanager
+async def _stream(tool: str, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+	"""Like `_request`, but the body is read incrementally inside the block."""
+	kwargs.setdefault("timeout", TOOL_TIMEOUTS.get(tool, HTTP_TIMEOUT))
+	with _tracked(tool):
+		async with _client().stream(method, url, **kwargs) as r:
+			UPSTREAM_RESPONSES.inc(tool, str(r.status_code))
+			yield r
+
+
+def _instrumented(fn: Any) -> Any:
+	"""Record a tool's latency and outcome; applied under every `@mcp.tool()`."""
+	name = fn.__name__
+
+	@functools.wraps(fn)
+	async def wrapper(*args: Any, **kwargs: Any) -> Any:
+		started = time.perf_counter()
+		outcome = "error"
+		try:
+			result = await fn(*args, **kwargs)
+			outcome = "ok"
+			return result
+		finally:
+			TOOL_SECONDS.observe(time.perf_counter() - started, name)
+			TOOL_CALLS.inc(name, outcome)
+
+	return wrapper
+
+
+async def _get_json(tool: str, path: str, params: dict[str, Any]) -> Any:
+	"""GET `path` and decode it, revalidating a previously seen body by ETag."""
+	url = str(httpx.URL(path, params=params))
+	etag = validators.etag(url)
+	r = await _request(tool, "GET", url, headers={"If-None-Match": etag} if etag else None)
+	if r.status_code == 304 and etag:
+		body = validators.revalidated(url)
+		if body is not MISSING:
+			return body
+		r = await _request(tool, "GET", url)
+	r.raise_for_status()
+	data = r.json()
+	validators.store(url, r.headers.get("ETag"), data)
+	return data
+
+
+async def _iter_pages(tool: str, path: str, params: dict[str, Any], limit: int) -> AsyncIterator[dict[str, Any]]:
+	"""Yield up to `limit` rows, following keyset cursors one page at a time.
+
+	Pages are only requested while the caller keeps consuming, and each page
+	asks for no more rows than are still needed.
+	"""
+	remaining = limit
+	cursor: str | None = None
+	while remaining > 0:
+		page_params = {**params, "limit": min(remaining, PAGE_SIZE)}
+		if cursor:
+			page_params["cursor"] = cursor
+		data = await _get_json(tool, path, page_params)
+		rows = data if isinstance(data, list) else data.get("results", [])
+		for row in rows[:remaining]:
+			yield row
+		remaining -= len(rows)
+		cursor = None if isinstance(data, list) else data.get("next_cursor")
+		if not cursor:
+			return
+
+
+def _meetings_tag(client_id: int | None) -> str:
+	return "meetings:all" if client_id is None else f"meetings:client:{client_id}"
+
+
+def _invalidate_meetings(client_ids: list[int]) -> None:
+	"""Drop cached meeting lists that could include meetings of `client_ids`."""
+	tool_cache.invalidate([_meetings_tag(None), *(_meetings_tag(c) for c in set(client_ids))])
+
+
+async def _fetch_changes(since: int | None, wait: float) -> dict[str, Any]:
+	params: dict[str, Any] = {"limit": 1000}
+	if since is not None:
+		params["since"] = since
+	if wait:
+		params["wait"] = wait
+	r = await _request("change_feed", "GET", f"{READ_PREFIX}/changes/", params=params, timeout=wait + HTTP_TIMEOUT)
+	r.raise_for_status()
+	return r.json()
+
+
+def _apply_change(change: dict[str, Any]) -> None:
+	"""Drop cached tool results a change feed entry made stale."""
+	if change["resource"] == "*":
+		tool_cache.clear()
+	elif change["resource"] == "client":
+		tool_cache.invalidate(["clients"])
+		if change["action"] == "deleted":
+			_invalidate_meetings([change["object_id"]])
+	else:
+		# An update moving a meeting to another client leaves the old
+		# client's lists to expire with MCP_CACHE_TTL
+		_invalidate_meetings([change["client"]])
+
+
+change_feed = ChangeFeed(_fetch_changes, on_change=_apply_change, buffer=CHANGE_FEED_BUFFER, wait=CHANGE_FEED_WAIT)
 
 
 @mcp.tool()
+@_instrumented
 async def api_info() -> dict[str, Any]:
-	"""Get configured scheduler API base and simple status."""
-	async with _client() as client:
-		# Try a lightweight list call to confirm connectivity
-		try:
-			r = await client.get("/clients/", params={"limit": 1})
-			ok = r.status_code == 200
-		except Exception:
-			ok = False
-	return {"base": SCHEDULER_API_BASE, "reachable": ok}
+	"""Get configured scheduler API base, simple status and upstream pool metrics."""
+	# Try a lightweight list call to confirm connectivity
+	started = time.perf_counter()
+	try:
+		r = await _request("api_info", "GET", "/clients/", params={"limit": 1, "fields": "id"})
+		ok = r.status_code == 200
+	except Exception:
+		ok = False
+	latency_ms = round((time.perf_counter() - started) * 1000, 2)
+	return {"base": SCHEDULER_API_BASE, "backend": BACKEND, "reachable": ok, "latency_ms": latency_ms, "pool": pool_stats.snapshot()}
 
 
 @mcp.tool()
-async def list_clients(name: str | None = None, email: str | None = None, search: str | None = None, ordering: str | None = None) -> list[ClientOut]:
+@_instrumented
+async def list_clients(
+	name: str | None = None,
+	email: str | None = None,
+	search: str | None = None,
+	ordering: str | None = None,
+	limit: int = 100,
+) -> list[ClientOut]:
 	"""List clients. Filters: `name` (mapped to `search`), `email`, `search` (name,email,phone), `ordering` (name,-name,created_at).
 
+	Returns at most `limit` clients, fetched page by page from the API.
+
 	Note: If `search` is provided, it takes precedence; otherwise, `name` is
 	mapped to `search` to enable case-insensitive matching across name/email/phone.
 	"""
-	params: dict[str, Any] = {}
+	params: dict[str, Any] = {"fields": CLIENT_FIELDS}
 	if email:
 		params["email"] = email
 	# Prefer broad, case-insensitive search; fall back to name -> search
@@ -88,34 +466,76 @@ async def list_clients(name: str | None = None, email: str | None = None, search
 		params["search"] = name
 	if ordering:
 		params["ordering"] = ordering
-	async with _client() as client:
-		r = await client.get("/clients/", params=params)
-		r.raise_for_status()
-		data = r.json()
-		if isinstance(data, list):
-			return [ClientOut(**c) for c in data]
-		return [ClientOut(**c) for c in data.get("results", [])]
+
+	async def load() -> list[ClientOut]:
+		return [ClientOut(**c) async for c in _iter_pages("list_clients", f"{READ_PREFIX}/clients/", params, limit)]
+
+	key = cache_key("list_clients", {**params, "limit": limit})
+	return await tool_cache.get_or_load(key, load, tags=["clients"])
 
 
 @mcp.tool()
+@_instrumented
+async def search_clients(query: str, limit: int = 10, fuzzy: bool = True) -> list[ClientMatch]:
+	"""Find clients by (part of) their name, email or phone, best match first.
+
+	Prefix matches score above 1, other substring matches above 0.5; with
+	`fuzzy`, misspelled queries also find similar clients. `limit` is at most 100.
+	"""
+	params = {"q": query, "limit": limit, "fuzzy": str(fuzzy).lower()}
+
+	async def load() -> list[ClientMatch]:
+		return [ClientMatch(**c) for c in await _get_json("search_clients", "/clients/search/", params)]
+
+	return await tool_cache.get_or_load(cache_key("search_clients", params), load, tags=["clients"])
+
+
+@mcp.tool()
+@_instrumented
 async def create_client(payload: ClientIn) -> ClientOut:
 	"""Create a client with name, email, and optional phone."""
-	async with _client() as client:
-		r = await client.post("/clients/", json=payload.model_dump(exclude_none=True))
-		r.raise_for_status()
-		return ClientOut(**r.json())
+	r = await _request("create_client", "POST", "/clients/", json=payload.model_dump(exclude_none=True))
+	r.raise_for_status()
+	tool_cache.invalidate(["clients"])
+	return ClientOut(**r.json())
 
 
 @mcp.tool()
+@_instrumented
 async def list_meetings(
 	client_id: int | None = None,
 	title: str | None = None,
 	start: str | None = None,
 	end: str | None = None,
 	ordering: str | None = None,
+	limit: int = 100,
+	include_recurring: bool = False,
 ) -> list[MeetingOut]:
-	"""List meetings with optional filters: `client_id`, `title`, `start`, `end`, `ordering`."""
-	params: dict[str, Any] = {}
+	"""List meetings with optional filters: `client_id`, `title`, `start`, `end`, `ordering`.
+
+	Returns at most `limit` meetings, fetched page by page from the API.
+	With `include_recurring`, occurrences of recurring series (with `series`
+	set and a null `id`) are merged in by start time; this needs `start`
+	and `end` (at most 366 days apart) and ignores `ordering`.
+	"""
+	if include_recurring:
+		if not (start and end):
+			raise ValueError("include_recurring needs both start and end")
+		params: dict[str, Any] = {"fields": OCCURRENCE_FIELDS, "occurrences": "true", "start": start, "end": end}
+		if client_id is not None:
+			params["client"] = client_id
+		if title:
+			params["title"] = title
+
+		async def load_occurrences() -> list[MeetingOut]:
+			# Not paginated: one capped response
+			rows = await _get_json("list_meetings", f"{READ_PREFIX}/meetings/", {**params, "limit": limit})
+			return [MeetingOut(**m) for m in rows]
+
+		key = cache_key("list_meetings", {**params, "limit": limit})
+		return await tool_cache.get_or_load(key, load_occurrences, tags=[_meetings_tag(client_id)])
+
+	params = {"fields": MEETING_FIELDS}
 	if client_id is not None:
 		params["client"] = client_id
 	if title:
@@ -126,28 +546,184 @@ async def list_meetings(
 		params["end"] = end
 	if ordering:
 		params["ordering"] = ordering
-	async with _client() as client:
-		r = await client.get("/meetings/", params=params)
-		r.raise_for_status()
-		data = r.json()
-		if isinstance(data, list):
-			return [MeetingOut(**m) for m in data]
-		return [MeetingOut(**m) for m in data.get("results", [])]
+
+	async def load() -> list[MeetingOut]:
+		return [MeetingOut(**m) async for m in _iter_pages("list_meetings", f"{READ_PREFIX}/meetings/", params, limit)]
+
+	key = cache_key("list_meetings", {**params, "limit": limit})
+	return await tool_cache.get_or_load(key, load, tags=[_meetings_tag(client_id)])
 
 
 @mcp.tool()
+@_instrumented
 async def create_meeting(payload: MeetingIn) -> MeetingOut:
 	"""Create a meeting; respects serializer validations (end > start, no per-client overlap)."""
-	async with _client() as client:
-		r = await client.post("/meetings/", json=payload.model_dump(exclude_none=True))
+	r = await _request("create_meeting", "POST", "/meetings/", json=payload.model_dump(exclude_none=True))
+	if r.status_code >= 400:
+		# Normalize DRF errors into a readable string while keeping raw body
+		try:
+			err = r.json()
+		except Exception:
+			err = {"detail": r.text}
+		raise ValueError(f"Scheduler API error {r.status_code}: {err}")
+	_invalidate_meetings([payload.client])
+	return MeetingOut(**r.json())
+
+
+@mcp.tool()
+@_instrumented
+async def export_meetings(
+	client_id: int | None = None,
+	title: str | None = None,
+	start: str | None = None,
+	end: str | None = None,
+	ordering: str | None = None,
+	max_rows: int = 1000,
+) -> MeetingExport:
+	"""Export all meetings matching the filters (e.g. a whole year via `start`/`end`), up to `max_rows`.
+
+	Rows are streamed from the API as NDJSON and parsed one line at a time;
+	the stream is closed as soon as `max_rows` is reached.
+	"""
+	max_rows = max(0, max_rows)
+	# One extra row tells a complete export from a truncated one
+	params: dict[str, Any] = {"fields": MEETING_FIELDS, "limit": max_rows + 1}
+	if client_id is not None:
+		params["client"] = client_id
+	if title:
+		params["title"] = title
+	if start:
+		params["start"] = start
+	if end:
+		params["end"] = end
+	if ordering:
+		params["ordering"] = ordering
+
+	meetings: list[MeetingOut] = []
+	truncated = False
+	async with _stream("export_meetings", "GET", "/meetings/export/", params=params) as r:
 		if r.status_code >= 400:
-			# Normalize DRF errors into a readable string while keeping raw body
-			try:
-				err = r.json()
-			except Exception:
-				err = {"detail": r.text}
-			raise ValueError(f"Scheduler API error {r.status_code}: {err}")
-		return MeetingOut(**r.json())
+			await r.aread()
+			r.raise_for_status()
+		async for line in r.aiter_lines():
+			if not line:
+				continue
+			if len(meetings) == max_rows:
+				truncated = True
+				break
+			meetings.append(MeetingOut(**json.loads(line)))
+	return MeetingExport(count=len(meetings), truncated=truncated, meetings=meetings)
+
+
+@mcp.tool()
+@_instrumented
+async def find_free_slots(
+	client_ids: list[int],
+	start: str,
+	end: str,
+	duration_minutes: int = 30,
+	limit: int = 5,
+	work_start: str = "09:00",
+	work_end: str = "17:00",
+	days: str = "mon,tue,wed,thu,fri",
+	tz: str = "UTC",
+) -> AvailabilityOut:
+	"""Find the first `limit` slots of `duration_minutes` when all `client_ids` are free.
+
+	Searches `start`..`end` (ISO-8601, max 92 days) within working hours
+	`work_start`-`work_end` on `days` in time zone `tz`. Prefer this over
+	listing meetings and computing gaps yourself.
+	"""
+	params = {
+		"clients": ",".join(str(c) for c in client_ids),
+		"start": start,
+		"end": end,
+		"duration": duration_minutes,
+		"limit": limit,
+		"work_start": work_start,
+		"work_end": work_end,
+		"days": days,
+		"tz": tz,
+	}
+	r = await _request("find_free_slots", "GET", f"{READ_PREFIX}/availability/", params=params)
+	if r.status_code >= 400:
+		raise ValueError(f"Scheduler API error {r.status_code}: {r.text}")
+	return AvailabilityOut(**r.json())
+
+
+@mcp.tool()
+@_instrumented
+async def client_occupancy(client_id: int, start: str, end: str) -> OccupancyOut:
+	"""How busy a client is: meetings and busy minutes per UTC day from `start` to `end`.
+
+	`start` and `end` are dates (YYYY-MM-DD, `end` included, at most 366
+	days). Recurring series are included. Prefer this over listing meetings
+	and adding them up yourself.
+	"""
+	params = {"start": start, "end": end}
+
+	async def load() -> OccupancyOut:
+		return OccupancyOut(**await _get_json("client_occupancy", f"/clients/{client_id}/occupancy/", params))
+
+	key = cache_key("client_occupancy", {"client_id": client_id, **params})
+	return await tool_cache.get_or_load(key, load, tags=[_meetings_tag(client_id)])
+
+
+async def _post_batch(tool: str, path: str, items: list[BaseModel]) -> BatchResult:
+	r = await _request(tool, "POST", path, json=[item.model_dump(exclude_none=True) for item in items])
+	try:
+		body = r.json()
+	except ValueError:
+		body = None
+	# 201/207/400 all carry per-item results; anything else is a request-level failure
+	if not isinstance(body, dict) or "results" not in body:
+		raise ValueError(f"Scheduler API error {r.status_code}: {body if body is not None else r.text}")
+	return BatchResult(**body)
+
+
+@mcp.tool()
+@_instrumented
+async def create_clients_batch(payload: list[ClientIn]) -> BatchResult:
+	"""Create up to 1000 clients in one call. Failures (e.g. duplicate email) are reported per item."""
+	result = await _post_batch("create_clients_batch", "/clients/bulk/", payload)
+	if result.created:
+		tool_cache.invalidate(["clients"])
+	return result
+
+
+@mcp.tool()
+@_instrumented
+async def create_meetings_batch(payload: list[MeetingIn]) -> BatchResult:
+	"""Create up to 1000 meetings in one call.
+
+	Each item is checked for overlaps against existing meetings and earlier
+	items of the batch; failures are reported per item by `index`.
+	"""
+	result = await _post_batch("create_meetings_batch", "/meetings/bulk/", payload)
+	if result.created:
+		_invalidate_meetings([payload[item.index].client for item in result.results if item.status == "created"])
+	return result
+
+
+SERVER_VERSION = "0.1.0"
+
+
+def _advertised_version() -> str:
+	"""`SERVER_VERSION` plus a digest of the tool definitions.
+
+	Clients cache `tools/list` per advertised version (client/tool_cache.py),
+	so any change to a tool's name, description or schemas must change it.
+	"""
+	tools = [
+		{"name": t.name, "description": t.description, "input": t.parameters, "output": t.output_schema}
+		for t in mcp._tool_manager.list_tools()
+	]
+	digest = hashlib.sha256(json.dumps(tools, sort_keys=True, default=str).encode()).hexdigest()[:12]
+	return f"{SERVER_VERSION}+tools.{digest}"
+
+
+# FastMCP has no public option for the version sent in `initialize`
+mcp._mcp_server.version = _advertised_version()
 
 
 @asynccontextmanager
@@ -157,17 +733,61 @@ async def _lifespan(app: FastAPI):
 	# Ensure the session manager exists (created lazily by streamable_http_app()).
 	mcp_app_placeholder = mcp.streamable_http_app()
 	_ = mcp_app_placeholder  # silence unused variable warning
-	async with mcp.session_manager.run():
-		yield
+	# One pooled upstream client shared by every tool call for the app's lifetime.
+	_client()
+	if CHANGE_FEED:
+		change_feed.start()
+	try:
+		async with mcp.session_manager.run():
+			yield
+	finally:
+		await change_feed.stop()
+		await _close_client()
 
 
 # Expose FastAPI with health and mount MCP (Streamable HTTP)
-app = FastAPI(title="Meeting Scheduler MCP", version="0.1.0", lifespan=_lifespan)
+app = FastAPI(title="Meeting Scheduler MCP", version=SERVER_VERSION, lifespan=_lifespan)
 
 
 @app.get("/health")
-async def health() -> dict[str, str]:
-	return {"status": "ok"}
+async def health() -> dict[str, Any]:
+	return {
+		"status": "ok", "pool": pool_stats.snapshot(), "cache": tool_cache.stats(), "validators": validators.stats(),
+		"change_feed": change_feed.stats(),
+	}
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+	if event == "ping":
+		return ": keep-alive\n\n"
+	lines = [f"id: {data['seq']}"] if event == "change" else []
+	lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+	return "\n".join(lines) + "\n\n"
+
+
+@app.get("/changes/stream")
+async def change_stream(request: Request, since: int | None = None) -> StreamingResponse:
+	"""Server-sent events for every change after `since` (or `Last-Event-ID`; default: from now on).
+
+	`change` events carry a feed entry with its `seq` as the event id;
+	`reset` means entries were pruned before this subscriber read them and
+	it must reload, then continue from `next`.
+	"""
+	last_event_id = request.headers.get("Last-Event-ID", "")
+	if since is None and last_event_id.isdigit():
+		since = int(last_event_id)
+
+	async def events() -> AsyncIterator[str]:
+		async for event, data in change_feed.follow(since):
+			yield _sse(event, data)
+
+	return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+	# In embedded mode this includes the Django request metrics of this process
+	return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # Mount MCP streamable HTTP server at /mcp
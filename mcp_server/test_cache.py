@@ -0,0 +1,176 @@
+import asyncio
+import unittest
+
+from mcp_server.cache import MISSING, ToolCache, ValidatorCache, cache_key
+
+
+class ToolCacheTest(unittest.IsolatedAsyncioTestCase):
+	async def test_hit_miss_and_key_normalization(self):
+		cache = ToolCache(maxsize=8, ttl=60)
+		calls = []
+
+		async def load():
+			calls.append(1)
+			return ["row"]
+
+		self.assertEqual(cache_key("t", {"b": 1, "a": None, "c": "x"}), cache_key("t", {"c": "x", "b": 1}))
+		key = cache_key("list_clients", {"search": "bob"})
+		self.assertEqual(await cache.get_or_load(key, load, tags=["clients"]), ["row"])
+		self.assertEqual(await cache.get_or_load(key, load, tags=["clients"]), ["row"])
+		self.assertEqual(len(calls), 1)
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+	async def test_single_flight(self):
+		cache = ToolCache(maxsize=8, ttl=60)
+		gate = asyncio.Event()
+		calls = []
+
+		async def load():
+			calls.append(1)
+			await gate.wait()
+			return 42
+
+		tasks = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(5)]
+		await asyncio.sleep(0)
+		gate.set()
+		self.assertEqual(await asyncio.gather(*tasks), [42] * 5)
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(cache.coalesced, 4)
+
+	async def test_cancelled_caller_does_not_cancel_the_others(self):
+		cache = ToolCache(maxsize=8, ttl=60)
+		gate = asyncio.Event()
+		calls = []
+
+		async def load():
+			calls.append(1)
+			await gate.wait()
+			return 42
+
+		leader = asyncio.create_task(cache.get_or_load("k", load))
+		await asyncio.sleep(0)
+		followers = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(2)]
+		await asyncio.sleep(0)
+		leader.cancel()
+		await asyncio.sleep(0.01)
+		gate.set()
+		self.assertEqual(await asyncio.gather(*followers), [42, 42])
+		self.assertTrue(leader.cancelled())
+		# One follower took over the load, the other joined it
+		self.assertEqual(len(calls), 2)
+
+		# A cancelled follower leaves the load running for the rest
+		gate.clear()
+		cache.clear()
+		leader = asyncio.create_task(cache.get_or_load("k", load))
+		await asyncio.sleep(0)
+		follower = asyncio.create_task(cache.get_or_load("k", load))
+		await asyncio.sleep(0)
+		follower.cancel()
+		gate.set()
+		self.assertEqual(await leader, 42)
+		self.assertTrue(follower.cancelled())
+
+	async def test_errors_are_shared_but_not_cached(self):
+		cache = ToolCache(maxsize=8, ttl=60)
+
+		async def fail():
+			raise RuntimeError("upstream down")
+
+		with self.assertRaises(RuntimeError):
+			await cache.get_or_load("k", fail)
+
+		async def ok():
+			return "fine"
+
+		self.assertEqual(await cache.get_or_load("k", ok), "fine")
+
+	async def test_lru_eviction_and_ttl(self):
+		cache = ToolCache(maxsize=2, ttl=60)
+
+		async def value(v):
+			return v
+
+		for k in ("a", "b", "c"):
+			await cache.get_or_load(k, lambda k=k: value(k))
+		self.assertEqual(cache.evictions, 1)
+		self.assertEqual(cache.stats()["size"], 2)
+
+		cache.ttl = 0.01
+		await cache.get_or_load("d", lambda: value("d"))
+		await asyncio.sleep(0.02)
+		cache.ttl = 60
+		await cache.get_or_load("d", lambda: value("d2"))
+		self.assertEqual(cache.expirations, 1)
+
+	async def test_invalidation_discards_inflight_result(self):
+		cache = ToolCache(maxsize=8, ttl=60)
+		gate = asyncio.Event()
+
+		async def slow():
+			await gate.wait()
+			return "stale"
+
+		task = asyncio.create_task(cache.get_or_load("m", slow, tags=["meetings:client:1"]))
+		await asyncio.sleep(0)
+		self.assertEqual(cache.invalidate(["meetings:client:1"]), 0)
+		gate.set()
+		self.assertEqual(await task, "stale")
+
+		async def fresh():
+			return "fresh"
+
+		# The stale load was not stored, so this goes upstream again
+		self.assertEqual(await cache.get_or_load("m", fresh, tags=["meetings:client:1"]), "fresh")
+		await cache.get_or_load("other", fresh, tags=["meetings:client:2"])
+		self.assertEqual(cache.invalidate(["meetings:client:1"]), 1)
+		self.assertEqual(cache.stats()["size"], 1)
+
+	async def test_clear_discards_inflight_result(self):
+		cache = ToolCache(maxsize=8, ttl=60)
+		gate = asyncio.Event()
+
+		async def slow():
+			await gate.wait()
+			return "stale"
+
+		async def fresh():
+			return "fresh"
+
+		task = asyncio.create_task(cache.get_or_load("c", slow))
+		await asyncio.sleep(0)
+		cache.clear()
+		# Neither joins the load that started before the clear ...
+		self.assertEqual(await cache.get_or_load("c", fresh), "fresh")
+		gate.set()
+		self.assertEqual(await task, "stale")
+		# ... nor lets it overwrite the newer result
+		self.assertEqual(await cache.get_or_load("c", slow), "fresh")
+
+
+class ValidatorCacheTest(unittest.TestCase):
+	def test_revalidation_and_lru(self):
+		v = ValidatorCache(maxsize=2)
+		v.store("/a", 'W/"1"', ["a"])
+		v.store("/b", None, ["b"])  # no validator, not kept
+		self.assertEqual(v.etag("/a"), 'W/"1"')
+		self.assertIsNone(v.etag("/b"))
+		self.assertEqual(v.revalidated("/a"), ["a"])
+		v.store("/a", 'W/"2"', ["a2"])
+		self.assertEqual((v.not_modified, v.modified), (1, 1))
+		v.store("/c", 'W/"3"', [])
+		v.store("/d", 'W/"4"', [])
+		self.assertIsNone(v.etag("/a"))
+		self.assertEqual(ValidatorCache(maxsize=0).etag("/a"), None)
+
+	def test_revalidated_after_eviction(self):
+		v = ValidatorCache(maxsize=1)
+		v.store("/a", 'W/"1"', ["a"])
+		# Another request evicts /a while the 304 for it is on its way
+		v.store("/b", 'W/"2"', ["b"])
+		self.assertIs(v.revalidated("/a"), MISSING)
+		self.assertEqual(v.not_modified, 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
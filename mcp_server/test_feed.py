@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+
+from mcp_server.feed import ChangeFeed
+
+
+class FakeFeed:
+	"""The API's change feed in memory: `append()` entries, `prune(seq)` them."""
+
+	def __init__(self):
+		self.entries = []
+		self.pruned = 0
+		self.calls = []
+		self._appended = asyncio.Event()
+
+	def append(self, *resources):
+		for resource in resources:
+			seq = (self.entries[-1]["seq"] if self.entries else self.pruned) + 1
+			self.entries.append({"seq": seq, "resource": resource, "action": "created", "object_id": seq, "client": 1})
+		self._appended.set()
+
+	def prune(self, seq):
+		self.entries = [e for e in self.entries if e["seq"] > seq]
+		self.pruned = seq
+
+	def head(self):
+		return self.entries[-1]["seq"] if self.entries else self.pruned
+
+	async def fetch(self, since, wait):
+		self.calls.append((since, wait))
+		if since is None:
+			return {"changes": [], "next": self.head(), "reset": False}
+		if since < self.pruned:
+			return {"changes": [], "next": self.head(), "reset": True}
+		if wait and self.head() <= since:
+			self._appended.clear()
+			try:
+				await asyncio.wait_for(self._appended.wait(), wait)
+			except asyncio.TimeoutError:
+				pass
+		changes = [e for e in self.entries if e["seq"] > since][:2]
+		return {"changes": changes, "next": changes[-1]["seq"] if changes else since, "reset": False}
+
+
+async def take(events, count):
+	return [await anext(events) for _ in range(count)]
+
+
+class ChangeFeedTest(unittest.IsolatedAsyncioTestCase):
+	async def asyncSetUp(self):
+		self.api = FakeFeed()
+		self.seen = []
+		self.feed = ChangeFeed(self.api.fetch, on_change=self.seen.append, buffer=3, wait=5, heartbeat=5)
+
+	async def asyncTearDown(self):
+		await self.feed.stop()
+
+	async def test_subscribers_share_one_poller(self):
+		self.api.append("client")
+		first, second = self.feed.follow(), self.feed.follow()
+		pending = asyncio.gather(take(first, 2), take(second, 2))
+		await asyncio.sleep(0.01)
+		self.api.append("meeting", "series")
+		a, b = await asyncio.wait_for(pending, 1)
+		self.assertEqual(a, b)
+		self.assertEqual([data["seq"] for _, data in a], [2, 3])
+		self.assertEqual([c["seq"] for c in self.seen], [2, 3])
+		# One initial head request, then long-polls only
+		self.assertEqual(self.api.calls[0], (None, 0))
+		self.assertTrue(all(wait == 5 for _, wait in self.api.calls[1:]))
+		self.assertEqual(self.feed.stats()["subscribers"], 2)
+		await first.aclose()
+		await second.aclose()
+		self.assertEqual(self.feed.stats()["subscribers"], 0)
+
+	async def test_resume_from_buffer_and_from_the_api(self):
+		self.feed.start()
+		await asyncio.sleep(0.01)
+		self.api.append("client", "meeting", "meeting", "meeting", "series")
+		await asyncio.sleep(0.05)
+		# The buffer keeps the last 3 of 5 entries
+		self.assertEqual((self.feed.floor, self.feed.head), (2, 5))
+		events = self.feed.follow(3)
+		self.assertEqual([d["seq"] for _, d in await take(events, 2)], [4, 5])
+		await events.aclose()
+		# Older subscribers page through the API until they reach the buffer
+		events = self.feed.follow(0)
+		self.assertEqual([d["seq"] for _, d in await take(events, 5)], [1, 2, 3, 4, 5])
+		self.assertIn((0, 0), self.api.calls)
+		await events.aclose()
+
+	async def test_reset_when_pruned(self):
+		self.api.append("client", "client", "client", "client", "client")
+		self.api.prune(4)
+		self.feed.start()
+		await asyncio.sleep(0.01)
+		events = self.feed.follow(1)
+		self.assertEqual(await anext(events), ("reset", {"next": 5}))
+		# After reloading, the subscriber continues from the head
+		self.api.append("meeting")
+		self.assertEqual(await asyncio.wait_for(anext(events), 1), ("change", self.api.entries[-1]))
+		await events.aclose()
+
+	async def test_poller_reset_clears_caches_and_errors_are_retried(self):
+		failures = [RuntimeError("down")]
+
+		async def flaky(since, wait):
+			if failures:
+				raise failures.pop()
+			return await self.api.fetch(since, wait)
+
+		feed = ChangeFeed(flaky, on_change=self.seen.append, wait=0.01, retry=0.01)
+		feed.start()
+		await asyncio.sleep(0.05)
+		self.api.append("client", "client")
+		self.api.prune(2)
+		await asyncio.sleep(0.05)
+		await feed.stop()
+		self.assertEqual(feed.stats()["errors"], 1)
+		self.assertIn({"seq": 2, "resource": "*", "action": "resync"}, self.seen)
+
+	async def test_catch_up_errors_are_retried(self):
+		self.api.append("client", "meeting", "meeting", "meeting", "series")
+		failures = [RuntimeError("down")]
+
+		async def flaky(since, wait):
+			if since == 0 and failures:
+				raise failures.pop()
+			return await self.api.fetch(since, wait)
+
+		feed = ChangeFeed(flaky, buffer=1, wait=5, retry=0.01)
+		events = feed.follow(0)
+		self.assertEqual(await asyncio.wait_for(anext(events), 1), ("ping", {}))
+		got = await asyncio.wait_for(take(events, 5), 1)
+		self.assertEqual([d["seq"] for _, d in got], [1, 2, 3, 4, 5])
+		self.assertEqual(feed.stats()["errors"], 1)
+		await events.aclose()
+		await feed.stop()
+
+	async def test_heartbeat(self):
+		feed = ChangeFeed(self.api.fetch, wait=1, heartbeat=0.01)
+		events = feed.follow()
+		self.assertEqual(await asyncio.wait_for(anext(events), 1), ("ping", {}))
+		await events.aclose()
+		await feed.stop()
+
+
+if __name__ == "__main__":
+	unittest.main()
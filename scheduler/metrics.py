@@ -0,0 +1,162 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A small dependency-free subset of prometheus_client: counters, histograms
+and gauges with labels, collected in one process-wide `REGISTRY` that the
+Django API (api/metrics.py) and the MCP server both expose on `/metrics`.
+It does not import Django, so the MCP server can use it in `http` mode too.
+
+Values are per process: with several workers, scrape each one or sum them
+in the query. Recording takes a dict lookup and an uncontended lock, a
+microsecond or two per observation.
+"""
+import math
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; the prometheus_client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """Base class; counters and gauges may read their values from `function` at scrape time.
+
+    `function` returns a number, or a dict of label-value tuples to numbers
+    for a labelled metric. It suits totals some object already keeps.
+    """
+    type = ''
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._lock = threading.Lock()
+        self._values = {}
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _check(self, labelvalues):
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {labelvalues}')
+
+    def _snapshot(self):
+        if self.function is None:
+            with self._lock:
+                return sorted(self._values.items())
+        values = self.function()
+        return sorted(values.items() if isinstance(values, dict) else [((), values)])
+
+    def render(self):
+        name = self.name + '_total' if self.type == 'counter' else self.name
+        lines = [f'# HELP {name} {self.documentation}', f'# TYPE {name} {self.type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            try:
+                self._values[labelvalues] += amount
+            except KeyError:
+                self._check(labelvalues)
+                self._values[labelvalues] = amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        return [f'{self.name}_total{_labels(self.labelnames, key)} {_number(value)}' for key, value in self._snapshot()]
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, *labelvalues):
+        self._check(labelvalues)
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def samples(self):
+        return [f'{self.name}{_labels(self.labelnames, key)} {_number(value)}' for key, value in self._snapshot()]
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                self._check(labelvalues)
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), values):
+                cumulative += count
+                le = 'le="%s"' % _number(float(bound))
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(values[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # Re-registering a name (module reloads in tests) replaces the metric
+        self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        return ''.join(metric.render() + '\n' for metric in self._metrics.values())
+
+
+REGISTRY = Registry()
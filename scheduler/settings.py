@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings include the other middleware (api/metrics.py)
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +58,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Development: log SQL repeated this many times within one request, which
+# usually means an N+1 (api/querybudget.py)
+DUPLICATE_QUERY_THRESHOLD = 3
+if DEBUG:
+    MIDDLEWARE.append('api.querybudget.DuplicateQueryMiddleware')
+
 ROOT_URLCONF = 'scheduler.urls'
 
 TEMPLATES = [
@@ -80,10 +91,48 @@ WSGI_APPLICATION = 'scheduler.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SCHEDULER_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        'TEST': {
+            # File-backed (not in-memory) so the concurrent booking tests can
+            # open one connection per thread.
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# SCHEDULER_DB_PROFILE=performance tunes SQLite for concurrent writers (the
+# API under several uvicorn workers, the MCP bridge): WAL so readers never
+# block the writer, synchronous=NORMAL (one fsync per WAL checkpoint
+# instead of per commit; a power loss can drop the last commits, never
+# corrupt the file), bigger page cache and mmap, write transactions that
+# take the lock at BEGIN and wait for it instead of raising "database is
+# locked", and connections kept open across requests (by threads that
+# serve several). The PRAGMAs are run on every new connection by
+# api/dbprofile.py.
+SCHEDULER_DB_PROFILE = os.getenv('SCHEDULER_DB_PROFILE', 'default')
+SQLITE_PRAGMAS = {}
+
+if SCHEDULER_DB_PROFILE == 'performance':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('SCHEDULER_DB_CONN_MAX_AGE', '600')),
+        # Reconnect instead of failing when a kept connection went bad
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            # Seconds to wait for the write lock (SQLite's busy_timeout)
+            'timeout': float(os.getenv('SCHEDULER_DB_BUSY_TIMEOUT', '20')),
+        },
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -65536,  # KiB, i.e. 64 MiB per connection
+        'mmap_size': 268435456,
+    }
+elif SCHEDULER_DB_PROFILE != 'default':
+    raise ImproperlyConfigured(f"SCHEDULER_DB_PROFILE must be 'default' or 'performance', not {SCHEDULER_DB_PROFILE!r}")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -126,6 +175,24 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Serve JSON list responses of clients/meetings through api/fastpath.py
+# (same bytes as the DRF serializers, several times faster)
+API_FAST_LIST = True
+
+# Client search (api/search.py): 'auto' uses the database's index (SQLite
+# FTS5, PostgreSQL pg_trgm) when migration 0006 created it; 'scan' forces
+# LIKE scans
+CLIENT_SEARCH_BACKEND = 'auto'
+
+# Change feed (api/changes.py): entries older than CHANGES_COMPACT_AFTER
+# seconds keep only the latest one per object; pruning drops entries older
+# than CHANGES_RETENTION_DAYS and all but the newest CHANGES_MAX_ROWS. It
+# runs after every CHANGES_PRUNE_EVERY writes and from `prune_changes`.
+CHANGES_RETENTION_DAYS = 7
+CHANGES_MAX_ROWS = 1_000_000
+CHANGES_COMPACT_AFTER = 3600
+CHANGES_PRUNE_EVERY = 1000
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Meeting Scheduler API',
     'DESCRIPTION': 'API to manage clients and schedule meetings.',
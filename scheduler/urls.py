@@ -19,15 +19,28 @@ from django.urls import path, include
 from rest_framework import routers
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
-from api.views import ClientViewSet, MeetingViewSet
+from api import async_views
+from api.metrics import metrics_view
+from api.views import AvailabilityView, ChangesView, ClientViewSet, MeetingSeriesViewSet, MeetingViewSet
 
 router = routers.DefaultRouter()
 router.register(r'clients', ClientViewSet, basename='client')
 router.register(r'meetings', MeetingViewSet, basename='meeting')
+router.register(r'series', MeetingSeriesViewSet, basename='series')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('api/availability/', AvailabilityView.as_view(), name='availability'),
+    path('api/changes/', ChangesView.as_view(), name='changes'),
+    # Async read-only mirrors of the endpoints above (api/async_views.py)
+    path('api/async/clients/', async_views.ClientListView.as_view(), name='async-client-list'),
+    path('api/async/clients/<int:pk>/', async_views.ClientDetailView.as_view(), name='async-client-detail'),
+    path('api/async/meetings/', async_views.MeetingListView.as_view(), name='async-meeting-list'),
+    path('api/async/meetings/<int:pk>/', async_views.MeetingDetailView.as_view(), name='async-meeting-detail'),
+    path('api/async/availability/', async_views.AvailabilityView.as_view(), name='async-availability'),
+    path('api/async/changes/', async_views.ChangesView.as_view(), name='async-changes'),
     path('api/', include(router.urls)),
 ]
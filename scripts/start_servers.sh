@@ -7,12 +7,20 @@ cd "$ROOT_DIR"
 
 : "${DJANGO_PORT:=8000}"
 : "${MCP_PORT:=8001}"
+# runserver (default) or uvicorn; uvicorn serves scheduler/asgi.py with
+# DJANGO_WORKERS processes, which the async endpoints under /api/async/ need.
+: "${DJANGO_SERVER:=runserver}"
+: "${DJANGO_WORKERS:=4}"
 
 source .venv/bin/activate
 
-echo "Starting Django API on :$DJANGO_PORT ..."
+echo "Starting Django API on :$DJANGO_PORT ($DJANGO_SERVER) ..."
 (
-  python manage.py runserver 0.0.0.0:"$DJANGO_PORT"
+  if [ "$DJANGO_SERVER" = "uvicorn" ]; then
+    uvicorn scheduler.asgi:application --host 0.0.0.0 --port "$DJANGO_PORT" --workers "$DJANGO_WORKERS"
+  else
+    python manage.py runserver 0.0.0.0:"$DJANGO_PORT"
+  fi
 ) &
 DJANGO_PID=$!
 